@@ -0,0 +1,39 @@
+#!/usr/local/bin/python3.6
+import argparse
+import json
+import sys
+
+from yaean.batch import load_job, run_job, format_report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run YaEAN Organizer animation edits on many EAN files")
+    parser.add_argument('job', help="JSON job spec (files, animations, bone_filters, operations)")
+    parser.add_argument('-j', '--workers', type=int, help="Number of worker processes (default: all cores)")
+    parser.add_argument('-o', '--output', help="Directory to write edited files to instead of overwriting them")
+    parser.add_argument('-r', '--recursive', action='store_true', help="Search subdirectories of directories in files")
+    parser.add_argument('--report', help="Write the summary report as JSON to this path")
+    args = parser.parse_args()
+
+    job = load_job(args.job)
+    if args.workers:
+        job['workers'] = args.workers
+    if args.output:
+        job['output'] = args.output
+    if args.recursive:
+        job['recursive'] = True
+
+    def progress(result, done, total):
+        print("[{}/{}] {} {}".format(done, total, 'OK' if result['ok'] else 'FAILED', result['file']), flush=True)
+
+    report = run_job(job, progress)
+    print()
+    print(format_report(report))
+    if args.report:
+        with open(args.report, 'w') as f:
+            json.dump(report, f, indent=4)
+    return 1 if report['failed'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,20 +1,28 @@
 #!/usr/local/bin/python3.6
+from functools import partial
 import os
 import sys
 import traceback
 
+from yaean import startup
+
 from pubsub import pub
 import wx
 from wx.lib.dialogs import MultiMessageDialog
 
-from pyxenoverse.ean import EAN
-from pyxenoverse.esk import ESK
-from pyxenoverse.gui import create_backup
 from yaean.panels.anim_main import AnimMainPanel
 from yaean.panels.anim_side import AnimSidePanel
 from yaean.panels.bone_main import BoneMainPanel
 from yaean.panels.bone_side import BoneSidePanel
+from yaean.panels.loading import LoadingPanel
 from yaean.helpers import build_anim_list, build_bone_tree
+from yaean.instrument import get_instrument, operation, touch
+from yaean.journal import Journal
+from yaean.loader import LoadJob
+from yaean.save import save_ean, save_esk
+from yaean.settings import load_settings
+
+startup.mark('imports')
 
 VERSION = '0.4.1'
 
@@ -25,6 +33,9 @@ class MainWindow(wx.Frame):
         self.copied_animations = None
         self.copied_bones = None
         self.copied_bone_info = None
+        self.load_jobs = []
+        self.settings = load_settings()
+        self.journal = Journal(self.settings['undo_memory_limit_mb'] * 1024 * 1024)
         self.locale = wx.Locale(wx.LANGUAGE_ENGLISH)
 
         # A "-1" in the size parameter instructs wxWidgets to use the default size.
@@ -37,9 +48,20 @@ class MainWindow(wx.Frame):
         menu_about= filemenu.Append(wx.ID_ABOUT)
         menu_exit = filemenu.Append(wx.ID_EXIT)
 
+        editmenu = wx.Menu()
+        self.menu_undo = editmenu.Append(wx.ID_UNDO, "&Undo\tCtrl+Z")
+        self.menu_redo = editmenu.Append(wx.ID_REDO, "&Redo\tCtrl+Y")
+        editmenu.Bind(wx.EVT_MENU_OPEN, self.on_edit_menu_open)
+
+        viewmenu = wx.Menu()
+        menu_performance = viewmenu.Append(-1, "&Performance\tCtrl+Shift+P", " Show timings of recent operations")
+        self.performance_frame = None
+
         # Creating the menubar.
         menu_bar = wx.MenuBar()
         menu_bar.Append(filemenu,"&File") # Adding the "filemenu" to the MenuBar
+        menu_bar.Append(editmenu, "&Edit")
+        menu_bar.Append(viewmenu, "&View")
         self.SetMenuBar(menu_bar)  # Adding the MenuBar to the Frame content.
 
         # Publisher
@@ -54,6 +76,9 @@ class MainWindow(wx.Frame):
         # Events
         self.Bind(wx.EVT_MENU, self.on_exit, menu_exit)
         self.Bind(wx.EVT_MENU, self.on_about, menu_about)
+        self.Bind(wx.EVT_MENU, self.on_undo, id=wx.ID_UNDO)
+        self.Bind(wx.EVT_MENU, self.on_redo, id=wx.ID_REDO)
+        self.Bind(wx.EVT_MENU, self.on_performance, menu_performance)
 
         # Tabs
         self.main_notebook = wx.Notebook(self)
@@ -89,10 +114,17 @@ class MainWindow(wx.Frame):
         self.esk_side_panel = BoneSidePanel(self.esk_side_notebook, self, "ESK")
         self.esk_side_notebook.AddPage(self.esk_side_panel, "Bone List")
 
+        # Loading progress
+        self.loading_panel = LoadingPanel(self)
+        self.loading_panel.Bind(wx.EVT_BUTTON, self.on_cancel_load, id=wx.ID_CANCEL)
+
         # Sizer
-        self.sizer = wx.BoxSizer(wx.HORIZONTAL)
-        self.sizer.Add(self.main_notebook, 1, wx.ALL|wx.EXPAND)
-        self.sizer.Add(self.side_notebook, 1, wx.ALL|wx.EXPAND)
+        self.notebook_sizer = wx.BoxSizer(wx.HORIZONTAL)
+        self.notebook_sizer.Add(self.main_notebook, 1, wx.ALL|wx.EXPAND)
+        self.notebook_sizer.Add(self.side_notebook, 1, wx.ALL|wx.EXPAND)
+        self.sizer = wx.BoxSizer(wx.VERTICAL)
+        self.sizer.Add(self.notebook_sizer, 1, wx.EXPAND)
+        self.sizer.Add(self.loading_panel, 0, wx.EXPAND)
         self.SetSizer(self.sizer)
         self.SetAutoLayout(1)
 
@@ -142,6 +174,45 @@ class MainWindow(wx.Frame):
     def on_exit(self, _):
         self.Close(True)  # Close the frame.
 
+    def on_edit_menu_open(self, _):
+        self.menu_undo.Enable(self.journal.can_undo())
+        self.menu_redo.Enable(self.journal.can_redo())
+
+    def on_performance(self, _):
+        from yaean.dlg.performance import PerformanceFrame
+        if not self.performance_frame:
+            self.performance_frame = PerformanceFrame(self, get_instrument())
+        self.performance_frame.Show()
+        self.performance_frame.Raise()
+
+    def refresh_main(self, entry):
+        if self.main['ean'] is not None:
+            self.main['anim_list'].refresh()
+            self.main['ean_bone_panel'].tree.build(self.main['ean'].skeleton, keep_view=True)
+        if self.main['esk'] is not None and entry.touches_skeleton(self.main['esk']):
+            bones = self.main['esk'].bones
+            for bone in bones:
+                bone.calculate_transform_matrix_from_skinning_matrix(bones, True)
+            self.main['esk_bone_panel'].tree.build(self.main['esk'], keep_view=True)
+
+    def on_undo(self, _):
+        with operation("Undo"):
+            entry = self.journal.undo()
+            if entry is not None:
+                self.refresh_main(entry)
+        if entry is None:
+            return
+        self.statusbar.SetStatusText("Undid {}".format(entry.label))
+
+    def on_redo(self, _):
+        with operation("Redo"):
+            entry = self.journal.redo()
+            if entry is not None:
+                self.refresh_main(entry)
+        if entry is None:
+            return
+        self.statusbar.SetStatusText("Redid {}".format(entry.label))
+
     def open_file(self, obj):
         with wx.FileDialog(self, "Choose a file", obj['dirname'], "", "*.ean;*.esk", wx.FD_OPEN) as dlg:
             if dlg.ShowModal() == wx.ID_OK:
@@ -151,12 +222,39 @@ class MainWindow(wx.Frame):
         obj['dirname'] = dirname
         path = os.path.join(obj['dirname'], filename)
         self.statusbar.SetStatusText("Loading...")
-        new_ean = EAN()
-        new_esk = ESK()
-        if new_ean.load(path):
-            obj['ean'] = new_ean
-            build_anim_list(obj['anim_list'], obj['ean'])
-            build_bone_tree(obj['ean_bone_list'], obj['ean'].skeleton)
+        # The side file is only browsed and copied from, so its animations are decoded on demand
+        job = LoadJob(path, partial(self.on_file_loaded, filename, obj), lazy=obj is self.side)
+        self.load_jobs.append(job)
+        self.loading_panel.update(self.load_jobs)
+        job.start()
+
+    def on_cancel_load(self, _):
+        for job in self.load_jobs:
+            job.cancel()
+        self.load_jobs = []
+        self.loading_panel.update(self.load_jobs)
+        self.statusbar.SetStatusText("Loading cancelled")
+
+    def on_file_loaded(self, filename, obj, job, filetype, data, error):
+        if job not in self.load_jobs:
+            return
+        self.load_jobs.remove(job)
+        self.loading_panel.update(self.load_jobs)
+        if error:
+            raise error[1].with_traceback(error[2])
+
+        path = job.path
+        if obj is self.main and filetype in ('EAN', 'ESK'):
+            # The history refers to objects of the file being replaced
+            self.journal.clear()
+        if filetype == 'EAN':
+            with operation("Load EAN", job.seconds, file=filename, lazy=job.lazy,
+                           parse_ms=job.seconds * 1000) as record:
+                obj['ean'] = data
+                build_anim_list(obj['anim_list'], obj['ean'])
+                build_bone_tree(obj['ean_bone_panel'].tree, obj['ean'].skeleton)
+                record.details['animations'] = len(data.animations)
+                touch(bones=len(data.skeleton.bones))
             obj['anim_panel'].name.SetLabel(filename)
             obj['anim_panel'].Layout()
             obj['ean_bone_panel'].name.SetLabel(filename)
@@ -165,9 +263,11 @@ class MainWindow(wx.Frame):
             obj['notebook'].Layout()
             if obj['notebook'] == self.side['notebook']:
                 self.copied_animations = None
-        elif new_esk.load(path):
-            obj['esk'] = new_esk
-            build_bone_tree(obj['esk_bone_list'], obj['esk'])
+        elif filetype == 'ESK':
+            with operation("Load ESK", job.seconds, file=filename, parse_ms=job.seconds * 1000):
+                obj['esk'] = data
+                build_bone_tree(obj['esk_bone_panel'].tree, obj['esk'])
+                touch(bones=len(data.bones))
             obj['esk_bone_panel'].name.SetLabel(filename)
             obj['esk_bone_panel'].Layout()
             obj['notebook'].ChangeSelection(1)
@@ -200,6 +300,7 @@ class MainWindow(wx.Frame):
         self.load_file(dirname, filename, self.side)
 
     def save_file(self, obj, filetype):
+        from yaean.tracks import sync_tracks
         if obj[filetype.lower()] is None:
             with wx.MessageDialog(self, " No {} Loaded".format(filetype), "Warning", wx.OK) as dlg:
                 dlg.ShowModal()
@@ -210,14 +311,22 @@ class MainWindow(wx.Frame):
                 filename = dlg.GetFilename()
                 obj['dirname'] = dlg.GetDirectory()
                 self.statusbar.SetStatusText("Saving...")
-                create_backup(obj['dirname'], filename)
                 path = os.path.join(obj['dirname'], filename)
-                removed_nodes = obj[filetype.lower()].save(path)
+                status = "Saved {}".format(path)
+                with operation("Save " + filetype, file=filename) as record:
+                    if filetype == 'EAN':
+                        sync_tracks(obj['ean'])
+                        removed_nodes, saved, encoded = save_ean(obj['ean'], path, backup=True)
+                        record.details.update(saved=saved, encoded=len(encoded))
+                        touch(encoded, ean=obj['ean'])
+                        status += " ({} animation(s), {} re-encoded)".format(saved, len(encoded))
+                    else:
+                        removed_nodes = save_esk(obj['esk'], path, backup=True)
                 msg = ''
                 if removed_nodes:
                     msg = "The following animation nodes were removed:\n{}".format(
                         '\n'.join([' * ' + node for node in sorted(removed_nodes)]))
-                self.statusbar.SetStatusText("Saved {}".format(path))
+                self.statusbar.SetStatusText(status)
                 with MultiMessageDialog(
                         self, "Saved to {} successfully".format(path), filetype + " Saved", msg, wx.OK) as saved:
                     saved.ShowModal()
@@ -232,10 +341,23 @@ class MainWindow(wx.Frame):
         self.copied_bone_info = filename, bone
 
 
+def report_startup(frame):
+    startup.mark('first idle')
+    startup.print_phases()
+    frame.Close()
+
+
 if __name__ == '__main__':
+    if startup.TIME_FLAG in sys.argv:
+        sys.exit(startup.measure(os.path.abspath(sys.argv[0])))
     app = wx.App(False)
+    startup.mark('wx.App')
     dirname = filename = None
-    if len(sys.argv) > 1:
-        dirname, filename = os.path.split(sys.argv[1])
+    paths = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    if paths:
+        dirname, filename = os.path.split(paths[0])
     frame = MainWindow(None, f"YaEAN Organizer v{VERSION}", dirname, filename)
+    startup.mark('main window')
+    if startup.REPORT_FLAG in sys.argv:
+        wx.CallAfter(report_startup, frame)
     app.MainLoop()
@@ -0,0 +1,110 @@
+"""Compare the batched quaternion module against the old per-keyframe pyquaternion path.
+
+    python -m benchmarks.quaternion [-n KEYFRAMES] [-r REPEAT]
+"""
+import argparse
+import timeit
+
+import numpy as np
+from pyquaternion import Quaternion
+
+from yaean import quaternion
+
+
+def scalar_euler_to_quaternion(x, y, z):
+    rx = np.radians(x)/2
+    ry = np.radians(y)/2
+    rz = np.radians(z)/2
+
+    qx = np.sin(rx) * np.cos(ry) * np.cos(rz) - np.cos(rx) * np.sin(ry) * np.sin(rz)
+    qy = np.cos(rx) * np.sin(ry) * np.cos(rz) + np.sin(rx) * np.cos(ry) * np.sin(rz)
+    qz = np.cos(rx) * np.cos(ry) * np.sin(rz) - np.sin(rx) * np.sin(ry) * np.cos(rz)
+    qw = np.cos(rx) * np.cos(ry) * np.cos(rz) + np.sin(rx) * np.sin(ry) * np.sin(rz)
+
+    return Quaternion(qw, qx, qy, qz)
+
+
+def scalar_quaternion_to_euler(q):
+    t0 = +2.0 * (q.w * q.x + q.y * q.z)
+    t1 = +1.0 - 2.0 * (q.x * q.x + q.y * q.y)
+    t2 = max(-1.0, min(1.0, +2.0 * (q.w * q.y - q.z * q.x)))
+    t3 = +2.0 * (q.w * q.z + q.x * q.y)
+    t4 = +1.0 - 2.0 * (q.y * q.y + q.z * q.z)
+    return np.degrees(np.arctan2(t0, t1)), np.degrees(np.arcsin(t2)), np.degrees(np.arctan2(t3, t4))
+
+
+class Keyframe:
+    __slots__ = ('w', 'x', 'y', 'z')
+
+    def __init__(self, w, x, y, z):
+        self.w, self.x, self.y, self.z = w, x, y, z
+
+
+def run(count, repeat):
+    rng = np.random.default_rng(0)
+    values = quaternion.normalize(rng.normal(size=(count, 4))).astype(np.float32)
+    angles = rng.uniform(-180.0, 180.0, size=(count, 3))
+    keyframes = [Keyframe(*row) for row in values.tolist()]
+    rotation = quaternion.euler_to_quaternion(10.0, 45.0, -30.0)
+
+    def old_rotate():
+        rq = Quaternion(*rotation)
+        for keyframe in keyframes:
+            kq = Quaternion(keyframe.w, keyframe.x, keyframe.y, keyframe.z)
+            keyframe.w, keyframe.x, keyframe.y, keyframe.z = kq * rq
+
+    def new_rotate():
+        values[:] = quaternion.multiply(values, rotation)
+
+    def old_mirror():
+        for keyframe in keyframes:
+            keyframe.y *= -1.0
+            keyframe.z *= -1.0
+
+    def new_mirror():
+        values[:] = quaternion.mirror(values)
+
+    def old_from_euler():
+        return [scalar_euler_to_quaternion(*row) for row in angles]
+
+    def new_from_euler():
+        return quaternion.from_euler(*angles.T)
+
+    quaternions = [Quaternion(*row) for row in values.tolist()]
+
+    def old_to_euler():
+        return [scalar_quaternion_to_euler(q) for q in quaternions]
+
+    def new_to_euler():
+        return quaternion.to_euler(values)
+
+    cases = [
+        ('rotate', old_rotate, new_rotate),
+        ('mirror', old_mirror, new_mirror),
+        ('euler -> quaternion', old_from_euler, new_from_euler),
+        ('quaternion -> euler', old_to_euler, new_to_euler),
+    ]
+
+    # Sanity check that both paths agree before timing them
+    expected = np.array([list(q) for q in old_from_euler()])
+    assert np.allclose(expected, new_from_euler(), atol=1e-9)
+    assert np.allclose(np.array(old_to_euler()), new_to_euler(), atol=1e-6)
+
+    print("{} keyframes, best of {}".format(count, repeat))
+    print("{:<22}{:>12}{:>12}{:>10}".format('operation', 'old (ms)', 'new (ms)', 'speedup'))
+    for name, old, new in cases:
+        old_time = min(timeit.repeat(old, number=1, repeat=repeat)) * 1000
+        new_time = min(timeit.repeat(new, number=1, repeat=repeat)) * 1000
+        print("{:<22}{:>12.3f}{:>12.3f}{:>9.1f}x".format(name, old_time, new_time, old_time / new_time))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('-n', '--keyframes', type=int, default=20000)
+    parser.add_argument('-r', '--repeat', type=int, default=5)
+    args = parser.parse_args()
+    run(args.keyframes, args.repeat)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+"""Compare the vectorized resampler against pyxenoverse's Animation.set_duration.
+
+    python -m benchmarks.resample [-a ANIMATIONS] [-b BONES] [-f FRAMES] [-d DURATION] [-r REPEAT]
+
+Both run on copies of the same synthetic EAN.  Before timing them, the frames each one
+keeps and the values at the frames both keep are compared track by track.
+"""
+import argparse
+import copy
+import time
+
+import numpy as np
+
+from benchmarks.synthetic import make_ean
+from yaean import operations
+from yaean.constants import ORIENTATION_FLAG
+from yaean.tracks import get_track, sync_tracks
+
+TOLERANCE = 1e-3
+
+
+def old_set_duration(ean, duration):
+    for animation in ean.animations:
+        animation.set_duration(target_duration=duration)
+
+
+def new_set_duration(ean, duration):
+    operations.set_duration(ean, range(len(ean.animations)), duration)
+    sync_tracks(ean)
+
+
+def get_tracks(ean):
+    tracks = []
+    for animation in ean.animations:
+        for node in animation.nodes:
+            for keyframed_animation in node.keyframed_animations:
+                track = get_track(ean, keyframed_animation)
+                tracks.append((keyframed_animation.flag, track.frames, track.values))
+    return tracks
+
+
+def compare(old, new):
+    """(tracks with the same frames, frames compared, largest value difference)."""
+    same_frames = compared = 0
+    largest = 0.0
+    for (flag, old_frames, old_values), (_, new_frames, new_values) in zip(get_tracks(old), get_tracks(new)):
+        same_frames += np.array_equal(old_frames, new_frames)
+        shared, old_index, new_index = np.intersect1d(old_frames, new_frames, return_indices=True)
+        difference = np.abs(old_values[old_index] - new_values[new_index])
+        if flag == ORIENTATION_FLAG:
+            # q and -q are the same rotation
+            difference = np.minimum(difference, np.abs(old_values[old_index] + new_values[new_index]))
+        compared += len(shared)
+        if len(shared):
+            largest = max(largest, float(difference.max()))
+    return same_frames, compared, largest
+
+
+def measure(ean, func, duration, repeat):
+    times = []
+    for _ in range(repeat):
+        copied = copy.deepcopy(ean)
+        start = time.perf_counter()
+        func(copied, duration)
+        times.append(time.perf_counter() - start)
+    return min(times) * 1000
+
+
+def run(animations, bones, frames, duration, repeat):
+    ean = make_ean(animations, bones, frames)
+    old, new = copy.deepcopy(ean), copy.deepcopy(ean)
+    old_set_duration(old, duration)
+    new_set_duration(new, duration)
+    track_count = len(get_tracks(ean))
+    same_frames, compared, largest = compare(old, new)
+    print("{} animations x {} tracks, {} -> {} frames, best of {}".format(
+        animations, track_count // animations, frames, duration, repeat))
+    print("{} of {} tracks keep the same frames, largest difference over {} shared frames {:.6f}{}".format(
+        same_frames, track_count, compared, largest, '  MISMATCH' if largest > TOLERANCE else ''))
+
+    old_time = measure(ean, old_set_duration, duration, repeat)
+    new_time = measure(ean, new_set_duration, duration, repeat)
+    print("{:<22}{:>12}{:>12}{:>10}".format('operation', 'old (ms)', 'new (ms)', 'speedup'))
+    print("{:<22}{:>12.3f}{:>12.3f}{:>9.1f}x".format('set duration', old_time, new_time, old_time / new_time))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('-a', '--animations', type=int, default=50)
+    parser.add_argument('-b', '--bones', type=int, default=20)
+    parser.add_argument('-f', '--frames', type=int, default=120)
+    parser.add_argument('-d', '--duration', type=int, default=180)
+    parser.add_argument('-r', '--repeat', type=int, default=3)
+    args = parser.parse_args()
+    run(args.animations, args.bones, args.frames, args.duration, args.repeat)
+
+
+if __name__ == '__main__':
+    main()
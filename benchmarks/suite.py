@@ -0,0 +1,220 @@
+"""Time the organizer's main operations on synthetic files at several sizes.
+
+    python -m benchmarks.suite [--esk] [--template TEMPLATE.ean] [--esk-template TEMPLATE.esk]
+                               [-s SCALE ...] [-r REPEAT] [-o results.json]
+                               [--compare baseline.json] [--threshold 1.10]
+
+Every operation runs headlessly on freshly loaded data so runs don't affect each other.
+The list and tree builds need wx and a display and are skipped without them.  Results
+can be written as JSON and compared against an earlier run, in which case the exit status
+is 1 if anything got slower than the threshold.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.synthetic import make_ean, make_esk
+from yaean import operations
+from yaean.clipboard import AnimationClipboard
+from yaean.formats import load
+from yaean.remap import get_remap_table, skeleton_names
+from yaean.save import save_ean, save_esk
+from yaean.tracks import sync_tracks
+
+# name: (animations, bones, keyframes)
+SCALES = {
+    'small': (20, 50, 30),
+    'medium': (100, 150, 60),
+    'large': (400, 300, 120),
+    'huge': (200, 600, 120),
+}
+
+
+def measure(setup, func, repeat):
+    times = []
+    for _ in range(repeat):
+        state = setup()
+        start = time.perf_counter()
+        func(state)
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def get_frame():
+    # A hidden frame to build widgets in, or None when wx can't open a display
+    try:
+        import wx
+        app = wx.App.Get() or wx.App(False)
+        frame = wx.Frame(None)
+    except (Exception, SystemExit):
+        return None
+    frame.app = app
+    return frame
+
+
+def paste(state):
+    ean, clipboard = state
+    sync_tracks(ean)
+    destination = skeleton_names(ean.skeleton)
+    table = get_remap_table(clipboard.bone_names, destination, frozenset(destination))
+    operations.paste_animations(ean, [(animation, copied_animation.remapped(table)[0], table.bone_filters)
+                                      for animation, copied_animation in zip(ean.animations, clipboard)])
+
+
+def list_build(frame, ean):
+    from yaean.anim_list import AnimListCtrl
+    anim_list = AnimListCtrl(frame)
+    anim_list.set_ean(ean)
+    for i in range(anim_list.GetItemCount()):
+        for column in range(anim_list.GetColumnCount()):
+            anim_list.OnGetItemText(i, column)
+    anim_list.Destroy()
+
+
+def tree_build(frame, skeleton):
+    import wx.dataview
+    from yaean.bone_tree import BoneTree
+    ctrl = wx.dataview.TreeListCtrl(frame, style=wx.dataview.TL_MULTIPLE | wx.dataview.TL_CHECKBOX)
+    ctrl.AppendColumn("Bone")
+    BoneTree(ctrl).build(skeleton)
+    ctrl.Destroy()
+
+
+def run_scale(name, template, esk, esk_template, repeat, frame, dirname):
+    animations, bones, keyframes = SCALES[name]
+    path = os.path.join(dirname, '{}.ean'.format(name))
+    make_ean(animations, bones, keyframes, template_path=template).save(path)
+    esk_path = None
+    if esk or esk_template:
+        esk_path = os.path.join(dirname, '{}.esk'.format(name))
+        make_esk(bones, esk_template or template).save(esk_path)
+
+    def fresh():
+        return load(path)[1]
+
+    def fresh_esk():
+        return load(esk_path)[1]
+
+    everything = list(range(animations))
+    source = fresh()
+    out_path = os.path.join(dirname, '{}.out.ean'.format(name))
+
+    def saved():
+        ean = fresh()
+        save_ean(ean, out_path)
+        operations.set_offset(ean, [0], 0, 0.0, 0.1, 0.0)
+        sync_tracks(ean)
+        return ean
+
+    cases = [
+        ('load', lambda: None, lambda _: load(path)),
+        ('load_lazy', lambda: None, lambda _: load(path, lazy=True)),
+        ('clipboard', fresh, lambda ean: AnimationClipboard(ean.animations)),
+        # A new clipboard every run, so its resampled snapshots aren't reused from the last one
+        ('paste', lambda: (fresh(), AnimationClipboard(source.animations, source.skeleton)), paste),
+        ('offset', fresh, lambda ean: operations.set_offset(ean, everything, 0, 0.0, 0.1, 0.0)),
+        ('rotation', fresh, lambda ean: operations.set_rotation(ean, everything, 0, 0.0, 90.0, 0.0)),
+        ('mirror', fresh, lambda ean: operations.mirror_animations(ean, everything)),
+        ('reduce_keyframes', fresh, lambda ean: operations.reduce_keyframes(
+            ean, everything, range(bones), 0.0001, 0.05, 0.0001)),
+        ('save', fresh, lambda ean: save_ean(ean, out_path)),
+        ('save_incremental', saved, lambda ean: save_ean(ean, out_path)),
+    ]
+    if frame is not None:
+        cases.append(('list_build', fresh, lambda ean: list_build(frame, ean)))
+        cases.append(('tree_build', fresh, lambda ean: tree_build(frame, ean.skeleton)))
+    if esk_path:
+        esk_out_path = os.path.join(dirname, '{}.out.esk'.format(name))
+        cases.append(('esk_load', lambda: None, lambda _: load(esk_path)))
+        cases.append(('esk_save', fresh_esk, lambda esk: save_esk(esk, esk_out_path)))
+        if frame is not None:
+            cases.append(('esk_tree_build', fresh_esk, lambda esk: tree_build(frame, esk)))
+
+    results = []
+    for operation, setup, func in cases:
+        times = measure(setup, func, repeat)
+        results.append({
+            'scale': name,
+            'animations': animations,
+            'bones': bones,
+            'keyframes': keyframes,
+            'operation': operation,
+            'best_ms': min(times) * 1000,
+            'median_ms': statistics.median(times) * 1000,
+        })
+        print("{:<8}{:<20}{:>12.3f}{:>12.3f}".format(
+            name, operation, results[-1]['best_ms'], results[-1]['median_ms']))
+    return results
+
+
+def compare(results, baseline, threshold):
+    old = {(r['scale'], r['operation']): r['best_ms'] for r in baseline['results']}
+    regressions = []
+    print("\n{:<8}{:<20}{:>12}{:>12}{:>10}".format('scale', 'operation', 'old (ms)', 'new (ms)', 'ratio'))
+    for result in results:
+        key = (result['scale'], result['operation'])
+        if key not in old:
+            continue
+        ratio = result['best_ms'] / old[key] if old[key] else 1.0
+        flag = ''
+        if ratio > threshold:
+            flag = '  SLOWER'
+            regressions.append(key)
+        print("{:<8}{:<20}{:>12.3f}{:>12.3f}{:>9.2f}x{}".format(
+            key[0], key[1], old[key], result['best_ms'], ratio, flag))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--esk', action='store_true', help="time ESK loading and saving too")
+    parser.add_argument('--template', help="EAN to copy the header and rest pose from")
+    parser.add_argument('--esk-template', help="ESK to copy the header and rest pose from (default: --template), "
+                                               "implies --esk")
+    parser.add_argument('-s', '--scale', action='append', choices=list(SCALES))
+    parser.add_argument('-r', '--repeat', type=int, default=3)
+    parser.add_argument('-o', '--output')
+    parser.add_argument('--compare')
+    parser.add_argument('--threshold', type=float, default=1.10)
+    args = parser.parse_args()
+
+    frame = get_frame()
+    if frame is None:
+        print("wx is not available, skipping list and tree builds")
+    print("{:<8}{:<20}{:>12}{:>12}".format('scale', 'operation', 'best (ms)', 'median (ms)'))
+    results = []
+    with tempfile.TemporaryDirectory() as dirname:
+        for name in args.scale or list(SCALES):
+            results.extend(run_scale(name, args.template, args.esk, args.esk_template, args.repeat, frame, dirname))
+
+    report = {
+        'meta': {
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': sys.version.split()[0],
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'template': os.path.basename(args.template) if args.template else None,
+            'repeat': args.repeat,
+        },
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if compare(results, baseline, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,159 @@
+"""Write synthetic EAN/ESK files of a given size.
+
+    python -m benchmarks.synthetic OUTPUT.ean [-a ANIMATIONS] [-b BONES] [-k KEYFRAMES]
+                                   [--esk OUTPUT.esk] [--template TEMPLATE.ean] [--seed SEED]
+
+Files are built from pyxenoverse's default EAN and ESK objects, so no input file is needed.
+A template, if given, supplies the file header and a bone to copy the rest pose from
+instead, and any EAN (or ESK) the organizer can open will do.  The skeleton is a b_C_Base root with a
+centre chain and pairs of b_L_/b_R_ chains, so mirroring works on every animation.  Each
+animation has position, orientation and scale keyframes on every frame of every bone,
+like an unreduced mocap export.
+"""
+import argparse
+import copy
+import types
+
+import numpy as np
+
+from pyxenoverse.ean import EAN
+from pyxenoverse.ean.animation import Animation
+from pyxenoverse.esk import ESK
+from pyxenoverse.esk.bone import Bone
+
+from yaean import quaternion
+from yaean.clipboard import AnimationSnapshot
+from yaean.constants import POSITION_FLAG, ORIENTATION_FLAG, SCALE_FLAG
+from yaean.formats import LOADERS, probe
+from yaean.lazy_ean import LazyKeyframedAnimation, LazyNode
+
+NO_BONE = 65535
+CHAIN_LENGTH = 8
+# Position, orientation (x, y, z, w) and scale of every generated bone
+REST_POSE = [[0.0, 0.1, 0.0, 1.0], [0.0, 0.0, 0.0, 1.0], [1.0, 1.0, 1.0, 1.0]]
+
+
+def bone_layout(count, chain_length=CHAIN_LENGTH):
+    """(name, parent) for each bone, in preorder."""
+    layout = [('b_C_Base', None)]
+    remaining = count - 1
+    spine = min(remaining, chain_length) + (max(remaining - chain_length, 0) % 2)
+    for i in range(spine):
+        layout.append(('b_C_Spine{:03d}'.format(i), 0 if i == 0 else len(layout) - 1))
+    remaining -= spine
+    pair = 0
+    while remaining > 0:
+        length = min(chain_length, remaining // 2)
+        for side in 'LR':
+            for i in range(length):
+                layout.append(('b_{}_Chain{:03d}_{:03d}'.format(side, pair, i), 0 if i == 0 else len(layout) - 1))
+        remaining -= 2 * length
+        pair += 1
+    return layout
+
+
+def make_bones(template, count):
+    """count bones in bone_layout() order, copying template's rest pose or using REST_POSE."""
+    layout = bone_layout(count)
+    children = [[] for _ in layout]
+    for index, (_, parent) in enumerate(layout):
+        if parent is not None:
+            children[parent].append(index)
+
+    bones = []
+    for index, (name, parent) in enumerate(layout):
+        bone = Bone()
+        if template is not None:
+            bone.paste(template)
+        else:
+            bone.skinning_matrix = copy.deepcopy(REST_POSE)
+        bone.name = name
+        bone.index = index
+        bone.parent_index = NO_BONE if parent is None else parent
+        bone.child_index = children[index][0] if children[index] else NO_BONE
+        bone.sibling_index = NO_BONE
+        bones.append(bone)
+    for siblings in children:
+        for a, b in zip(siblings, siblings[1:]):
+            bones[a].sibling_index = b
+    if template is None:
+        for bone in bones:
+            bone.calculate_transform_matrix_from_skinning_matrix(bones, True)
+    return bones
+
+
+def make_track(rng, flag, keyframes):
+    frames = np.arange(keyframes, dtype=np.int32)
+    if flag == ORIENTATION_FLAG:
+        values = quaternion.normalize(np.array([1.0, 0.0, 0.0, 0.0]) + np.cumsum(
+            rng.normal(scale=0.01, size=(keyframes, 4)), axis=0))
+    elif flag == POSITION_FLAG:
+        values = np.cumsum(rng.normal(scale=0.005, size=(keyframes, 4)), axis=0)
+        values[:, 0] = 1.0
+    else:
+        values = 1.0 + rng.normal(scale=0.001, size=(keyframes, 4))
+    return LazyKeyframedAnimation(flag, frames, values.astype(np.float32))
+
+
+def make_animation(ean, rng, name, bones, keyframes):
+    source = types.SimpleNamespace(
+        name=name,
+        frame_count=keyframes,
+        frame_index_size=0 if keyframes <= 256 else 1,
+        frame_float_size=2,
+        nodes=[LazyNode(bone.index, bone.name, [make_track(rng, flag, keyframes)
+                                                for flag in (POSITION_FLAG, ORIENTATION_FLAG, SCALE_FLAG)])
+               for bone in bones])
+    animation = Animation(ean)
+    animation.paste(AnimationSnapshot(source))
+    return animation
+
+
+def make_ean(animations, bones, keyframes, seed=0, template_path=None):
+    ean = EAN()
+    template = None
+    if template_path is not None:
+        if not ean.load(template_path):
+            raise ValueError("Could not load template {}".format(template_path))
+        template = ean.skeleton.bones[0]
+    elif getattr(ean, 'skeleton', None) is None:
+        ean.skeleton = ESK()
+    rng = np.random.default_rng(seed)
+    ean.skeleton.bones = make_bones(template, bones)
+    ean.animations = [make_animation(ean, rng, 'SYNTH_{:04d}'.format(i), ean.skeleton.bones, keyframes)
+                      for i in range(animations)]
+    return ean
+
+
+def make_esk(bones, template_path=None):
+    esk = ESK()
+    template = None
+    if template_path is not None:
+        filetype = probe(template_path)
+        loaded = LOADERS[filetype]() if filetype else None
+        if loaded is None or not loaded.load(template_path):
+            raise ValueError("Could not load template {}".format(template_path))
+        # An EAN's skeleton is an ESK, so either kind of file can be the template
+        esk = loaded.skeleton if filetype == 'EAN' else loaded
+        template = copy.deepcopy(esk.bones[0])
+    esk.bones = make_bones(template, bones)
+    return esk
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('output')
+    parser.add_argument('-a', '--animations', type=int, default=100)
+    parser.add_argument('-b', '--bones', type=int, default=150)
+    parser.add_argument('-k', '--keyframes', type=int, default=60)
+    parser.add_argument('--esk', metavar='OUTPUT')
+    parser.add_argument('--template', help="EAN to copy the header and rest pose from")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    make_ean(args.animations, args.bones, args.keyframes, args.seed, args.template).save(args.output)
+    if args.esk:
+        make_esk(args.bones, args.template).save(args.esk)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,39 @@
+import os
+
+import pytest
+
+pytest.importorskip('pyxenoverse')
+
+from yaean.batch import expand_files, get_output_paths
+
+
+@pytest.fixture
+def tree(tmp_path):
+    for name in ('a.ean', 'notes.txt', os.path.join('sub', 'a.ean')):
+        path = tmp_path / name
+        path.parent.mkdir(exist_ok=True)
+        path.write_bytes(b'#EAN')
+    return str(tmp_path)
+
+
+def test_directories_are_not_searched_recursively_by_default(tree):
+    assert expand_files([tree]) == [(os.path.join(tree, 'a.ean'), 'a.ean')]
+
+
+def test_recursive_names_keep_their_subdirectory(tree):
+    assert expand_files([tree], recursive=True) == [
+        (os.path.join(tree, 'a.ean'), 'a.ean'),
+        (os.path.join(tree, 'sub', 'a.ean'), os.path.join('sub', 'a.ean')),
+    ]
+
+
+def test_output_paths_keep_relative_paths(tree):
+    files = expand_files([tree], recursive=True)
+    assert get_output_paths(files, 'out') == [os.path.join('out', 'a.ean'), os.path.join('out', 'sub', 'a.ean')]
+    assert get_output_paths(files, None) == [path for path, _ in files]
+
+
+def test_duplicate_output_paths_are_refused(tree):
+    files = expand_files([os.path.join(tree, '*.ean'), os.path.join(tree, 'sub', '*.ean')])
+    with pytest.raises(ValueError):
+        get_output_paths(files, 'out')
@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+
+pytest.importorskip('pyxenoverse')
+
+from yaean.decimate import simplify
+
+
+def rotations(angles):
+    # Rotations about the y axis, w/x/y/z
+    half = np.radians(angles) / 2
+    return np.stack([np.cos(half), np.zeros_like(half), np.sin(half), np.zeros_like(half)], axis=1)
+
+
+def test_short_tracks_are_kept():
+    for count in range(3):
+        assert simplify(np.arange(count), np.zeros((count, 4)), 0.1).all()
+
+
+def test_straight_line_keeps_only_the_ends():
+    frames = np.arange(10)
+    values = np.outer(frames, [1.0, 2.0, 0.0, -1.0])
+    np.testing.assert_array_equal(np.flatnonzero(simplify(frames, values, 1e-6)), [0, 9])
+
+
+def test_keyframes_off_the_line_are_kept():
+    frames = np.arange(10)
+    values = np.zeros((10, 4))
+    values[4, 1] = 1.0
+    np.testing.assert_array_equal(np.flatnonzero(simplify(frames, values, 0.1)), [0, 3, 4, 5, 9])
+    # Within tolerance the spike goes too
+    np.testing.assert_array_equal(np.flatnonzero(simplify(frames, values, 1.5)), [0, 9])
+
+
+def test_uneven_frame_spacing():
+    frames = np.array([0, 1, 10])
+    values = np.outer(frames, [1.0, 0.0, 0.0, 0.0])
+    np.testing.assert_array_equal(np.flatnonzero(simplify(frames, values, 1e-6)), [0, 2])
+
+
+def test_constant_rotation_speed_keeps_only_the_ends():
+    frames = np.arange(7)
+    values = rotations(frames * 20.0)
+    np.testing.assert_array_equal(np.flatnonzero(simplify(frames, values, 0.01, spherical=True)), [0, 6])
+    # Linear interpolation of the same track is off by more than the tolerance
+    assert simplify(frames, values, 0.01).sum() > 2
+
+
+def test_rotation_tolerance_is_in_degrees():
+    frames = np.arange(3)
+    values = rotations(np.array([0.0, 15.0, 20.0]))
+    assert simplify(frames, values, 4.0, spherical=True).all()
+    assert not simplify(frames, values, 6.0, spherical=True)[1]
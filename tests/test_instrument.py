@@ -0,0 +1,28 @@
+import numpy as np
+import pytest
+
+from yaean.instrument import Instrument
+
+
+def test_untouched_operations_count_nothing():
+    instrument = Instrument()
+    with instrument.operation("Load EAN") as record:
+        instrument.touch(bones=3)
+    assert (record.nodes, record.keyframes, record.bones) == (0, 0, 3)
+
+
+def test_keyframes_are_counted_from_unsynced_tracks():
+    pytest.importorskip('pyxenoverse')
+    from benchmarks.synthetic import make_ean
+    from yaean.tracks import get_track
+
+    ean = make_ean(2, 5, 10)
+    animation = ean.animations[0]
+    track = get_track(ean, animation.nodes[0].keyframed_animations[0])
+    track.set(np.array([0, 9]), np.zeros((2, 4)))
+
+    instrument = Instrument()
+    with instrument.operation("Edit") as record:
+        instrument.touch([animation], ean=ean)
+    assert record.nodes == 5
+    assert record.keyframes == 5 * 3 * 10 - 8
@@ -0,0 +1,85 @@
+import numpy as np
+import pytest
+
+pytest.importorskip('pyxenoverse')
+
+from benchmarks.synthetic import make_ean
+from yaean import operations
+from yaean.constants import POSITION_FLAG
+from yaean.journal import AnimationDelta, Journal, MirrorDelta, ReverseDelta, SkeletonDelta
+from yaean.mirror import get_mirror_table
+from yaean.tracks import get_track
+
+
+def snapshot(ean):
+    return [(node.bone_name, ka.flag, get_track(ean, ka).frames.copy(), get_track(ean, ka).values.copy())
+            for animation in ean.animations for node in animation.nodes for ka in node.keyframed_animations]
+
+
+def assert_same(a, b):
+    assert len(a) == len(b)
+    for (name_a, flag_a, frames_a, values_a), (name_b, flag_b, frames_b, values_b) in zip(a, b):
+        assert (name_a, flag_a) == (name_b, flag_b)
+        np.testing.assert_array_equal(frames_a, frames_b)
+        np.testing.assert_array_equal(values_a, values_b)
+
+
+def undo_redo(ean, delta, edit):
+    journal = Journal(1 << 30)
+    before = snapshot(ean)
+    journal.record("edit", delta)
+    edit()
+    after = snapshot(ean)
+    journal.undo()
+    assert_same(snapshot(ean), before)
+    journal.redo()
+    assert_same(snapshot(ean), after)
+    return journal
+
+
+def test_offset_only_keeps_the_edited_track():
+    ean = make_ean(2, 20, 10)
+    name = ean.skeleton.bones[0].name
+    delta = AnimationDelta(ean, ean.animations, {name}, {POSITION_FLAG})
+    journal = undo_redo(ean, delta, lambda: operations.set_offset(ean, [0, 1], 0, 0.0, 0.5, 0.0))
+    full = AnimationDelta(ean, ean.animations)
+    assert journal.undo_stack[0].nbytes * 20 < full.nbytes
+
+
+def test_reverse_is_undone_without_keyframes():
+    ean = make_ean(2, 20, 10)
+    delta = ReverseDelta(ean, ean.animations)
+    undo_redo(ean, delta, lambda: operations.reverse_animations(ean, [0, 1]))
+    assert delta.nbytes < AnimationDelta(ean, ean.animations).nbytes / 10
+
+
+@pytest.mark.parametrize('exclude_base', [False, True])
+def test_mirror_is_undone_without_keyframes(exclude_base):
+    ean = make_ean(2, 20, 10)
+    table = get_mirror_table(ean.skeleton)
+    assert table.reversible(exclude_base)
+    delta = MirrorDelta(ean, ean.animations, table, exclude_base)
+    undo_redo(ean, delta, lambda: operations.mirror_animations(ean, [0, 1], exclude_base))
+
+
+def test_refused_mirror_is_discarded_unapplied():
+    ean = make_ean(1, 20, 10)
+    ean.animations[0].nodes[-1].bone_name = 'b_L_Unpaired'
+    journal = Journal(1 << 30)
+    journal.record("Mirror animations", AnimationDelta(ean, ean.animations))
+    assert not operations.mirror_animations(ean, [0])
+    journal.discard()
+    assert not journal.can_undo()
+    assert not journal.can_redo()
+
+
+def test_undone_entry_names_the_skeletons_it_touched():
+    ean = make_ean(1, 5, 3)
+    other = make_ean(1, 5, 3)
+    journal = Journal(1 << 30)
+    journal.record("Reverse animations", ReverseDelta(ean, [0]))
+    journal.record("Rename bone", SkeletonDelta(ean.skeleton))
+    assert journal.undo().touches_skeleton(ean.skeleton)
+    assert not journal.redo().touches_skeleton(other.skeleton)
+    journal.undo()
+    assert not journal.undo().touches_skeleton(ean.skeleton)
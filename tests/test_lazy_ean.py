@@ -0,0 +1,86 @@
+import os
+
+import numpy as np
+import pytest
+
+pytest.importorskip('pyxenoverse')
+
+from pyxenoverse.ean import EAN
+
+from benchmarks.synthetic import make_ean
+from yaean.formats import LoadCancelled, load
+from yaean.lazy_ean import LazyAnimation
+from yaean.tracks import get_track
+
+
+@pytest.fixture
+def path(tmp_path):
+    path = str(tmp_path / 'synthetic.ean')
+    make_ean(3, 40, 20, seed=1).save(path)
+    return path
+
+
+def test_lazy_matches_full_load(path):
+    full = EAN()
+    assert full.load(path)
+    _, lazy = load(path, lazy=True)
+    assert all(isinstance(animation, LazyAnimation) for animation in lazy.animations)
+    assert [bone.name for bone in lazy.skeleton.bones] == [bone.name for bone in full.skeleton.bones]
+    assert [animation.name for animation in lazy.animations] == [animation.name for animation in full.animations]
+
+    for lazy_animation, full_animation in zip(lazy.animations, full.animations):
+        assert lazy_animation.frame_count == full_animation.frame_count
+        lazy_nodes = lazy_animation.nodes
+        assert [node.bone_name for node in lazy_nodes] == [node.bone_name for node in full_animation.nodes]
+        for lazy_node, full_node in zip(lazy_nodes, full_animation.nodes):
+            assert len(lazy_node.keyframed_animations) == len(full_node.keyframed_animations)
+            for lazy_ka, full_ka in zip(lazy_node.keyframed_animations, full_node.keyframed_animations):
+                track = get_track(full, full_ka)
+                assert lazy_ka.flag == full_ka.flag
+                np.testing.assert_array_equal(lazy_ka.frames, track.frames)
+                np.testing.assert_array_equal(lazy_ka.values, track.values)
+
+
+def test_decoded_load_matches_pyxenoverse(path):
+    reference = EAN()
+    assert reference.load(path)
+    calls = []
+    _, ean = load(path, progress=lambda done, total: calls.append((done, total)))
+    assert calls == [(1, 3), (2, 3), (3, 3)]
+    assert [animation.name for animation in ean.animations] == [animation.name for animation in reference.animations]
+    for animation, expected in zip(ean.animations, reference.animations):
+        assert animation.frame_count == expected.frame_count
+        assert [node.bone_name for node in animation.nodes] == [node.bone_name for node in expected.nodes]
+        for node, expected_node in zip(animation.nodes, expected.nodes):
+            for ka, expected_ka in zip(node.keyframed_animations, expected_node.keyframed_animations):
+                np.testing.assert_array_equal(get_track(ean, ka).frames, get_track(reference, expected_ka).frames)
+                np.testing.assert_array_equal(get_track(ean, ka).values, get_track(reference, expected_ka).values)
+
+
+def test_load_stops_between_animations(path):
+    calls = []
+
+    def progress(done, total):
+        calls.append(done)
+        raise LoadCancelled
+
+    with pytest.raises(LoadCancelled):
+        load(path, progress=progress)
+    assert calls == [1]
+
+
+def test_nodes_are_decoded_once(path):
+    _, lazy = load(path, lazy=True)
+    animation = lazy.animations[0]
+    assert animation.nodes is animation.nodes
+
+
+def test_lazy_file_can_be_replaced(path):
+    _, lazy = load(path, lazy=True)
+    assert lazy.animations[0].nodes
+    replacement = path + '.tmp'
+    make_ean(2, 10, 5, seed=2).save(replacement)
+    os.replace(replacement, path)
+    with pytest.raises(OSError):
+        lazy.animations[0].nodes
+    assert lazy.animations[0]._nodes is None
@@ -0,0 +1,28 @@
+import json
+import os
+
+from yaean.mirror import MirrorTable, compile_rules, get_settings
+from yaean.settings import DEFAULTS
+
+
+def test_default_rules_pair_names_with_and_without_a_trailing_underscore():
+    names = ('b_C_Base', 'b_L', 'b_R', 'b_L_Arm1', 'b_R_Arm1', 'b_Lx')
+    table = MirrorTable(names, compile_rules(DEFAULTS['mirror']['rules']), 0)
+    assert table.partners == {
+        'b_C_Base': 'b_C_Base', 'b_L': 'b_R', 'b_R': 'b_L', 'b_L_Arm1': 'b_R_Arm1', 'b_R_Arm1': 'b_L_Arm1',
+        'b_Lx': 'b_Lx'}
+    assert not table.missing
+
+
+def test_edited_settings_are_read_again(tmp_path):
+    path = str(tmp_path / 'settings.json')
+    with open(path, 'w') as f:
+        json.dump({'mirror': {'axis': 'y'}}, f)
+    assert get_settings(path=path)['axis'] == 'y'
+    assert get_settings({'axis': 'z'}, path=path)['axis'] == 'z'
+
+    with open(path, 'w') as f:
+        json.dump({'mirror': {'axis': 'z', 'rules': []}}, f)
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+    assert get_settings(path=path) == {'axis': 'z', 'rules': []}
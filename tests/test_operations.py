@@ -0,0 +1,35 @@
+import numpy as np
+import pytest
+
+pytest.importorskip('pyxenoverse')
+
+from yaean.operations import range_mask
+
+
+def mask(frames, ranges):
+    return np.flatnonzero(range_mask(np.asarray(frames), ranges)).tolist()
+
+
+def test_end_is_exclusive():
+    assert mask(range(10), [(2, 5)]) == [2, 3, 4]
+
+
+def test_several_and_overlapping_ranges():
+    assert mask(range(10), [(0, 2), (6, 8)]) == [0, 1, 6, 7]
+    assert mask(range(10), [(1, 5), (3, 7)]) == [1, 2, 3, 4, 5, 6]
+    assert mask(range(10), [(3, 7), (1, 5)]) == [1, 2, 3, 4, 5, 6]
+
+
+def test_sparse_frames():
+    assert mask([0, 5, 10, 20, 30], [(4, 11), (25, 40)]) == [1, 2, 4]
+    assert mask([0, 5, 10], [(6, 9)]) == []
+
+
+def test_empty_ranges_and_frames():
+    assert mask(range(5), [(3, 3)]) == []
+    assert mask(range(5), []) == []
+    assert mask([], [(0, 10)]) == []
+
+
+def test_ranges_outside_the_track():
+    assert mask(range(5), [(-5, 1), (4, 100)]) == [0, 4]
@@ -0,0 +1,30 @@
+import numpy as np
+import pytest
+
+pytest.importorskip('pyxenoverse')
+
+from yaean.resample import sample_frames
+
+
+def test_stretch_keeps_every_keyframe():
+    frames, times = sample_frames(np.arange(5), 0, 5, 9)
+    np.testing.assert_array_equal(frames, [0, 2, 4, 6, 8])
+    np.testing.assert_allclose(times, [0, 1, 2, 3, 4])
+
+
+def test_sparse_track_stays_sparse():
+    frames, times = sample_frames(np.array([0, 10, 59]), 0, 60, 120)
+    np.testing.assert_array_equal(frames, [0, 20, 119])
+    np.testing.assert_allclose(times, frames * 59 / 119)
+
+
+def test_trim_window_gets_keyframes_at_both_ends():
+    frames, times = sample_frames(np.array([0, 5, 30]), 10, 20, 10)
+    np.testing.assert_array_equal(frames, [0, 9])
+    np.testing.assert_allclose(times, [10, 19])
+
+
+def test_single_frame_duration():
+    frames, times = sample_frames(np.arange(10), 0, 10, 1)
+    np.testing.assert_array_equal(frames, [0])
+    np.testing.assert_allclose(times, [0])
@@ -0,0 +1,68 @@
+import os
+import stat
+
+import pytest
+
+from yaean.save import write_atomic
+
+
+def write_bytes(data):
+    def write(path):
+        with open(path, 'wb') as f:
+            f.write(data)
+    return write
+
+
+@pytest.mark.skipif(os.name != 'posix', reason="needs POSIX permissions")
+def test_write_atomic_keeps_permissions(tmp_path):
+    path = str(tmp_path / 'file.ean')
+    write_atomic(path, write_bytes(b'old'))
+    umask = os.umask(0)
+    os.umask(umask)
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o666 & ~umask
+
+    os.chmod(path, 0o640)
+    write_atomic(path, write_bytes(b'new'), backup=True)
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o640
+    with open(path, 'rb') as f:
+        assert f.read() == b'new'
+    with open(path + '.bak', 'rb') as f:
+        assert f.read() == b'old'
+
+
+def test_write_atomic_leaves_the_file_on_failure(tmp_path):
+    path = str(tmp_path / 'file.ean')
+    write_atomic(path, write_bytes(b'old'))
+
+    def fail(temp_path):
+        write_bytes(b'partial')(temp_path)
+        raise ValueError
+
+    with pytest.raises(ValueError):
+        write_atomic(path, fail)
+    with open(path, 'rb') as f:
+        assert f.read() == b'old'
+    assert os.listdir(str(tmp_path)) == ['file.ean']
+
+
+def test_incremental_save_matches_a_full_save(tmp_path):
+    pytest.importorskip('pyxenoverse')
+    from benchmarks.synthetic import make_ean
+    from yaean import operations
+    from yaean.save import save_ean
+    from yaean.tracks import sync_tracks
+
+    path = str(tmp_path / 'incremental.ean')
+    ean = make_ean(4, 12, 10)
+    _, saved, encoded = save_ean(ean, path)
+    assert saved == 4 and encoded == ean.animations
+
+    operations.set_offset(ean, [2], 0, 0.0, 0.5, 0.0)
+    sync_tracks(ean)
+    _, saved, encoded = save_ean(ean, path)
+    assert saved == 4 and encoded == [ean.animations[2]]
+
+    full_path = str(tmp_path / 'full.ean')
+    ean.save(full_path)
+    with open(path, 'rb') as incremental, open(full_path, 'rb') as full:
+        assert incremental.read() == full.read()
@@ -0,0 +1,23 @@
+import pytest
+
+pytest.importorskip('pyxenoverse')
+
+from benchmarks.synthetic import make_ean
+from yaean.save import mark_skeleton_dirty
+from yaean.skeleton_diff import get_skeleton_diff
+
+
+def missing_names(base, other):
+    return [bone.name for bone in get_skeleton_diff(base, other).missing_bones(other)]
+
+
+def test_diff_is_cached_until_a_bone_is_edited():
+    base = make_ean(1, 10, 2).skeleton
+    other = make_ean(1, 30, 2).skeleton
+    missing = missing_names(base, other)
+    assert missing and 'b_C_Spine000' not in missing
+    assert get_skeleton_diff(base, other) is get_skeleton_diff(base, other)
+
+    base.bones[1].name = missing[0]
+    mark_skeleton_dirty(base)
+    assert missing_names(base, other) == ['b_C_Spine000'] + missing[1:]
@@ -0,0 +1,41 @@
+import wx
+
+from yaean.helpers import CHECK, get_selected_items
+from yaean.instrument import widget_updated
+
+
+class AnimListCtrl(wx.ListCtrl):
+    """Virtual list that renders animation rows straight from the EAN on demand."""
+    def __init__(self, parent, copied_column=False):
+        super().__init__(parent, style=wx.LC_REPORT | wx.LC_VIRTUAL)
+        self.ean = None
+        self.copied = set()
+        self.InsertColumn(0, "#", width=30)
+        self.InsertColumn(1, "Animation", width=200)
+        self.InsertColumn(2, "Frames", width=50)
+        if copied_column:
+            self.InsertColumn(3, "Copied", width=60)
+
+    def set_ean(self, ean):
+        for i in list(get_selected_items(self)):
+            self.Select(i, 0)
+        self.ean = ean
+        self.copied = set()
+        self.refresh()
+
+    def refresh(self):
+        count = len(self.ean.animations) if self.ean else 0
+        if self.GetItemCount() != count:
+            self.SetItemCount(count)
+        self.Refresh()
+        widget_updated()
+
+    def OnGetItemText(self, item, column):
+        if column == 0:
+            return str(item)
+        animation = self.ean.animations[item]
+        if column == 1:
+            return animation.name
+        if column == 2:
+            return str(animation.frame_count)
+        return CHECK if item in self.copied else ''
@@ -0,0 +1,259 @@
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import fnmatch
+import glob
+import json
+import os
+import time
+import traceback
+
+from yaean import operations
+from yaean.bone_filters import load_filters
+from yaean.filter_sets import FilterMasks
+from yaean.constants import POSITION_FLAG, ORIENTATION_FLAG, SCALE_FLAG
+from yaean.formats import load
+from yaean.save import save_ean
+from yaean.settings import DEFAULTS, load_settings
+from yaean.tracks import sync_tracks
+
+KEYFRAME_TYPES = {
+    'position': POSITION_FLAG,
+    'orientation': ORIENTATION_FLAG,
+    'scale': SCALE_FLAG,
+}
+TRANSFORM_OPS = {
+    'offset': operations.set_offset,
+    'scale': operations.set_scale,
+    'rotation': operations.set_rotation,
+}
+OPS = list(TRANSFORM_OPS) + [
+    'target_camera_offset', 'set_duration', 'trim', 'mirror', 'reverse', 'remove_keyframes', 'reduce_keyframes']
+
+
+def load_job(path):
+    with open(path) as f:
+        job = json.load(f)
+    job.setdefault('animations', ['*'])
+    job.setdefault('bone_filters', [])
+    job.setdefault('output', None)
+    job.setdefault('backup', True)
+    job.setdefault('workers', None)
+    job.setdefault('recursive', False)
+    if not job.get('files'):
+        raise ValueError("Job has no files")
+    for op in job.get('operations', []):
+        if op.get('op') not in OPS:
+            raise ValueError("Unknown operation {!r}, expected one of {}".format(op.get('op'), ', '.join(OPS)))
+
+    # Read bone filters here so workers don't need config/bone_filters, and compile them
+    # against no bones so unknown names and bad patterns are caught before any file is touched
+    job['filters'] = load_filters()
+    if job['bone_filters']:
+        FilterMasks([], job['filters']).get({'union': job['bone_filters']})
+    return job
+
+
+def expand_files(patterns, recursive=False):
+    """(path, name) for each EAN the patterns match, name being its path under `output`.
+
+    Directories give their *.ean files, including those in subdirectories when recursive,
+    named by their path below the directory.  Files matched by a wildcard keep their file name.
+    """
+    files = []
+    seen = set()
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            wildcard = os.path.join(pattern, '**', '*.ean') if recursive else os.path.join(pattern, '*.ean')
+            found = [(path, os.path.relpath(path, pattern)) for path in sorted(glob.glob(wildcard, recursive=True))]
+        else:
+            found = [(path, os.path.basename(path)) for path in sorted(glob.glob(pattern))]
+        for path, name in found:
+            if path not in seen:
+                seen.add(path)
+                files.append((path, name))
+    return files
+
+
+def select_animations(ean, selectors):
+    selected = []
+    for i, animation in enumerate(ean.animations):
+        for selector in selectors:
+            if isinstance(selector, int):
+                if selector == i:
+                    break
+            elif fnmatch.fnmatchcase(animation.name, selector):
+                break
+        else:
+            continue
+        selected.append(i)
+    return selected
+
+
+def get_bone_index(ean, bone):
+    if isinstance(bone, int):
+        return bone
+    for i, skeleton_bone in enumerate(ean.skeleton.bones):
+        if skeleton_bone.name == bone:
+            return i
+    raise ValueError("Bone {!r} not found".format(bone))
+
+
+def get_bone_filters(ean, job):
+    if not job['bone_filters']:
+        return [bone.index for bone in ean.skeleton.bones]
+    masks = FilterMasks([bone.name for bone in ean.skeleton.bones], job['filters'])
+    return [ean.skeleton.bones[i].index for i in masks.indexes_of({'union': job['bone_filters']})]
+
+
+def get_frame_ranges(ean, selected, op):
+    """Frame ranges for remove_keyframes, by animation index.
+
+    `ranges` is either a list of [start, end] pairs for every animation, or maps animation
+    name wildcards to their own lists (the first matching wildcard wins).  `start`/`end`
+    give a single range.
+    """
+    ranges = op.get('ranges')
+    if ranges is None:
+        if 'start' not in op and 'end' not in op:
+            return None
+        return {i: [(op.get('start', 0), op.get('end', ean.animations[i].frame_count))] for i in selected}
+    if not isinstance(ranges, dict):
+        return {i: [tuple(r) for r in ranges] for i in selected}
+    result = {}
+    for i in selected:
+        for pattern, animation_ranges in ranges.items():
+            if fnmatch.fnmatchcase(ean.animations[i].name, pattern):
+                result[i] = [tuple(r) for r in animation_ranges]
+                break
+    return result
+
+
+def apply_operation(ean, selected, op, bone_filters):
+    name = op['op']
+    if name in TRANSFORM_OPS:
+        bone_index = get_bone_index(ean, op.get('bone', 'b_C_Base'))
+        skipped = TRANSFORM_OPS[name](ean, selected, bone_index, op.get('x', 0.0), op.get('y', 0.0), op.get('z', 0.0))
+        return "skipped {}".format(len(skipped)) if skipped else ''
+    elif name == 'target_camera_offset':
+        changed = operations.set_target_camera_offset(
+            ean, selected, op.get('x', 0.0), op.get('y', 0.0), op.get('z', 0.0))
+        return "edited {} target camera position(s)".format(changed)
+    elif name == 'set_duration':
+        operations.set_duration(ean, selected, op['frames'])
+    elif name == 'trim':
+        for i in selected:
+            operations.trim_animation(ean, i, op.get('start', 0), op.get('end', ean.animations[i].frame_count))
+    elif name == 'mirror':
+        settings = {key: op[key] for key in ('rules', 'axis') if key in op}
+        if not operations.mirror_animations(ean, selected, op.get('exclude_base', False), settings):
+            raise ValueError("Cannot mirror. Couldn't find matching L/R bones")
+    elif name == 'reverse':
+        operations.reverse_animations(ean, selected)
+    elif name == 'remove_keyframes':
+        flags = [KEYFRAME_TYPES[t] for t in op.get('types', list(KEYFRAME_TYPES))]
+        ranges = get_frame_ranges(ean, selected, op)
+        if ranges is not None:
+            # Animations no wildcard matched are left alone
+            selected = [i for i in selected if i in ranges]
+        removed_keyframed_animations, removed_keyframes = operations.remove_keyframes(
+            ean, selected, bone_filters, flags, ranges)
+        return "removed {} keyframed animation(s) and {} keyframe(s)".format(
+            removed_keyframed_animations, removed_keyframes)
+    elif name == 'reduce_keyframes':
+        defaults = dict(DEFAULTS['reduce_keyframes'])
+        defaults.update(load_settings().get('reduce_keyframes', {}))
+        tolerances = [op.get(key, defaults[key]) for key in ('position', 'orientation', 'scale')]
+        results = operations.reduce_keyframes(ean, selected, bone_filters, *tolerances)
+        return "removed {} keyframe(s), about {} byte(s)".format(
+            sum(count for _, count, _ in results), sum(size for _, _, size in results))
+    return ''
+
+
+def get_output_paths(files, output):
+    """Where each file gets written, refusing to write two files to the same place."""
+    if not output:
+        return [path for path, _ in files]
+    output_paths = {}
+    for path, name in files:
+        output_path = os.path.normcase(os.path.normpath(os.path.join(output, name)))
+        if output_path in output_paths:
+            raise ValueError("{} and {} would both be written to {}".format(
+                output_paths[output_path], path, os.path.join(output, name)))
+        output_paths[output_path] = path
+    return [os.path.join(output, name) for _, name in files]
+
+
+def run_file(path, output_path, job):
+    start = time.perf_counter()
+    result = {
+        'file': path,
+        'output': output_path,
+        'ok': False,
+        'error': None,
+        'animations': 0,
+        'operations': [],
+        'seconds': 0.0,
+    }
+    try:
+        filetype, ean = load(path)
+        if filetype != 'EAN':
+            raise ValueError("{} is not a valid EAN".format(path))
+        selected = select_animations(ean, job['animations'])
+        result['animations'] = len(selected)
+        bone_filters = get_bone_filters(ean, job)
+        for op in job.get('operations', []):
+            op_start = time.perf_counter()
+            msg = apply_operation(ean, selected, op, bone_filters)
+            result['operations'].append({'op': op['op'], 'seconds': time.perf_counter() - op_start, 'msg': msg})
+        sync_tracks(ean)
+        save_ean(ean, result['output'], backup=job['backup'])
+        result['ok'] = True
+    except Exception:
+        result['error'] = traceback.format_exc()
+    result['seconds'] = time.perf_counter() - start
+    return result
+
+
+def run_job(job, progress=None):
+    files = expand_files(job['files'], job['recursive'])
+    paths = [path for path, _ in files]
+    output_paths = get_output_paths(files, job['output'])
+    if job['output']:
+        for output_path in output_paths:
+            os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    start = time.perf_counter()
+    results = []
+    with ProcessPoolExecutor(max_workers=job['workers']) as executor:
+        futures = [executor.submit(run_file, path, output_path, job)
+                   for path, output_path in zip(paths, output_paths)]
+        for future in as_completed(futures):
+            result = future.result()
+            results.append(result)
+            if progress:
+                progress(result, len(results), len(paths))
+    order = {path: i for i, path in enumerate(paths)}
+    results.sort(key=lambda r: order[r['file']])
+    return {
+        'files': results,
+        'succeeded': sum(1 for r in results if r['ok']),
+        'failed': sum(1 for r in results if not r['ok']),
+        'wall_seconds': time.perf_counter() - start,
+        'cpu_seconds': sum(r['seconds'] for r in results),
+    }
+
+
+def format_report(report):
+    lines = []
+    for result in report['files']:
+        status = 'OK' if result['ok'] else 'FAILED'
+        lines.append("{:<7}{:>9.3f}s  {} ({} animation(s))".format(
+            status, result['seconds'], result['file'], result['animations']))
+        for op in result['operations']:
+            lines.append("{:>16.3f}s    {} {}".format(op['seconds'], op['op'], op['msg']).rstrip())
+        if result['error']:
+            lines.append(result['error'].rstrip())
+    wall = report['wall_seconds']
+    lines.append('')
+    lines.append("{} file(s) succeeded, {} failed".format(report['succeeded'], report['failed']))
+    lines.append("Wall time {:.3f}s, summed file time {:.3f}s ({:.1f}x)".format(
+        wall, report['cpu_seconds'], report['cpu_seconds'] / wall if wall else 0.0))
+    return '\n'.join(lines)
@@ -0,0 +1,38 @@
+import json
+import os
+import sys
+
+DIRNAME, _ = os.path.split(os.path.abspath(sys.argv[0]))
+CONFIG_DIR = os.path.join(DIRNAME, 'config', 'bone_filters')
+
+# config_dir: (stamp, filters)
+_cache = {}
+
+
+def load_filters(config_dir=CONFIG_DIR):
+    filters = {}
+    for path, dirs, files in os.walk(config_dir):
+        for file in files:
+            with open(os.path.join(path, file)) as f:
+                filters.update(json.load(f))
+    return filters
+
+
+def get_stamp(config_dir):
+    # Directory mtimes catch added and removed files, file mtimes catch edits
+    stamp = []
+    for path, dirs, files in os.walk(config_dir):
+        stamp.append((path, os.stat(path).st_mtime_ns))
+        for file in files:
+            stat = os.stat(os.path.join(path, file))
+            stamp.append((file, stat.st_mtime_ns, stat.st_size))
+    return stamp
+
+
+def get_filters(config_dir=CONFIG_DIR):
+    """The filters in config_dir, only read again when a file in it has changed."""
+    stamp = get_stamp(config_dir)
+    cached = _cache.get(config_dir)
+    if cached is None or cached[0] != stamp:
+        cached = _cache[config_dir] = stamp, load_filters(config_dir)
+    return cached[1]
@@ -0,0 +1,331 @@
+import wx
+import wx.dataview
+
+from yaean.instrument import widget_updated
+
+NO_BONE = 65535
+NO_PARENT = -1
+
+
+class BoneTree:
+    """Skeleton hierarchy shown in a TreeListCtrl.
+
+    Tree items are only created when their parent is expanded, and check states live in
+    `states`, so code that needs every bone has to read the model instead of walking the widget.
+    Structural edits (insert, replace, detach) only touch the model until recalculate() and
+    refresh() are called.  `names` maps bone names to indexes and is kept current by every
+    edit, so lookups never have to scan the bones.  Compiled bone filters and the preorder
+    spans used to apply them are cached until the bones change.
+    """
+    def __init__(self, ctrl):
+        self.ctrl = ctrl
+        self.bones = []
+        self.parents = []
+        self.children = []
+        self.roots = []
+        self.states = []
+        self.names = {}
+        self.items = {}
+        self.marked = set()
+        self.mark_text = ''
+        self.masks = None
+        self.spans = None
+        self.ctrl.Bind(wx.dataview.EVT_TREELIST_ITEM_EXPANDING, self.on_expanding)
+
+    def build(self, esk, keep_view=False):
+        old_states = {}
+        if keep_view:
+            old_states = {bone.name: state for bone, state in zip(self.bones, self.states)}
+        self.bones = list(esk.bones)
+        self.parents = []
+        self.children = [[] for _ in self.bones]
+        self.roots = []
+        self.states = [old_states.get(bone.name, wx.CHK_CHECKED) for bone in self.bones]
+        self.names = {bone.name: i for i, bone in enumerate(self.bones)}
+        self.marked = set()
+        self.changed()
+        for i, bone in enumerate(self.bones):
+            if i == 0 or bone.parent_index >= len(self.bones):
+                self.parents.append(NO_PARENT)
+                self.roots.append(i)
+            else:
+                self.parents.append(bone.parent_index)
+                self.children[bone.parent_index].append(i)
+        self.refresh(keep_view=keep_view)
+
+    def label(self, index):
+        return "{}: {}".format(index, self.bones[index].name)
+
+    def append_item(self, parent_item, index):
+        item = self.ctrl.AppendItem(parent_item, self.label(index), data=self.bones[index])
+        self.items[index] = item
+        widget_updated()
+        self.ctrl.CheckItem(item, self.states[index])
+        if self.ctrl.GetColumnCount() > 1 and index in self.marked:
+            self.ctrl.SetItemText(item, 1, self.mark_text)
+        if self.children[index]:
+            # Placeholder so the expander shows, replaced by the real children in populate()
+            self.ctrl.AppendItem(item, '')
+        return item
+
+    def populate(self, index):
+        item = self.items[index]
+        child = self.ctrl.GetFirstChild(item)
+        if not child.IsOk() or self.ctrl.GetItemData(child) is not None:
+            return
+        self.ctrl.DeleteItem(child)
+        for child_index in self.children[index]:
+            self.append_item(item, child_index)
+
+    def materialize(self, index):
+        chain = []
+        while index not in self.items:
+            chain.append(index)
+            index = self.parents[index]
+        for child_index in reversed(chain):
+            self.populate(self.parents[child_index])
+        return self.items[chain[0]] if chain else self.items[index]
+
+    def expand(self, index):
+        item = self.materialize(index)
+        self.populate(index)
+        self.ctrl.Expand(item)
+
+    def select(self, indexes):
+        for index in indexes:
+            item = self.materialize(index)
+            parent = self.parents[index]
+            while parent != NO_PARENT:
+                self.ctrl.Expand(self.items[parent])
+                parent = self.parents[parent]
+            self.ctrl.Select(item)
+
+    def on_expanding(self, e):
+        bone = self.ctrl.GetItemData(e.GetItem())
+        if bone is not None:
+            self.populate(bone.index)
+        e.Skip()
+
+    def refresh(self, keep_view=True):
+        expanded, selected = set(), set()
+        if keep_view:
+            expanded = {id(self.ctrl.GetItemData(item)) for item in self.items.values() if self.ctrl.IsExpanded(item)}
+            selected = {id(self.ctrl.GetItemData(item)) for item in self.ctrl.GetSelections()}
+
+        self.ctrl.DeleteAllItems()
+        self.items = {}
+        widget_updated()
+        root = self.ctrl.GetRootItem()
+        for index in self.roots:
+            self.append_item(root, index)
+
+        if not keep_view:
+            expanded = {id(self.bones[index]) for index in self.roots}
+        # Bones are in preorder, so a parent is always re-expanded before its children
+        reopened = set()
+        for index, bone in enumerate(self.bones):
+            parent = self.parents[index]
+            if id(bone) in expanded and (parent == NO_PARENT or parent in reopened):
+                self.expand(index)
+                reopened.add(index)
+        self.select(index for index, bone in enumerate(self.bones) if id(bone) in selected)
+
+    # Model
+    def index_of(self, item):
+        bone = self.ctrl.GetItemData(item)
+        return None if bone is None else bone.index
+
+    def selected(self):
+        return [i for i in map(self.index_of, self.ctrl.GetSelections()) if i is not None]
+
+    def find(self, name):
+        return self.names.get(name)
+
+    def item(self, index):
+        return self.materialize(index)
+
+    def descendants(self, index):
+        result = []
+        stack = list(reversed(self.children[index]))
+        while stack:
+            child = stack.pop()
+            result.append(child)
+            stack.extend(reversed(self.children[child]))
+        return result
+
+    def insert(self, bone, parent):
+        index = len(self.bones)
+        self.bones.append(bone)
+        self.parents.append(parent)
+        self.children.append([])
+        self.states.append(wx.CHK_CHECKED)
+        self.names[bone.name] = index
+        self.changed()
+        if parent == NO_PARENT:
+            self.roots.append(index)
+        else:
+            self.children[parent].append(index)
+        return index
+
+    def replace(self, index, bone):
+        if self.names.get(self.bones[index].name) == index:
+            del self.names[self.bones[index].name]
+        self.bones[index] = bone
+        self.names[bone.name] = index
+        self.changed(structure=False)
+        if index in self.items:
+            self.ctrl.SetItemData(self.items[index], bone)
+
+    def detach(self, index):
+        parent = self.parents[index]
+        siblings = self.roots if parent == NO_PARENT else self.children[parent]
+        if index in siblings:
+            siblings.remove(index)
+        for i in [index] + self.descendants(index):
+            if self.names.get(self.bones[i].name) == i:
+                del self.names[self.bones[i].name]
+        self.changed()
+
+    def rename(self, index, old_name, new_name):
+        if self.names.get(old_name) == index:
+            del self.names[old_name]
+        self.names[new_name] = index
+        self.changed(structure=False)
+        if index in self.items:
+            self.ctrl.SetItemText(self.items[index], self.label(index))
+            widget_updated()
+
+    def changed(self, structure=True):
+        self.masks = None
+        if structure:
+            self.spans = None
+
+    def recalculate(self):
+        order = []
+        stack = list(reversed(self.roots))
+        while stack:
+            index = stack.pop()
+            order.append(index)
+            stack.extend(reversed(self.children[index]))
+
+        remap = {old: new for new, old in enumerate(order)}
+        self.bones = [self.bones[i] for i in order]
+        self.parents = [remap.get(self.parents[i], NO_PARENT) for i in order]
+        self.children = [[remap[c] for c in self.children[i]] for i in order]
+        self.roots = [remap[i] for i in self.roots]
+        self.states = [self.states[i] for i in order]
+        self.names = {bone.name: i for i, bone in enumerate(self.bones)}
+        self.marked = {remap[i] for i in self.marked if i in remap}
+        self.items = {remap[i]: item for i, item in self.items.items() if i in remap}
+        self.changed()
+
+        for siblings in [self.roots] + self.children:
+            for i, index in enumerate(siblings):
+                bone = self.bones[index]
+                bone.sibling_index = siblings[i + 1] if i + 1 < len(siblings) else NO_BONE
+        for index, bone in enumerate(self.bones):
+            bone.index = index
+            bone.parent_index = self.parents[index] if self.parents[index] != NO_PARENT else NO_BONE
+            bone.child_index = self.children[index][0] if self.children[index] else NO_BONE
+        return remap
+
+    # Check states
+    def set_state(self, index, state):
+        self.states[index] = state
+        if index in self.items:
+            self.ctrl.CheckItem(self.items[index], state)
+            widget_updated()
+
+    def apply_states(self):
+        for index, item in self.items.items():
+            self.ctrl.CheckItem(item, self.states[index])
+        widget_updated(len(self.items))
+
+    def all_children_in_state(self, index, state):
+        return all(self.states[child] == state for child in self.children[index])
+
+    def update_parents(self, index):
+        parent = self.parents[index]
+        while parent != NO_PARENT:
+            if self.states[parent] == wx.CHK_UNCHECKED:
+                return
+            if self.all_children_in_state(parent, wx.CHK_CHECKED):
+                self.set_state(parent, wx.CHK_CHECKED)
+            else:
+                self.set_state(parent, wx.CHK_UNDETERMINED)
+            parent = self.parents[parent]
+
+    def update_all_parents(self):
+        # Children always come after their parents, so one reverse pass settles every parent
+        for index in reversed(range(len(self.bones))):
+            if self.children[index] and self.states[index] != wx.CHK_UNCHECKED:
+                if self.all_children_in_state(index, wx.CHK_CHECKED):
+                    self.states[index] = wx.CHK_CHECKED
+                else:
+                    self.states[index] = wx.CHK_UNDETERMINED
+
+    def filter_masks(self, filters):
+        """Bone filters compiled against the current bone names."""
+        from yaean.filter_sets import FilterMasks
+        if self.masks is None or self.masks.filters is not filters:
+            self.masks = FilterMasks([bone.name for bone in self.bones], filters)
+        return self.masks
+
+    def subtree_spans(self):
+        """Bone indexes in preorder and the size of the subtree starting at each of them."""
+        if self.spans is None:
+            import numpy as np
+            order = []
+            stack = list(reversed(self.roots))
+            while stack:
+                index = stack.pop()
+                order.append(index)
+                stack.extend(reversed(self.children[index]))
+            sizes = [1] * len(self.bones)
+            for index in reversed(order):
+                if self.parents[index] != NO_PARENT:
+                    sizes[self.parents[index]] += sizes[index]
+            self.spans = np.array(order, dtype=np.intp), np.array([sizes[i] for i in order], dtype=np.intp)
+        return self.spans
+
+    def apply_mask(self, mask, combine):
+        """Checks (union), unchecks (difference) or keeps only (intersection) the masked bones.
+
+        Parents are settled with one pass over the preorder: a parent is checked when nothing
+        in its subtree is unchecked and every leaf under it is checked, which is what
+        update_all_parents() works out bone by bone.
+        """
+        import numpy as np
+        states = np.array(self.states)
+        if combine == 'union':
+            states[mask] = wx.CHK_CHECKED
+        elif combine == 'difference':
+            states[mask] = wx.CHK_UNCHECKED
+        elif combine == 'intersection':
+            states[~mask] = wx.CHK_UNCHECKED
+        else:
+            raise ValueError("Unknown combination {!r}".format(combine))
+
+        order, sizes = self.subtree_spans()
+        ordered = states[order]
+        parent = sizes > 1
+        bad = (ordered == wx.CHK_UNCHECKED) | (~parent & (ordered != wx.CHK_CHECKED))
+        counts = np.concatenate(([0], np.cumsum(bad)))
+        starts = np.arange(len(order))
+        partial = counts[starts + sizes] > counts[starts]
+        settle = parent & (ordered != wx.CHK_UNCHECKED)
+        ordered[settle] = np.where(partial[settle], wx.CHK_UNDETERMINED, wx.CHK_CHECKED)
+        states[order] = ordered
+        self.states = states.tolist()
+        self.apply_states()
+
+    def checked(self):
+        return [index for index, state in enumerate(self.states) if state != wx.CHK_UNCHECKED]
+
+    # Marker column
+    def set_marked(self, indexes, text=''):
+        self.marked = set(indexes)
+        self.mark_text = text
+        for index, item in self.items.items():
+            self.ctrl.SetItemText(item, 1, text if index in self.marked else '')
+        widget_updated(len(self.items))
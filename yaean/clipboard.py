@@ -0,0 +1,193 @@
+import copy
+import sys
+
+import numpy as np
+
+from pyxenoverse.ean.keyframed_animation import KeyframedAnimation
+from pyxenoverse.ean.keyframe import Keyframe
+
+from yaean.resample import resample_track
+
+
+def read_only(array):
+    array.flags.writeable = False
+    return array
+
+
+def format_size(size):
+    if size < 1024:
+        return "{} B".format(size)
+    for unit in ('KB', 'MB'):
+        size /= 1024
+        if size < 1024:
+            break
+    return "{:.1f} {}".format(size, unit)
+
+
+class TrackSnapshot:
+    __slots__ = ('flag', 'frames', 'values')
+
+    def __init__(self, keyframed_animation):
+        self.flag = keyframed_animation.flag
+        if hasattr(keyframed_animation, 'frames'):
+            # Lazily loaded animations are already decoded into arrays
+            self.frames = read_only(np.array(keyframed_animation.frames, dtype=np.int32))
+            self.values = read_only(np.array(keyframed_animation.values, dtype=np.float32))
+            return
+        keyframes = keyframed_animation.keyframes
+        self.frames = read_only(np.array([keyframe.frame for keyframe in keyframes], dtype=np.int32))
+        self.values = read_only(np.array(
+            [(keyframe.w, keyframe.x, keyframe.y, keyframe.z) for keyframe in keyframes],
+            dtype=np.float32).reshape(-1, 4))
+
+    @property
+    def nbytes(self):
+        return self.frames.nbytes + self.values.nbytes
+
+    def resampled(self, frame_count, source_frame_count):
+        track = copy.copy(self)
+        frames, values = resample_track(self.frames, self.values, self.flag, 0, source_frame_count, frame_count)
+        track.frames = read_only(frames)
+        track.values = read_only(values.astype(np.float32))
+        return track
+
+    def copy(self):
+        keyframed_animation = KeyframedAnimation()
+        keyframed_animation.flag = self.flag
+        keyframed_animation.keyframes = [
+            Keyframe(frame, w, x, y, z) for frame, (w, x, y, z) in zip(self.frames.tolist(), self.values.tolist())]
+        return keyframed_animation
+
+
+class NodeSnapshot:
+    __slots__ = ('bone_name', 'bone_index', 'tracks')
+
+    def __init__(self, node):
+        self.bone_name = node.bone_name
+        self.bone_index = node.bone_index
+        self.tracks = tuple(TrackSnapshot(keyframed_animation) for keyframed_animation in node.keyframed_animations)
+
+    @property
+    def keyframed_animations(self):
+        return [track.copy() for track in self.tracks]
+
+    def resampled(self, frame_count, source_frame_count):
+        node = copy.copy(self)
+        node.tracks = tuple(
+            track.resampled(frame_count, source_frame_count) if len(track.frames) else track for track in self.tracks)
+        return node
+
+    def moved(self, bone_index):
+        node = copy.copy(self)
+        node.bone_index = bone_index
+        return node
+
+
+class AnimationSnapshot:
+    """Frozen copy of an animation.
+
+    Keyframes are kept in read-only arrays.  Keyframed animations are rebuilt from those
+    arrays every time a node hands them out, so Animation.paste() always gets keyframes
+    nothing else holds and the snapshot can be pasted any number of times.
+    """
+    def __init__(self, animation):
+        self.name = animation.name
+        self.frame_count = animation.frame_count
+        self.frame_index_size = animation.frame_index_size
+        self.frame_float_size = animation.frame_float_size
+        self.node_snapshots = tuple(NodeSnapshot(node) for node in animation.nodes)
+        self.resampled_cache = {}
+        self.remapped_cache = {}
+
+    def resampled(self, frame_count):
+        """This animation stretched to frame_count frames, for pasting into a longer or shorter one."""
+        if frame_count == self.frame_count:
+            return self
+        if frame_count not in self.resampled_cache:
+            animation = copy.copy(self)
+            animation.frame_count = frame_count
+            animation.node_snapshots = tuple(
+                node.resampled(frame_count, self.frame_count) for node in self.node_snapshots)
+            animation.resampled_cache = {}
+            animation.remapped_cache = {}
+            self.resampled_cache[frame_count] = animation
+        return self.resampled_cache[frame_count]
+
+    def remapped(self, table):
+        """(animation, skipped bone names) for pasting with a RemapTable.
+
+        The animation only has the nodes the table pastes, already pointing at their
+        destination bones, so resampling it skips every node that would be dropped anyway.
+        """
+        if table not in self.remapped_cache:
+            pasted, skipped = table.split(self.node_snapshots)
+            animation = copy.copy(self)
+            animation.node_snapshots = tuple(node.moved(bone_index) for node, bone_index in pasted)
+            animation.resampled_cache = {}
+            animation.remapped_cache = {}
+            self.remapped_cache[table] = animation, frozenset(skipped)
+        return self.remapped_cache[table]
+
+    @property
+    def nodes(self):
+        return list(self.node_snapshots)
+
+    @property
+    def nbytes(self):
+        return sys.getsizeof(self.name) + sum(
+            sys.getsizeof(node.bone_name) + sum(track.nbytes for track in node.tracks)
+            for node in self.node_snapshots)
+
+
+class AnimationClipboard:
+    """Snapshots of copied animations and the bone names of the skeleton they came from.
+
+    Without a skeleton the bone names are those of the copied nodes, in order.
+    """
+    def __init__(self, animations, skeleton=None):
+        self.animations = tuple(AnimationSnapshot(animation) for animation in animations)
+        self.nbytes = sum(animation.nbytes for animation in self.animations)
+        if skeleton is not None:
+            self.bone_names = tuple(bone.name for bone in skeleton.bones)
+        else:
+            names = {}
+            for animation in self.animations:
+                names.update(dict.fromkeys(node.bone_name for node in animation.node_snapshots))
+            self.bone_names = tuple(names)
+
+    def __len__(self):
+        return len(self.animations)
+
+    def __iter__(self):
+        return iter(self.animations)
+
+    def __getitem__(self, index):
+        return self.animations[index]
+
+
+def deep_sizeof(obj, seen=None):
+    seen = set() if seen is None else seen
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(deep_sizeof(k, seen) + deep_sizeof(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set)):
+        size += sum(deep_sizeof(item, seen) for item in obj)
+    elif hasattr(obj, '__dict__'):
+        size += deep_sizeof(obj.__dict__, seen)
+    return size
+
+
+class BoneClipboard:
+    """Frozen copy of a bone selection.  Each paste gets its own deep copy."""
+    def __init__(self, bones):
+        self.bones = tuple(copy.deepcopy(list(bones)))
+        self.nbytes = deep_sizeof(self.bones)
+
+    def __len__(self):
+        return len(self.bones)
+
+    def copy(self):
+        return copy.deepcopy(list(self.bones))
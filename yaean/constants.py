@@ -0,0 +1,4 @@
+POSITION_FLAG = 1792
+ORIENTATION_FLAG = 1793
+SCALE_FLAG = 1794
+TARGET_CAMERA_POSITION_FLAG = 1793
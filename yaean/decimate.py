@@ -0,0 +1,72 @@
+import numpy as np
+
+from yaean import quaternion
+from yaean.constants import POSITION_FLAG, ORIENTATION_FLAG, SCALE_FLAG
+from yaean.resample import is_rotation
+
+INDEX_SIZES = {0: 1, 1: 2}
+FLOAT_SIZES = {1: 2, 2: 4}
+
+
+def keyframe_size(animation):
+    # One frame index plus w, x, y, z in the animation's encoding
+    return INDEX_SIZES.get(animation.frame_index_size, 2) + 4 * FLOAT_SIZES.get(animation.frame_float_size, 4)
+
+
+def get_tolerance(flag, values, position, orientation, scale):
+    """Tolerance for a track and whether it's compared as rotations (orientation is in degrees)."""
+    if flag == ORIENTATION_FLAG:
+        if is_rotation(flag, values):
+            return orientation, True
+        # Target camera position
+        return position, False
+    if flag == POSITION_FLAG:
+        return position, False
+    if flag == SCALE_FLAG:
+        return scale, False
+    return None, False
+
+
+def errors(values, predicted, spherical):
+    if spherical:
+        dot = np.clip(np.abs(np.sum(values * predicted, axis=1)), 0.0, 1.0)
+        return np.degrees(2.0 * np.arccos(dot))
+    return np.abs(values - predicted).max(axis=1)
+
+
+def simplify(frames, values, tolerance, spherical=False):
+    """Mask of the keyframes to keep.
+
+    Douglas-Peucker on the track: a span is split at its worst keyframe until every
+    dropped keyframe is within tolerance of the interpolation between the kept ones.  Each
+    span is checked with one vectorized interpolation.  The first and last keyframes are
+    always kept.
+    """
+    count = len(frames)
+    keep = np.ones(count, dtype=bool)
+    if count < 3:
+        return keep
+    keep[1:-1] = False
+    values = values.astype(np.float64)
+    if spherical:
+        values = quaternion.normalize(values)
+    times = frames.astype(np.float64)
+
+    spans = [(0, count - 1)]
+    while spans:
+        first, last = spans.pop()
+        if last - first < 2:
+            continue
+        t = (times[first + 1:last] - times[first]) / max(times[last] - times[first], 1e-12)
+        if spherical:
+            predicted = quaternion.slerp(values[first], values[last], t)
+        else:
+            predicted = values[first] + (values[last] - values[first]) * t[:, np.newaxis]
+        error = errors(values[first + 1:last], predicted, spherical)
+        worst = int(np.argmax(error))
+        if error[worst] > tolerance:
+            split = first + 1 + worst
+            keep[split] = True
+            spans.append((first, split))
+            spans.append((split, last))
+    return keep
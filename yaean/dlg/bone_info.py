@@ -1,8 +1,7 @@
 import wx
 from wx.lib.agw.floatspin import FloatSpin, FS_LEFT, FS_READONLY
 from pubsub import pub
-from pyquaternion import Quaternion
-from yaean.helpers import euler_to_quaternion, quaternion_to_euler
+from yaean.quaternion import euler_to_quaternion, quaternion_to_euler
 
 
 class BoneInfoDialog(wx.Dialog):
@@ -54,7 +53,7 @@ class BoneInfoDialog(wx.Dialog):
         self.offset_y = FloatSpin(self, -1, value=position[1], digits=8, increment=0.001, size=(150, -1), agwStyle=style)
         self.offset_z = FloatSpin(self, -1, value=position[2], digits=8, increment=0.001, size=(150, -1), agwStyle=style)
 
-        rot_x, rot_y, rot_z = quaternion_to_euler(Quaternion(orientation[3], orientation[0], orientation[1], orientation[2]))
+        rot_x, rot_y, rot_z = quaternion_to_euler(orientation[3], orientation[0], orientation[1], orientation[2])
         self.rotation_x = FloatSpin(self, -1, value=rot_x, digits=8, increment=1.0, size=(150, -1), agwStyle=style)
         self.rotation_y = FloatSpin(self, -1, value=rot_y, digits=8, increment=1.0, size=(150, -1), agwStyle=style)
         self.rotation_z = FloatSpin(self, -1, value=rot_z, digits=8, increment=1.0, size=(150, -1), agwStyle=style)
@@ -121,14 +120,15 @@ class BoneInfoDialog(wx.Dialog):
 
     def on_close(self, e):
         if not self.read_only and e.GetId() == wx.ID_OK:
-            q = euler_to_quaternion(self.rotation_x.GetValue(), self.rotation_y.GetValue(), self.rotation_z.GetValue())
+            qw, qx, qy, qz = euler_to_quaternion(
+                self.rotation_x.GetValue(), self.rotation_y.GetValue(), self.rotation_z.GetValue())
             self.bone.skinning_matrix[0][0] = self.offset_x.GetValue()
             self.bone.skinning_matrix[0][1] = self.offset_y.GetValue()
             self.bone.skinning_matrix[0][2] = self.offset_z.GetValue()
-            self.bone.skinning_matrix[1][0] = q.x
-            self.bone.skinning_matrix[1][1] = q.y
-            self.bone.skinning_matrix[1][2] = q.z
-            self.bone.skinning_matrix[1][3] = q.w
+            self.bone.skinning_matrix[1][0] = qx
+            self.bone.skinning_matrix[1][1] = qy
+            self.bone.skinning_matrix[1][2] = qz
+            self.bone.skinning_matrix[1][3] = qw
             self.bone.skinning_matrix[2][0] = self.scale_x.GetValue()
             self.bone.skinning_matrix[2][1] = self.scale_y.GetValue()
             self.bone.skinning_matrix[2][2] = self.scale_z.GetValue()
@@ -150,8 +150,7 @@ class BoneInfoDialog(wx.Dialog):
         self.offset_y.SetValue(position[1])
         self.offset_z.SetValue(position[2])
 
-        rot_x, rot_y, rot_z = quaternion_to_euler(
-            Quaternion(orientation[3], orientation[0], orientation[1], orientation[2]))
+        rot_x, rot_y, rot_z = quaternion_to_euler(orientation[3], orientation[0], orientation[1], orientation[2])
         self.rotation_x.SetValue(rot_x)
         self.rotation_y.SetValue(rot_y)
         self.rotation_z.SetValue(rot_z)
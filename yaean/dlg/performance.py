@@ -0,0 +1,104 @@
+import json
+
+import wx
+
+from yaean.helpers import CHECK
+
+OPERATIONS = [
+    "Load EAN", "Load ESK", "Save EAN", "Save ESK", "Undo", "Redo",
+    "Add animations", "Delete animations", "Paste animations", "Set duration", "Set offset", "Set rotation",
+    "Set scale", "Set target camera offset", "Trim animation", "Mirror animations", "Reverse animations",
+    "Remove keyframes", "Reduce keyframes", "Paste bones", "Delete bones", "Edit bone", "Apply bone filter",
+]
+COLUMNS = [("Operation", 180), ("Time (ms)", 80), ("Nodes", 60), ("Keyframes", 80), ("Bones", 60),
+           ("Widget updates", 100), ("Profile", 50)]
+
+
+class PerformanceFrame(wx.Frame):
+    """Timings of recent operations, newest first, with optional cProfile output."""
+    def __init__(self, parent, instrument, *args, **kw):
+        super().__init__(parent, *args, title="Performance", size=(720, 560), **kw)
+        self.instrument = instrument
+        panel = wx.Panel(self)
+
+        self.record_list = wx.ListCtrl(panel, style=wx.LC_REPORT | wx.LC_SINGLE_SEL)
+        for i, (name, width) in enumerate(COLUMNS):
+            self.record_list.InsertColumn(i, name, width=width)
+        self.record_list.Bind(wx.EVT_LIST_ITEM_SELECTED, self.on_select)
+
+        self.details = wx.TextCtrl(panel, style=wx.TE_MULTILINE | wx.TE_READONLY | wx.HSCROLL)
+        self.details.SetFont(wx.Font(9, wx.FONTFAMILY_TELETYPE, wx.NORMAL, wx.NORMAL))
+
+        self.profile_choice = wx.ComboBox(panel, choices=self.get_operations(), size=(200, -1))
+        self.profile_button = wx.Button(panel, -1, "Profile Next")
+        self.profile_button.Bind(wx.EVT_BUTTON, self.on_profile)
+        self.profile_status = wx.StaticText(panel, -1, '')
+        export_button = wx.Button(panel, wx.ID_SAVE, "Export...")
+        export_button.Bind(wx.EVT_BUTTON, self.on_export)
+        clear_button = wx.Button(panel, wx.ID_CLEAR, "Clear")
+        clear_button.Bind(wx.EVT_BUTTON, self.on_clear)
+
+        button_sizer = wx.BoxSizer(wx.HORIZONTAL)
+        button_sizer.Add(self.profile_choice, 0, wx.RIGHT, 5)
+        button_sizer.Add(self.profile_button, 0, wx.RIGHT, 5)
+        button_sizer.Add(self.profile_status, 1, wx.ALIGN_CENTER_VERTICAL)
+        button_sizer.Add(export_button, 0, wx.LEFT, 5)
+        button_sizer.Add(clear_button, 0, wx.LEFT, 5)
+
+        sizer = wx.BoxSizer(wx.VERTICAL)
+        sizer.Add(self.record_list, 2, wx.EXPAND | wx.ALL, 5)
+        sizer.Add(self.details, 1, wx.EXPAND | wx.LEFT | wx.RIGHT, 5)
+        sizer.Add(button_sizer, 0, wx.EXPAND | wx.ALL, 5)
+        panel.SetSizer(sizer)
+
+        self.records = []
+        for record in instrument.records:
+            self.add_record(record)
+        instrument.listeners.append(self.add_record)
+        self.Bind(wx.EVT_CLOSE, self.on_close)
+
+    def get_operations(self):
+        return OPERATIONS + sorted(self.instrument.labels - set(OPERATIONS))
+
+    def add_record(self, record):
+        self.records.insert(0, record)
+        self.record_list.InsertItem(0, record.label)
+        values = ["{:.2f}".format(record.seconds * 1000), record.nodes, record.keyframes, record.bones,
+                  record.widget_updates, CHECK if record.profile else '']
+        for column, value in enumerate(values, 1):
+            self.record_list.SetItem(0, column, str(value))
+        if len(self.records) > self.instrument.records.maxlen:
+            self.records.pop()
+            self.record_list.DeleteItem(len(self.records))
+        if record.profile:
+            self.profile_status.SetLabel("Profiled {}, select it to see the profile".format(record.label))
+
+    def on_select(self, e):
+        record = self.records[e.GetIndex()]
+        text = json.dumps({key: value for key, value in record.to_dict().items() if key != 'profile'}, indent=2)
+        if record.profile:
+            text += '\n\n' + record.profile
+        self.details.SetValue(text)
+
+    def on_profile(self, _):
+        label = self.profile_choice.GetValue()
+        if not label:
+            return
+        self.instrument.profile_label = label
+        self.profile_status.SetLabel("Profiling next {}".format(label))
+
+    def on_export(self, _):
+        with wx.FileDialog(self, "Export performance log", wildcard="*.json",
+                           style=wx.FD_SAVE | wx.FD_OVERWRITE_PROMPT) as dlg:
+            if dlg.ShowModal() == wx.ID_OK:
+                self.instrument.export(dlg.GetPath())
+
+    def on_clear(self, _):
+        self.instrument.clear()
+        self.records = []
+        self.record_list.DeleteAllItems()
+        self.details.SetValue('')
+
+    def on_close(self, e):
+        self.instrument.listeners.remove(self.add_record)
+        e.Skip()
@@ -0,0 +1,42 @@
+import wx
+from wx.lib.agw.floatspin import FloatSpin
+
+from yaean.settings import DEFAULTS
+
+FIELDS = [('position', 'Position'), ('orientation', 'Orientation (degrees)'), ('scale', 'Scale')]
+
+
+class ReduceKeyframesDialog(wx.Dialog):
+    def __init__(self, parent, tolerances, *args, **kw):
+        super().__init__(parent, *args, **kw)
+
+        self.SetTitle("Reduce Keyframes in Animation")
+        defaults = dict(DEFAULTS['reduce_keyframes'])
+        defaults.update(tolerances or {})
+
+        grid_sizer = wx.FlexGridSizer(rows=len(FIELDS), cols=2, hgap=10, vgap=10)
+        self.ctrls = []
+        for key, label in FIELDS:
+            ctrl = FloatSpin(self, -1, min_val=0.0, increment=0.0001, value=defaults[key], digits=6, size=(150, -1))
+            grid_sizer.Add(wx.StaticText(self, -1, '{} Tolerance'.format(label)), 0, wx.CENTER)
+            grid_sizer.Add(ctrl, 0, wx.ALIGN_RIGHT)
+            self.ctrls.append(ctrl)
+
+        hsizer = wx.BoxSizer(wx.HORIZONTAL)
+        hsizer.Add(grid_sizer, 1, wx.ALL, 10)
+
+        button_sizer = wx.BoxSizer(wx.HORIZONTAL)
+        button_sizer.Add(wx.Button(self, wx.ID_OK, "Ok"), 0, wx.LEFT | wx.RIGHT, 2)
+        button_sizer.Add(wx.Button(self, wx.ID_CANCEL, "Cancel"), 0, wx.LEFT | wx.RIGHT, 5)
+
+        sizer = wx.BoxSizer(wx.VERTICAL)
+        sizer.Add(hsizer, 0, wx.ALL, 10)
+        sizer.Add(wx.StaticLine(self), 0, wx.EXPAND | wx.ALL, 10)
+        sizer.Add(button_sizer, 0, wx.ALIGN_RIGHT | wx.RIGHT | wx.BOTTOM, 10)
+
+        self.SetSizer(sizer)
+        sizer.Fit(self)
+        self.Layout()
+
+    def GetValues(self):
+        return tuple(ctrl.GetValue() for ctrl in self.ctrls)
@@ -1,7 +1,23 @@
+import re
+
 import wx
 from yaean.helpers import POSITION_FLAG, ORIENTATION_FLAG, SCALE_FLAG
 
 FLAGS = [POSITION_FLAG, ORIENTATION_FLAG, SCALE_FLAG]
+RANGE_PATTERN = re.compile(r'^\s*(\d+)\s*-\s*(\d+)\s*$')
+
+
+def parse_ranges(text):
+    """'0-10, 50-60' to [(0, 10), (50, 60)].  Ends are exclusive, like the End Frame box."""
+    ranges = []
+    for part in text.split(','):
+        if not part.strip():
+            continue
+        match = RANGE_PATTERN.match(part)
+        if not match or int(match.group(2)) <= int(match.group(1)):
+            raise ValueError("Invalid frame range {!r}".format(part.strip()))
+        ranges.append((int(match.group(1)), int(match.group(2))))
+    return ranges
 
 
 class RemoveKeyframesDialog(wx.Dialog):
@@ -44,33 +60,47 @@ class RemoveKeyframesDialog(wx.Dialog):
             trim_sizer = wx.BoxSizer(wx.HORIZONTAL)
             trim_sizer.Add(grid_sizer, 1, wx.ALL, 10)
             sizer.Add(trim_sizer, 0, wx.ALL, 10)
+        else:
+            # Several animations: the same ranges are cleared in each of them
+            self.ranges = wx.TextCtrl(self, -1, '', size=(200, -1))
+            self.ranges.SetHint('All frames')
+            self.ranges.SetToolTip('Frame ranges to remove in every selected animation, e.g. "0-10, 50-60"')
+            range_sizer = wx.BoxSizer(wx.HORIZONTAL)
+            range_sizer.Add(wx.StaticText(self, -1, 'Frame Ranges:'), 0, wx.CENTER | wx.RIGHT, 10)
+            range_sizer.Add(self.ranges, 1)
+            sizer.Add(range_sizer, 0, wx.ALL, 20)
 
         sizer.Add(wx.StaticLine(self), 0, wx.EXPAND | wx.ALL, 10)
         sizer.Add(button_sizer, 0, wx.ALIGN_RIGHT | wx.RIGHT | wx.BOTTOM, 10)
 
+        self.Bind(wx.EVT_BUTTON, self.on_ok, id=wx.ID_OK)
         self.SetSizer(sizer)
         sizer.Fit(self)
         self.Layout()
 
+    def on_ok(self, e):
+        if not self.frame_count:
+            try:
+                parse_ranges(self.ranges.GetValue())
+            except ValueError as error:
+                with wx.MessageDialog(self, str(error), "Error") as dlg:
+                    dlg.ShowModal()
+                return
+        e.Skip()
+
     def on_set_start_frame(self, _):
         self.end_frame.SetMin(self.start_frame.GetValue() + 1)
 
     def on_set_end_frame(self, _):
         self.start_frame.SetMax(self.end_frame.GetValue() - 1)
 
-    def get_start_frame(self):
-        if self.frame_count:
-            return self.start_frame.GetValue()
-        return 0
-
-    def get_end_frame(self):
+    def get_ranges(self):
         if self.frame_count:
-            return self.end_frame.GetValue()
-        return 0
+            return [(self.start_frame.GetValue(), self.end_frame.GetValue())]
+        return parse_ranges(self.ranges.GetValue())
 
     def GetValues(self):
         return (
             [flag for i, flag in enumerate(FLAGS) if self.checkboxes[i].GetValue()],
-            self.get_start_frame(),
-            self.get_end_frame()
+            self.get_ranges()
         )
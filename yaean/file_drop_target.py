@@ -0,0 +1,18 @@
+import os
+
+import wx
+from pubsub import pub
+
+
+class FileDropTarget(wx.FileDropTarget):
+    """Sends a load message for every dropped file so they can all load at once."""
+    def __init__(self, window, topic):
+        super().__init__()
+        self.window = window
+        self.topic = topic
+
+    def OnDropFiles(self, x, y, filenames):
+        for path in filenames:
+            dirname, filename = os.path.split(path)
+            pub.sendMessage(self.topic, dirname=dirname, filename=filename)
+        return True
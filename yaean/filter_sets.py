@@ -0,0 +1,98 @@
+"""Bone filters compiled to boolean masks over a skeleton's bones.
+
+A filter in config/bone_filters is either a list of bone names or an object combining
+other filters:
+
+    "arms": ["b_L_Arm1", "b_R_Arm*", "re:^b_[LR]_Hand"],
+    "upper_body": {"union": ["torso", "arms", "head"]},
+    "arms_no_hands": {"difference": ["arms", {"union": ["hands", ["b_L_Wrist", "b_R_Wrist"]]}]}
+
+Names containing *, ? or [ are wildcards and names starting with "re:" are regular
+expressions, both matched against the whole bone name.  Operands of union, intersection
+and difference are filter names or nested filters, and difference takes every later
+operand away from the first.
+"""
+import fnmatch
+from functools import reduce
+import re
+
+import numpy as np
+
+REGEX_PREFIX = 're:'
+WILDCARD_CHARS = set('*?[')
+OPERATIONS = {
+    'union': np.logical_or,
+    'intersection': np.logical_and,
+    'difference': lambda a, b: a & ~b,
+}
+
+
+def get_pattern(name):
+    if name.startswith(REGEX_PREFIX):
+        return name[len(REGEX_PREFIX):]
+    if WILDCARD_CHARS.intersection(name):
+        return fnmatch.translate(name)
+    return None
+
+
+class FilterMasks:
+    """Filters compiled against one list of bone names.
+
+    Each filter is compiled the first time it is asked for and kept, so callers should hold
+    on to this for as long as the bone names don't change.  Masks are shared between calls
+    and must not be modified.
+    """
+    def __init__(self, names, filters):
+        self.names = list(names)
+        self.filters = filters
+        self.indexes = {}
+        for i, name in enumerate(self.names):
+            self.indexes.setdefault(name, []).append(i)
+        self.masks = {}
+
+    def get(self, spec):
+        """Mask for a filter name or a filter written out in full."""
+        if not isinstance(spec, str):
+            return self.compile(spec)
+        if spec in self.masks:
+            if self.masks[spec] is None:
+                raise ValueError("Bone filter {!r} refers to itself".format(spec))
+            return self.masks[spec]
+        if spec not in self.filters:
+            raise ValueError("Unknown bone filter {!r}".format(spec))
+        self.masks[spec] = None
+        try:
+            self.masks[spec] = self.compile(self.filters[spec])
+        except Exception:
+            del self.masks[spec]
+            raise
+        return self.masks[spec]
+
+    def compile(self, spec):
+        if isinstance(spec, list):
+            return self.match(spec)
+        if isinstance(spec, dict) and len(spec) == 1:
+            (operation, operands), = spec.items()
+            if operation in OPERATIONS and isinstance(operands, list) and operands:
+                return reduce(OPERATIONS[operation], [self.get(operand) for operand in operands])
+        raise ValueError("Invalid bone filter {!r}, expected a list of names or one of {} with a list".format(
+            spec, ', '.join(OPERATIONS)))
+
+    def match(self, names):
+        mask = np.zeros(len(self.names), dtype=bool)
+        patterns = []
+        for name in names:
+            pattern = get_pattern(name)
+            if pattern is None:
+                mask[self.indexes.get(name, [])] = True
+            else:
+                patterns.append('(?:{})'.format(pattern))
+        if patterns:
+            # All the patterns of a filter go through the names together
+            regex = re.compile('|'.join(patterns))
+            mask |= np.fromiter((regex.fullmatch(name) is not None for name in self.names),
+                                dtype=bool, count=len(self.names))
+        return mask
+
+    def indexes_of(self, spec):
+        return np.flatnonzero(self.get(spec)).tolist()
@@ -0,0 +1,54 @@
+from pyxenoverse.ean import EAN
+from pyxenoverse.esk import ESK
+
+from yaean.lazy_ean import decode_animations, load_lazy
+
+SIGNATURE_SIZE = 4
+SIGNATURES = {
+    b'#EAN': 'EAN',
+    b'#ESK': 'ESK',
+}
+LOADERS = {
+    'EAN': EAN,
+    'ESK': ESK,
+}
+
+
+class LoadCancelled(Exception):
+    pass
+
+
+def probe(path):
+    """Returns 'EAN' or 'ESK' from the file signature, or None if it's neither."""
+    try:
+        with open(path, 'rb') as f:
+            return SIGNATURES.get(f.read(SIGNATURE_SIZE))
+    except OSError:
+        return None
+
+
+def load(path, lazy=False, progress=None):
+    """(filetype, data), or (None, None) if the file can't be read.
+
+    EAN animations are decoded one at a time, calling progress(done, total) after each.
+    It can raise LoadCancelled to stop the load between animations.
+    """
+    filetype = probe(path)
+    if filetype is None:
+        return None, None
+    if filetype == 'EAN':
+        data = load_lazy(path)
+        if data is not None and not lazy:
+            try:
+                decode_animations(data, progress)
+            except LoadCancelled:
+                raise
+            except Exception:
+                # Leave it to pyxenoverse's parser
+                data = None
+        if data is not None:
+            return filetype, data
+    data = LOADERS[filetype]()
+    if not data.load(path):
+        return None, None
+    return filetype, data
@@ -0,0 +1,168 @@
+import collections
+import contextlib
+import cProfile
+import io
+import json
+import pstats
+import time
+
+RECORD_LIMIT = 1000
+PROFILE_LINES = 40
+
+
+class Record:
+    """One timed operation.
+
+    Animations and bones handed to touch() are only counted once the timer has stopped, so
+    counting doesn't show up in the time.  Keyframes are counted from the EAN's tracks where
+    they have been made, since those are ahead of the keyframe lists until they're synced.
+    """
+    __slots__ = ('label', 'started', 'seconds', 'waited', 'nodes', 'keyframes', 'bones', 'widget_updates',
+                 'details', 'profile', 'touched')
+
+    def __init__(self, label, details):
+        self.label = label
+        self.started = time.time()
+        self.seconds = 0.0
+        self.waited = 0.0
+        self.nodes = 0
+        self.keyframes = 0
+        self.bones = 0
+        self.widget_updates = 0
+        self.details = details
+        self.profile = None
+        self.touched = []
+
+    def count(self):
+        if not self.touched:
+            return
+        from yaean.tracks import find_track
+        for ean, animation in self.touched:
+            for node in animation.nodes:
+                self.nodes += 1
+                if hasattr(node, 'tracks'):
+                    # Clipboard snapshots keep keyframes in arrays
+                    self.keyframes += sum(len(track.frames) for track in node.tracks)
+                    continue
+                for keyframed_animation in node.keyframed_animations:
+                    track = find_track(ean, keyframed_animation) if ean is not None else None
+                    self.keyframes += len(track if track is not None else keyframed_animation.keyframes)
+        self.touched = []
+
+    def to_dict(self):
+        return {
+            'label': self.label,
+            'started': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(self.started)),
+            'ms': self.seconds * 1000,
+            'waited_ms': self.waited * 1000,
+            'nodes': self.nodes,
+            'keyframes': self.keyframes,
+            'bones': self.bones,
+            'widget_updates': self.widget_updates,
+            'details': self.details,
+            'profile': self.profile,
+        }
+
+
+def format_profile(profiler):
+    stream = io.StringIO()
+    pstats.Stats(profiler, stream=stream).sort_stats('cumulative').print_stats(PROFILE_LINES)
+    return stream.getvalue()
+
+
+class Instrument:
+    """Keeps the most recent operation records.
+
+    profile_label arms cProfile for the next operation with that label only, so nothing
+    is profiled unless asked for.
+    """
+    def __init__(self, limit=RECORD_LIMIT):
+        self.records = collections.deque(maxlen=limit)
+        self.current = None
+        self.profile_label = None
+        self.labels = set()
+        self.listeners = []
+
+    @contextlib.contextmanager
+    def operation(self, label, elapsed=0.0, **details):
+        """Times the block as one operation.
+
+        elapsed is time already spent on it elsewhere, such as parsing on a loader thread.
+        Operations started inside another one count towards the outer one.
+        """
+        if self.current is not None:
+            yield self.current
+            return
+        record = Record(label, details)
+        self.labels.add(label)
+        profiler = None
+        if self.profile_label == label:
+            self.profile_label = None
+            profiler = cProfile.Profile()
+        self.current = record
+        start = time.perf_counter()
+        if profiler is not None:
+            profiler.enable()
+        try:
+            yield record
+        finally:
+            if profiler is not None:
+                profiler.disable()
+            record.seconds = time.perf_counter() - start - record.waited + elapsed
+            self.current = None
+            record.count()
+            if profiler is not None:
+                record.profile = format_profile(profiler)
+            self.records.append(record)
+            for listener in self.listeners:
+                listener(record)
+
+    @contextlib.contextmanager
+    def waiting(self):
+        """Leaves the time spent in the block, such as a modal dialog, out of the current operation."""
+        record = self.current
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            if record is not None:
+                record.waited += time.perf_counter() - start
+
+    def touch(self, animations=(), bones=0, ean=None):
+        if self.current is not None:
+            self.current.touched.extend((ean, animation) for animation in animations)
+            self.current.bones += bones
+
+    def widget_updated(self, count=1):
+        if self.current is not None:
+            self.current.widget_updates += count
+
+    def clear(self):
+        self.records.clear()
+
+    def export(self, path):
+        with open(path, 'w') as f:
+            json.dump({'records': [record.to_dict() for record in self.records]}, f, indent=2)
+
+
+_instrument = Instrument()
+
+
+def get_instrument():
+    return _instrument
+
+
+def operation(label, elapsed=0.0, **details):
+    return _instrument.operation(label, elapsed, **details)
+
+
+def waiting():
+    return _instrument.waiting()
+
+
+def touch(animations=(), bones=0, ean=None):
+    _instrument.touch(animations, bones, ean)
+
+
+def widget_updated(count=1):
+    _instrument.widget_updated(count)
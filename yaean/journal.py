@@ -0,0 +1,246 @@
+import copy
+import sys
+
+from yaean.node_index import invalidate_node_index
+from yaean.save import mark_dirty, mark_skeleton_dirty
+
+REF_SIZE = 8
+
+# The main window creates a Journal on startup, so numpy, pyxenoverse and the modules
+# using them are only imported once the first delta is recorded.
+
+
+class AnimationDelta:
+    """State of some animations before an edit.
+
+    Node lists and node names are always kept.  Keyframes are only kept for the nodes in
+    bone_names (every node when it is None) and the keyframed animations with a flag in
+    flags (every one when it is None), so an edit only stores the tracks it changes.  They
+    are copied from the EAN's tracks, which are left unsynced.
+    """
+    def __init__(self, ean, animations, bone_names=None, flags=None):
+        from yaean.tracks import get_track
+        self.ean = ean
+        self.bone_names = bone_names
+        self.flags = flags
+        self.animations = []
+        for animation in animations:
+            nodes = [(node, node.bone_name) for node in animation.nodes]
+            keyframed_animations = {}
+            for node in animation.nodes:
+                if bone_names is not None and node.bone_name not in bone_names:
+                    continue
+                saved = []
+                for keyframed_animation in node.keyframed_animations:
+                    arrays = None
+                    if flags is None or keyframed_animation.flag in flags:
+                        track = get_track(ean, keyframed_animation)
+                        arrays = track.frames.copy(), track.values.copy()
+                    saved.append((keyframed_animation, keyframed_animation.flag, arrays))
+                keyframed_animations[id(node)] = saved
+            self.animations.append((
+                animation, animation.name, animation.frame_count, animation.frame_float_size,
+                nodes, keyframed_animations))
+
+    @property
+    def nbytes(self):
+        size = 0
+        for animation, name, _, _, nodes, keyframed_animations in self.animations:
+            size += sys.getsizeof(nodes) + len(nodes) * sys.getsizeof((None, None))
+            for saved in keyframed_animations.values():
+                size += sum(REF_SIZE * 2 + (arrays[0].nbytes + arrays[1].nbytes if arrays else 0)
+                            for _, _, arrays in saved)
+        return size
+
+    def apply(self):
+        from yaean.tracks import get_track
+        inverse = AnimationDelta(self.ean, [saved[0] for saved in self.animations], self.bone_names, self.flags)
+        for animation, name, frame_count, frame_float_size, nodes, keyframed_animations in self.animations:
+            animation.name = name
+            animation.frame_count = frame_count
+            animation.frame_float_size = frame_float_size
+            animation.nodes = [node for node, _ in nodes]
+            for node, bone_name in nodes:
+                node.bone_name = bone_name
+                if id(node) not in keyframed_animations:
+                    continue
+                saved = keyframed_animations[id(node)]
+                node.keyframed_animations = [keyframed_animation for keyframed_animation, _, _ in saved]
+                for keyframed_animation, flag, arrays in saved:
+                    keyframed_animation.flag = flag
+                    if arrays is not None:
+                        get_track(self.ean, keyframed_animation).set(*arrays)
+        invalidate_node_index(self.ean)
+        mark_dirty(self.ean, [saved[0] for saved in self.animations])
+        return inverse
+
+
+class ReverseDelta:
+    """Last frame of every track of some reversed animations.
+
+    Reversing a track maps frame f to last_frame - f and flips the values, which is its own
+    inverse, so no keyframes are kept.
+    """
+    def __init__(self, ean, animations):
+        from yaean.tracks import get_track
+        self.ean = ean
+        self.animations = list(animations)
+        self.last_frames = []
+        for animation in self.animations:
+            for node in animation.nodes:
+                for keyframed_animation in node.keyframed_animations:
+                    track = get_track(ean, keyframed_animation)
+                    if len(track):
+                        self.last_frames.append((keyframed_animation, int(track.frames[-1])))
+
+    @property
+    def nbytes(self):
+        return sys.getsizeof(self.last_frames) + len(self.last_frames) * (sys.getsizeof((None, 0)) + REF_SIZE)
+
+    def apply(self):
+        from yaean.operations import reverse_track
+        from yaean.tracks import get_track
+        for keyframed_animation, last_frame in self.last_frames:
+            reverse_track(get_track(self.ean, keyframed_animation), last_frame)
+        mark_dirty(self.ean, self.animations)
+        return self
+
+
+class MirrorDelta:
+    """Mirrored animations, undone by mirroring them again with the same table.
+
+    Only usable when table.reversible(exclude_base).
+    """
+    def __init__(self, ean, animations, table, exclude_base=False):
+        self.ean = ean
+        self.animations = list(animations)
+        self.table = table
+        self.exclude_base = exclude_base
+
+    @property
+    def nbytes(self):
+        return sys.getsizeof(self.animations) + len(self.animations) * REF_SIZE
+
+    def apply(self):
+        from yaean.operations import mirror_nodes
+        mirror_nodes(self.ean, self.animations, self.table, self.exclude_base)
+        return self
+
+
+class AnimationListDelta:
+    """Order and names of an EAN's animations, for inserts, deletes and renames."""
+    def __init__(self, ean):
+        self.ean = ean
+        self.animations = [(animation, animation.name) for animation in ean.animations]
+
+    @property
+    def nbytes(self):
+        return sys.getsizeof(self.animations) + len(self.animations) * sys.getsizeof((None, None))
+
+    def apply(self):
+        inverse = AnimationListDelta(self.ean)
+        self.ean.animations[:] = [animation for animation, _ in self.animations]
+        for animation, name in self.animations:
+            animation.name = name
+        invalidate_node_index(self.ean)
+        return inverse
+
+
+class SkeletonDelta:
+    """Bone order, names and links of a skeleton (an ESK or an EAN's skeleton).
+
+    Bones listed in `changed` are also copied whole, for edits to their transforms.
+    """
+    def __init__(self, skeleton, changed=()):
+        self.skeleton = skeleton
+        self.changed = list(changed)
+        self.bones = [
+            (bone, bone.name, bone.index, bone.parent_index, bone.child_index, bone.sibling_index)
+            for bone in skeleton.bones]
+        self.copies = [(bone, copy.deepcopy(bone)) for bone in self.changed]
+
+    @property
+    def nbytes(self):
+        from yaean.clipboard import deep_sizeof
+        return (sys.getsizeof(self.bones) + len(self.bones) * sys.getsizeof((None,) * 6)
+                + sum(deep_sizeof(saved) for _, saved in self.copies))
+
+    def apply(self):
+        inverse = SkeletonDelta(self.skeleton, self.changed)
+        for bone, saved in self.copies:
+            bone.paste(saved)
+        self.skeleton.bones = [bone for bone, _, _, _, _, _ in self.bones]
+        for bone, name, index, parent_index, child_index, sibling_index in self.bones:
+            bone.name = name
+            bone.index = index
+            bone.parent_index = parent_index
+            bone.child_index = child_index
+            bone.sibling_index = sibling_index
+        mark_skeleton_dirty(self.skeleton)
+        return inverse
+
+
+class Entry:
+    __slots__ = ('label', 'deltas', 'nbytes')
+
+    def __init__(self, label, deltas):
+        self.label = label
+        self.deltas = list(deltas)
+        self.nbytes = sum(delta.nbytes for delta in self.deltas)
+
+    def apply(self):
+        # Later deltas were captured after earlier ones were applied, so unwind them in reverse
+        return Entry(self.label, [delta.apply() for delta in reversed(self.deltas)])
+
+    def touches_skeleton(self, skeleton):
+        return any(isinstance(delta, SkeletonDelta) and delta.skeleton is skeleton for delta in self.deltas)
+
+
+class Journal:
+    """Undo/redo history made of the deltas captured before each edit.
+
+    The oldest entries are dropped once the history uses more than memory_limit bytes.
+    """
+    def __init__(self, memory_limit):
+        self.memory_limit = memory_limit
+        self.undo_stack = []
+        self.redo_stack = []
+
+    @property
+    def nbytes(self):
+        return sum(entry.nbytes for entry in self.undo_stack) + sum(entry.nbytes for entry in self.redo_stack)
+
+    def clear(self):
+        self.undo_stack.clear()
+        self.redo_stack.clear()
+
+    def record(self, label, *deltas):
+        self.undo_stack.append(Entry(label, deltas))
+        self.redo_stack.clear()
+        while len(self.undo_stack) > 1 and self.nbytes > self.memory_limit:
+            self.undo_stack.pop(0)
+
+    def can_undo(self):
+        return bool(self.undo_stack)
+
+    def can_redo(self):
+        return bool(self.redo_stack)
+
+    def undo(self):
+        if not self.undo_stack:
+            return None
+        entry = self.undo_stack.pop()
+        self.redo_stack.append(entry.apply())
+        return entry
+
+    def redo(self):
+        if not self.redo_stack:
+            return None
+        entry = self.redo_stack.pop()
+        self.undo_stack.append(entry.apply())
+        return entry
+
+    def discard(self):
+        # Drop the last entry unapplied, for edits that were refused before changing anything
+        if self.undo_stack:
+            self.undo_stack.pop()
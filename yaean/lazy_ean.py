@@ -0,0 +1,203 @@
+import os
+import struct
+import tempfile
+
+import numpy as np
+
+from pyxenoverse.ean import EAN
+from pyxenoverse.ean.keyframe import Keyframe
+
+from yaean.save import COUNT_OFFSET, TABLE_OFFSET, NAMES_OFFSET
+
+ANIMATION_HEADER = struct.Struct('<xBBxIII')
+NODE_HEADER = struct.Struct('<HHI')
+KEYFRAMED_ANIMATION_HEADER = struct.Struct('<IIII')
+INDEX_TYPES = {0: np.uint8, 1: np.uint16}
+FLOAT_TYPES = {1: np.float16, 2: np.float32}
+
+
+class LazyKeyframedAnimation:
+    __slots__ = ('flag', 'frames', 'values')
+
+    def __init__(self, flag, frames, values):
+        self.flag = flag
+        self.frames = frames
+        self.values = values
+
+    @property
+    def keyframes(self):
+        return [Keyframe(frame, w, x, y, z) for frame, (w, x, y, z) in zip(self.frames.tolist(), self.values.tolist())]
+
+
+class LazyNode:
+    __slots__ = ('bone_index', 'bone_name', 'keyframed_animations')
+
+    def __init__(self, bone_index, bone_name, keyframed_animations):
+        self.bone_index = bone_index
+        self.bone_name = bone_name
+        self.keyframed_animations = keyframed_animations
+
+
+class LazyAnimation:
+    """An animation whose nodes are decoded from the file the first time they're read.
+
+    Only the animations that were looked at are kept decoded, so browsing a large file
+    mostly costs the animation table.
+    """
+    def __init__(self, reader, name, offset, size, header):
+        self.reader = reader
+        self.name = name
+        self.offset = offset
+        self.size = size
+        self.frame_index_size, self.frame_float_size, self.frame_count, self.node_count, self.nodes_offset = \
+            ANIMATION_HEADER.unpack_from(header)
+        self._nodes = None
+
+    @property
+    def nodes(self):
+        try:
+            self.reader.check_stamp()
+        except OSError:
+            self._nodes = None
+            raise
+        if self._nodes is None:
+            self._nodes = self.reader.read_nodes(self)
+        return self._nodes
+
+
+class LazyReader:
+    """Reads byte ranges of an EAN on demand.
+
+    No handle or mapping is kept open between reads, so the file can still be saved over
+    (on Windows a mapped file can't be replaced).  Reads check the file's size and mtime
+    against what was loaded, so a file changed on disk is refused instead of misread, and
+    so are nodes decoded from it before the change.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.stamp = self.get_stamp()
+        self.bones = []
+
+    def get_stamp(self):
+        stat = os.stat(self.path)
+        return stat.st_size, stat.st_mtime_ns
+
+    def check_stamp(self):
+        if self.get_stamp() != self.stamp:
+            raise OSError("{} has changed since it was opened, open it again".format(self.path))
+
+    def read(self, offset, size, f=None):
+        if f is None:
+            self.check_stamp()
+            with open(self.path, 'rb') as f:
+                return self.read(offset, size, f)
+        f.seek(offset)
+        data = f.read(size)
+        if len(data) != size:
+            raise OSError("{} is shorter than its animation table says".format(self.path))
+        return data
+
+    def read_head(self):
+        with open(self.path, 'rb') as f:
+            header = self.read(0, NAMES_OFFSET + 4, f)
+            return self.read(0, struct.unpack_from('<I', header, TABLE_OFFSET)[0], f)
+
+    def read_animations(self):
+        file_size = self.stamp[0]
+        with open(self.path, 'rb') as f:
+            header = self.read(0, NAMES_OFFSET + 4, f)
+            count = struct.unpack_from('<H', header, COUNT_OFFSET)[0]
+            table_offset = struct.unpack_from('<I', header, TABLE_OFFSET)[0]
+            names_offset = struct.unpack_from('<I', header, NAMES_OFFSET)[0]
+            offsets = struct.unpack('<{}I'.format(count), self.read(table_offset, 4 * count, f))
+            name_offsets = struct.unpack('<{}I'.format(count), self.read(names_offset, 4 * count, f))
+            names = self.read(min(name_offsets), file_size - min(name_offsets), f) if count else b''
+
+            # Each animation's block runs up to the next block or the name table
+            boundaries = sorted(set(offsets) | {names_offset, file_size})
+            animations = []
+            for offset, name_offset in zip(offsets, name_offsets):
+                start = name_offset - min(name_offsets)
+                name = names[start:names.find(b'\0', start)].decode()
+                end = min(boundary for boundary in boundaries if boundary > offset)
+                header = self.read(offset, ANIMATION_HEADER.size, f)
+                animations.append(LazyAnimation(self, name, offset, end - offset, header))
+        return animations
+
+    def read_nodes(self, animation):
+        data = self.read(animation.offset, animation.size)
+        index_type = INDEX_TYPES[animation.frame_index_size]
+        float_type = FLOAT_TYPES[animation.frame_float_size]
+        node_offsets = struct.unpack_from('<{}I'.format(animation.node_count), data, animation.nodes_offset)
+        nodes = []
+        for address in node_offsets:
+            bone_index, count, table = NODE_HEADER.unpack_from(data, address)
+            bone_name = self.bones[bone_index].name if bone_index < len(self.bones) else None
+            keyframed_animations = []
+            for offset in struct.unpack_from('<{}I'.format(count), data, address + table):
+                ka_address = address + offset
+                flag, keyframe_count, indices_offset, keyframes_offset = \
+                    KEYFRAMED_ANIMATION_HEADER.unpack_from(data, ka_address)
+                frames = np.frombuffer(
+                    data, dtype=index_type, count=keyframe_count, offset=ka_address + indices_offset)
+                values = np.frombuffer(
+                    data, dtype=float_type, count=keyframe_count * 4, offset=ka_address + keyframes_offset)
+                # Stored as x, y, z, w
+                values = values.reshape(-1, 4)[:, [3, 0, 1, 2]].astype(np.float32)
+                keyframed_animations.append(LazyKeyframedAnimation(flag, frames.astype(np.int32), values))
+            nodes.append(LazyNode(bone_index, bone_name, keyframed_animations))
+        return nodes
+
+
+def load_skeleton(reader):
+    # Let pyxenoverse read just the header and skeleton, with the animation table emptied
+    head = bytearray(reader.read_head())
+    struct.pack_into('<H', head, COUNT_OFFSET, 0)
+    struct.pack_into('<I', head, NAMES_OFFSET, len(head))
+    fd, path = tempfile.mkstemp(suffix='.ean')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(head)
+        ean = EAN()
+        if not ean.load(path):
+            return None
+    finally:
+        os.remove(path)
+    return ean
+
+
+def decode_animations(ean, progress=None):
+    """Replaces the animations of an EAN opened with load_lazy with fully decoded ones.
+
+    progress(done, total) is called after each animation, and can raise to stop in between.
+    """
+    from pyxenoverse.ean.animation import Animation
+    from yaean.clipboard import AnimationSnapshot
+    lazy_animations = ean.animations
+    animations = []
+    for lazy_animation in lazy_animations:
+        animation = Animation(ean)
+        animation.paste(AnimationSnapshot(lazy_animation))
+        animations.append(animation)
+        if progress is not None:
+            progress(len(animations), len(lazy_animations))
+    ean.animations = animations
+
+
+def load_lazy(path):
+    """Opens an EAN for browsing and copying.
+
+    The skeleton and animation table are read up front, and each animation's bytes are read
+    from the file and decoded when its nodes are read.  Returns None when the file
+    can't be read this way.
+    """
+    try:
+        reader = LazyReader(path)
+        ean = load_skeleton(reader)
+        if ean is None:
+            return None
+        reader.bones = ean.skeleton.bones
+        ean.animations = reader.read_animations()
+    except Exception:
+        return None
+    return ean
@@ -0,0 +1,45 @@
+import sys
+import threading
+import time
+
+import wx
+
+
+class LoadJob(threading.Thread):
+    """Parses a file off the main thread and hands the result back with wx.CallAfter.
+
+    done and total count the EAN animations decoded so far, for the progress gauge.
+    """
+    def __init__(self, path, on_done, lazy=False):
+        super().__init__(daemon=True)
+        self.path = path
+        self.lazy = lazy
+        self.on_done = on_done
+        self.cancelled = threading.Event()
+        self.seconds = 0.0
+        self.done = 0
+        self.total = 0
+
+    def cancel(self):
+        self.cancelled.set()
+
+    def on_progress(self, done, total):
+        from yaean.formats import LoadCancelled
+        if self.cancelled.is_set():
+            raise LoadCancelled
+        self.done, self.total = done, total
+
+    def run(self):
+        # Importing the parsers here keeps them off the startup path and the main thread
+        from yaean.formats import LoadCancelled, load
+        filetype, data, error = None, None, None
+        start = time.perf_counter()
+        try:
+            filetype, data = load(self.path, self.lazy, self.on_progress)
+        except LoadCancelled:
+            return
+        except Exception:
+            error = sys.exc_info()
+        self.seconds = time.perf_counter() - start
+        if not self.cancelled.is_set():
+            wx.CallAfter(self.on_done, self, filetype, data, error)
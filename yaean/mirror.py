@@ -0,0 +1,81 @@
+import os
+import re
+import weakref
+
+from yaean.settings import DEFAULTS, SETTINGS_PATH, load_settings
+
+AXES = {'x': 0, 'y': 1, 'z': 2}
+
+_tables = weakref.WeakKeyDictionary()
+_settings = {}
+
+
+class MirrorTable:
+    """Left/right partner of every bone in a skeleton.
+
+    Bones that no rule matches are their own partner.  Bones whose partner isn't in the
+    skeleton are kept in `missing`, so animations using them can be rejected before
+    anything is changed.
+    """
+    def __init__(self, names, rules, axis):
+        self.names = names
+        self.axis = axis
+        bone_names = set(names)
+        self.partners = {}
+        self.missing = set()
+        for name in names:
+            partner = name
+            for pattern, replacement in rules:
+                partner, count = pattern.subn(replacement, name, count=1)
+                if count:
+                    break
+            if partner not in bone_names:
+                self.missing.add(name)
+            self.partners[name] = partner
+
+    def can_mirror(self, bone_name):
+        return bone_name in self.partners and bone_name not in self.missing
+
+    def reversible(self, exclude_base=False):
+        """Whether mirroring twice gives back every bone name and keyframe."""
+        if exclude_base and self.partners.get('b_C_Base', 'b_C_Base') != 'b_C_Base':
+            return False
+        return all(self.partners.get(partner) == name
+                   for name, partner in self.partners.items() if name not in self.missing)
+
+
+def get_stamp(path):
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def get_settings(overrides=None, path=SETTINGS_PATH):
+    """The mirror section of the settings file, only read again when the file has changed."""
+    stamp = get_stamp(path)
+    cached = _settings.get(path)
+    if cached is None or cached[0] != stamp:
+        cached = _settings[path] = stamp, dict(DEFAULTS['mirror'], **load_settings(path)['mirror'])
+    return dict(cached[1], **(overrides or {}))
+
+
+def compile_rules(rules):
+    return [(re.compile(pattern), replacement) for pattern, replacement in rules]
+
+
+def get_mirror_table(skeleton, settings=None):
+    """Mirror table for a skeleton, rebuilt only when its bone names or the rules change.
+
+    settings can override the 'rules' and 'axis' from config/settings.json.
+    """
+    settings = get_settings(settings)
+    names = tuple(bone.name for bone in skeleton.bones)
+    key = (names, tuple(map(tuple, settings['rules'])), settings['axis'])
+    cached = _tables.get(skeleton)
+    if cached is not None and cached[0] == key:
+        return cached[1]
+    table = MirrorTable(names, compile_rules(settings['rules']), AXES[settings['axis']])
+    _tables[skeleton] = key, table
+    return table
@@ -0,0 +1,96 @@
+import weakref
+
+_indexes = weakref.WeakKeyDictionary()
+
+
+class NodeIndex:
+    """Maps bone names to the animation nodes that animate them.
+
+    nodes[bone_name][id(animation)] is (animation, node).  Anything that adds, removes or
+    renames nodes has to go through the module functions below so the index stays current.
+    """
+    def __init__(self, ean):
+        self.nodes = {}
+        self.names = {}
+        for animation in ean.animations:
+            self.add(animation)
+
+    def add(self, animation):
+        names = set()
+        for node in animation.nodes:
+            self.nodes.setdefault(node.bone_name, {})[id(animation)] = (animation, node)
+            names.add(node.bone_name)
+        self.names[id(animation)] = names
+
+    def remove(self, animation):
+        for name in self.names.pop(id(animation), ()):
+            entries = self.nodes.get(name)
+            if entries is None:
+                continue
+            entries.pop(id(animation), None)
+            if not entries:
+                del self.nodes[name]
+
+    def update(self, animation):
+        self.remove(animation)
+        self.add(animation)
+
+    def get(self, bone_name):
+        return self.nodes.get(bone_name, {})
+
+    def find(self, animation, bone_name):
+        entry = self.get(bone_name).get(id(animation))
+        return None if entry is None else entry[1]
+
+    def rename(self, old_name, new_name):
+        entries = self.nodes.pop(old_name, None)
+        if not entries:
+            return 0
+        for animation, node in entries.values():
+            node.bone_name = new_name
+            names = self.names[id(animation)]
+            names.discard(old_name)
+            names.add(new_name)
+        self.nodes.setdefault(new_name, {}).update(entries)
+        return len(entries)
+
+
+def get_node_index(ean):
+    index = _indexes.get(ean)
+    if index is None:
+        index = NodeIndex(ean)
+        _indexes[ean] = index
+    return index
+
+
+def bone_name(ean, bone_index):
+    bones = ean.skeleton.bones
+    return bones[bone_index].name if 0 <= bone_index < len(bones) else None
+
+
+def find_node(ean, animation, bone_index):
+    name = bone_name(ean, bone_index)
+    return None if name is None else get_node_index(ean).find(animation, name)
+
+
+def rename_nodes(ean, old_name, new_name):
+    return get_node_index(ean).rename(old_name, new_name)
+
+
+def animations_changed(ean, animations):
+    # Call after nodes were added to, removed from or renamed in these animations
+    index = _indexes.get(ean)
+    if index is not None:
+        for animation in animations:
+            index.update(animation)
+
+
+def animations_removed(ean, animations):
+    index = _indexes.get(ean)
+    if index is not None:
+        for animation in animations:
+            index.remove(animation)
+
+
+def invalidate_node_index(ean):
+    _indexes.pop(ean, None)
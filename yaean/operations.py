@@ -0,0 +1,255 @@
+import numpy as np
+
+from pyxenoverse.ean.keyframed_animation import KeyframedAnimation
+from pyxenoverse.ean.keyframe import Keyframe
+
+from yaean import quaternion
+from yaean.constants import POSITION_FLAG, ORIENTATION_FLAG, SCALE_FLAG, TARGET_CAMERA_POSITION_FLAG
+from yaean.decimate import get_tolerance, keyframe_size, simplify
+from yaean.mirror import get_mirror_table
+from yaean.node_index import animations_changed, bone_name, find_node, invalidate_node_index
+from yaean.resample import resample_animations
+from yaean.save import mark_dirty
+from yaean.tracks import get_track
+
+
+def get_animations(ean, selected):
+    return [ean.animations[i] for i in selected]
+
+
+def offset_func(track, _, x, y, z):
+    track.values[:, 1:] += np.array((x, y, z), dtype=np.float32)
+    track.dirty = True
+
+
+def rotate_func(track, w, x, y, z):
+    track.values[:] = quaternion.multiply(track.values, (w, x, y, z))
+    track.dirty = True
+
+
+def transform(ean, selected, bone_index, flag, found_func, w, x, y, z):
+    skipped = []
+    for animation in get_animations(ean, selected):
+        node = find_node(ean, animation, bone_index)
+        if node is None:
+            skipped.append(animation.name)
+            continue
+        mark_dirty(ean, [animation])
+        for keyframed_animation in node.keyframed_animations:
+            if keyframed_animation.flag == flag:
+                found_func(get_track(ean, keyframed_animation), w, x, y, z)
+                break
+        else:
+            keyframed_animation = KeyframedAnimation()
+            keyframed_animation.flag = flag
+            keyframed_animation.keyframes.append(Keyframe(0, w, x, y, z))
+            keyframed_animation.keyframes.append(Keyframe(animation.frame_count - 1, w, x, y, z))
+            node.keyframed_animations.append(keyframed_animation)
+    return skipped
+
+
+def set_offset(ean, selected, bone_index, x, y, z):
+    return transform(ean, selected, bone_index, POSITION_FLAG, offset_func, 1, x, y, z)
+
+
+def set_scale(ean, selected, bone_index, x, y, z):
+    return transform(ean, selected, bone_index, SCALE_FLAG, offset_func, 1, x, y, z)
+
+
+def set_rotation(ean, selected, bone_index, x, y, z):
+    return transform(ean, selected, bone_index, ORIENTATION_FLAG, rotate_func, *quaternion.euler_to_quaternion(x, y, z))
+
+
+def set_target_camera_offset(ean, selected, x, y, z):
+    changed = 0
+    for animation in get_animations(ean, selected):
+        for node in animation.nodes:
+            for keyframed_animation in node.keyframed_animations:
+                if keyframed_animation.flag != TARGET_CAMERA_POSITION_FLAG:
+                    continue
+                changed += 1
+                mark_dirty(ean, [animation])
+                offset_func(get_track(ean, keyframed_animation), 1, x, y, z)
+    return changed
+
+
+def set_duration(ean, selected, duration):
+    animations = get_animations(ean, selected)
+    resample_animations(ean, animations, duration)
+    mark_dirty(ean, animations)
+
+
+def trim_animation(ean, index, start_frame, end_frame):
+    resample_animations(ean, [ean.animations[index]], start_frame=start_frame, end_frame=end_frame)
+    mark_dirty(ean, [ean.animations[index]])
+
+
+def filter_names(ean, bone_filters):
+    # Bone names of the checked bone indexes, so nodes are matched by a set lookup on their name
+    names = {bone_name(ean, bone_index) for bone_index in bone_filters}
+    names.discard(None)
+    return names
+
+
+def range_mask(frames, ranges):
+    """Which of the sorted frames fall in any of the [start, end) ranges.
+
+    Range ends are found by binary search and the ranges are painted onto the keyframes
+    with a running count, so overlapping ranges are fine.
+    """
+    bounds = np.asarray(ranges, dtype=np.int64).reshape(-1, 2)
+    counts = np.zeros(len(frames) + 1, dtype=np.int32)
+    np.add.at(counts, np.searchsorted(frames, bounds[:, 0]), 1)
+    np.add.at(counts, np.searchsorted(frames, bounds[:, 1]), -1)
+    return np.cumsum(counts[:-1]) > 0
+
+
+def remove_keyframes(ean, selected, bone_filters, flags, ranges=None):
+    """Removes keyframes of the given types from the nodes of the bones in bone_filters.
+
+    ranges maps animation indexes to the [start, end) frame ranges to clear in them.
+    Animations without ranges, or with a range covering every frame, lose the whole
+    keyframed animation.  Returns (keyframed animations removed, keyframes removed).
+    """
+    names = filter_names(ean, bone_filters)
+    flags = set(flags)
+    ranges = ranges or {}
+    removed_keyframed_animations = 0
+    removed_keyframes = 0
+    for i in selected:
+        animation = ean.animations[i]
+        animation_ranges = [(start, end) for start, end in ranges.get(i, ()) if end > start]
+        whole = not ranges.get(i) or any(
+            start <= 0 and end >= animation.frame_count for start, end in animation_ranges)
+        changed = False
+        for node in animation.nodes:
+            if node.bone_name not in names:
+                continue
+            keyframed_animations = []
+            for keyframed_animation in node.keyframed_animations:
+                if keyframed_animation.flag not in flags:
+                    keyframed_animations.append(keyframed_animation)
+                elif whole:
+                    removed_keyframed_animations += 1
+                    changed = True
+                else:
+                    keyframed_animations.append(keyframed_animation)
+                    track = get_track(ean, keyframed_animation)
+                    inside = range_mask(track.frames, animation_ranges)
+                    if inside.any():
+                        removed_keyframes += int(inside.sum())
+                        track.set(track.frames[~inside], track.values[~inside])
+                        changed = True
+            node.keyframed_animations = keyframed_animations
+        if changed:
+            mark_dirty(ean, [animation])
+    return removed_keyframed_animations, removed_keyframes
+
+
+def reduce_keyframes(ean, selected, bone_filters, position, orientation, scale):
+    """Drops keyframes that interpolation between their neighbours already reproduces within tolerance.
+
+    Returns (animation name, removed keyframes, bytes saved) for every selected animation.
+    """
+    names = filter_names(ean, bone_filters)
+    results = []
+    for animation in get_animations(ean, selected):
+        removed = 0
+        for node in animation.nodes:
+            if node.bone_name not in names:
+                continue
+            for keyframed_animation in node.keyframed_animations:
+                track = get_track(ean, keyframed_animation)
+                tolerance, spherical = get_tolerance(track.flag, track.values, position, orientation, scale)
+                if tolerance is None or len(track) < 3:
+                    continue
+                keep = simplify(track.frames, track.values, tolerance, spherical)
+                if keep.all():
+                    continue
+                removed += len(track) - int(keep.sum())
+                track.set(track.frames[keep], track.values[keep])
+        if removed:
+            mark_dirty(ean, [animation])
+        results.append((animation.name, removed, removed * keyframe_size(animation)))
+    return results
+
+
+def paste_animations(ean, targets):
+    """Pastes (animation, snapshot, bone_names) targets over existing animations.
+
+    Snapshots are stretched to each animation's frame count first, once per distinct frame
+    count since resampled() keeps the result.  Targets are pasted one after another:
+    Animation.paste() rebuilds the target's nodes as Python objects under the GIL, and the
+    snapshots' resampled caches are shared between targets.  Tracks have to be synced
+    beforehand and the node index is left for the caller to update.
+    """
+    for animation, snapshot, bone_names in targets:
+        # True is the match duration flag the filtered paste has always used (0.1.7): it keeps
+        # the target's frame count and merges the filtered nodes into it.  The snapshot has
+        # already been resampled to that frame count, so pyxenoverse has nothing to stretch.
+        animation.paste(snapshot.resampled(animation.frame_count), bone_names, True)
+    mark_dirty(ean, [animation for animation, _, _ in targets])
+
+
+def remove_missing_nodes(ean):
+    # Drops nodes whose bone is no longer in the skeleton, in a single pass over the animations
+    bone_names = {bone.name for bone in ean.skeleton.bones}
+    removed = 0
+    for animation in ean.animations:
+        nodes = [node for node in animation.nodes if node.bone_name in bone_names]
+        if len(nodes) != len(animation.nodes):
+            removed += len(animation.nodes) - len(nodes)
+            animation.nodes = nodes
+            mark_dirty(ean, [animation])
+    invalidate_node_index(ean)
+    return removed
+
+
+def mirror_animations(ean, selected, exclude_base=False, settings=None):
+    animations = get_animations(ean, selected)
+    table = get_mirror_table(ean.skeleton, settings)
+
+    # Check every node has a partner bone before changing anything
+    for animation in animations:
+        for node in animation.nodes:
+            if not table.can_mirror(node.bone_name):
+                return False
+
+    mirror_nodes(ean, animations, table, exclude_base)
+    return True
+
+
+def mirror_nodes(ean, animations, table, exclude_base=False):
+    mark_dirty(ean, animations)
+    for animation in animations:
+        for node in animation.nodes:
+            node.bone_name = table.partners[node.bone_name]
+            if exclude_base and node.bone_name == 'b_C_Base':
+                continue
+            for keyframed_animation in node.keyframed_animations:
+                if keyframed_animation.flag == POSITION_FLAG:
+                    track = get_track(ean, keyframed_animation)
+                    track.values[:, 1 + table.axis] *= -1.0
+                    track.dirty = True
+                elif keyframed_animation.flag == ORIENTATION_FLAG:
+                    track = get_track(ean, keyframed_animation)
+                    track.values[:] = quaternion.mirror(track.values, table.axis)
+                    track.dirty = True
+    animations_changed(ean, animations)
+
+
+def reverse_animations(ean, selected):
+    animations = get_animations(ean, selected)
+    mark_dirty(ean, animations)
+    for animation in animations:
+        for node in animation.nodes:
+            for keyframed_animation in node.keyframed_animations:
+                track = get_track(ean, keyframed_animation)
+                if not len(track):
+                    continue
+                # In case we run into some keyframes created by old programs
+                reverse_track(track, track.frames[-1])
+
+
+def reverse_track(track, last_frame):
+    track.set(last_frame - track.frames[::-1], track.values[::-1])
@@ -1,22 +1,14 @@
-import pickle
-
 import wx
 from wx.lib.dialogs import MultiMessageDialog
 from pubsub import pub
-from pyquaternion import Quaternion
-
-from pyxenoverse.ean.animation import Animation
-from pyxenoverse.ean.keyframed_animation import KeyframedAnimation
-from pyxenoverse.ean.keyframe import Keyframe
 
-from yaean.dlg.remove_keyframes import RemoveKeyframesDialog
-from yaean.dlg.trim_anim import TrimAnimDialog
-from yaean.dlg.transform import TransformDialog
-from pyxenoverse.gui.file_drop_target import FileDropTarget
-from yaean.helpers import (
-    enable_selected, get_selected_items, get_unique_name, rename, euler_to_quaternion,
-    POSITION_FLAG, ORIENTATION_FLAG, SCALE_FLAG, TARGET_CAMERA_POSITION_FLAG
-)
+from yaean.anim_list import AnimListCtrl
+from yaean.constants import POSITION_FLAG, ORIENTATION_FLAG, SCALE_FLAG, TARGET_CAMERA_POSITION_FLAG
+from yaean.file_drop_target import FileDropTarget
+from yaean.helpers import enable_selected, get_selected_items, get_unique_name, rename
+from yaean.instrument import operation, touch
+from yaean.journal import AnimationDelta, AnimationListDelta, MirrorDelta, ReverseDelta, SkeletonDelta
+from yaean.node_index import animations_changed, animations_removed
 
 
 class AnimMainPanel(wx.Panel):
@@ -39,10 +31,7 @@ class AnimMainPanel(wx.Panel):
         self.edit = wx.Button(self, wx.ID_EDIT, "Edit")
 
         # AnimList
-        self.anim_list = wx.ListCtrl(self, style=wx.LC_REPORT)
-        self.anim_list.InsertColumn(0, "#", width=30)
-        self.anim_list.InsertColumn(1, "Animation", width=200)
-        self.anim_list.InsertColumn(2, "Frames", width=50)
+        self.anim_list = AnimListCtrl(self)
         self.anim_list.SetDropTarget(FileDropTarget(self, "load_main_file"))
         self.anim_list.Bind(wx.EVT_LIST_ITEM_RIGHT_CLICK, self.on_right_click)
 
@@ -63,6 +52,7 @@ class AnimMainPanel(wx.Panel):
         self.mirror_anim_id = wx.NewId()
         self.reverse_anim_id = wx.NewId()
         self.remove_keyframes_id = wx.NewId()
+        self.reduce_keyframes_id = wx.NewId()
         self.target_camera_offset_id = wx.NewId()
         self.Bind(wx.EVT_MENU, self.on_open, id=wx.ID_OPEN)
         self.Bind(wx.EVT_MENU, self.on_save, id=wx.ID_SAVE)
@@ -80,6 +70,7 @@ class AnimMainPanel(wx.Panel):
         self.Bind(wx.EVT_MENU, self.on_mirror_anim, id=self.mirror_anim_id)
         self.Bind(wx.EVT_MENU, self.on_reverse_anim, id=self.reverse_anim_id)
         self.Bind(wx.EVT_MENU, self.on_remove_keyframes, id=self.remove_keyframes_id)
+        self.Bind(wx.EVT_MENU, self.on_reduce_keyframes, id=self.reduce_keyframes_id)
         self.Bind(wx.EVT_MENU, self.on_set_target_camera_offset, id=self.target_camera_offset_id)
         accelerator_table = wx.AcceleratorTable([
             (wx.ACCEL_CTRL, ord('a'), wx.ID_SELECTALL),
@@ -115,7 +106,7 @@ class AnimMainPanel(wx.Panel):
         pub.sendMessage('save_ean')
 
     def copy_animation(self, copied_animations):
-        self.copied_animations = pickle.dumps(copied_animations)
+        self.copied_animations = copied_animations
 
     def select_all(self, _):
         for i in range(self.anim_list.GetItemCount()):
@@ -160,6 +151,9 @@ class AnimMainPanel(wx.Panel):
         remove_keyframes = menu.Append(self.remove_keyframes_id,
                                        "Remove &Keyframes", " Removes keyframe data of bones from an animation")
         enable_selected(remove_keyframes, selected)
+        reduce_keyframes = menu.Append(self.reduce_keyframes_id, "Red&uce Keyframes",
+                                       " Removes keyframes that interpolation already reproduces within a tolerance")
+        enable_selected(reduce_keyframes, selected)
         menu.AppendSeparator()
         target_camera_offset = menu.Append(self.target_camera_offset_id, "Set Target &Camera Offset",
                                            " Change offset of target camera (for cam.ean files)")
@@ -168,24 +162,36 @@ class AnimMainPanel(wx.Panel):
         self.PopupMenu(menu)
         menu.Destroy()
 
-    def reindex(self):
-        for i in range(self.anim_list.GetItemCount()):
-            self.anim_list.SetItem(i, 0, str(i))
+    def record(self, label, selected, bone_names=None, flags=None, delta_type=None):
+        """Records the selected animations before an edit of the given bones and keyframe types.
+
+        delta_type(ean, animations) makes the delta instead, for edits that can be undone
+        without keeping keyframes.
+        """
+        from yaean import operations
+        ean = self.root.main['ean']
+        animations = operations.get_animations(ean, selected)
+        if delta_type is None:
+            delta = AnimationDelta(ean, animations, bone_names, flags)
+        else:
+            delta = delta_type(ean, animations)
+        self.root.journal.record(label, delta)
+        touch(animations, ean=ean)
 
     def get_bones(self):
-        bones = []
-        bone_list = self.root.main['ean_bone_list']
-        item = bone_list.GetFirstItem()
-        while item.IsOk():
-            bones.append(bone_list.GetItemText(item))
-            item = bone_list.GetNextItem(item)
-        return bones
+        tree = self.root.main['ean_bone_panel'].tree
+        return [tree.label(i) for i in range(len(tree.bones))]
+
+    def get_bone_names(self, bone_index):
+        bones = self.root.main['ean'].skeleton.bones
+        return {bones[bone_index].name} if 0 <= bone_index < len(bones) else set()
 
     def add_animation(self, append):
+        from pyxenoverse.ean.animation import Animation
         selected = list(get_selected_items(self.anim_list))
         if not selected or not self.copied_animations:
             return
-        copied_animations = pickle.loads(self.copied_animations)
+        copied_animations = self.copied_animations
 
         for i in selected:
             self.anim_list.Select(i, 0)
@@ -194,18 +200,22 @@ class AnimMainPanel(wx.Panel):
         if append:
             index = selected[-1] + 1
 
-        names = [animation.name for animation in self.root.main['ean'].animations]
-        for i, copied_animation in enumerate(copied_animations):
-            dst_index = index + i
-            animation = Animation(self.root.main['ean'])
-            animation.paste(copied_animation)
-            animation = get_unique_name(animation, names)
-            self.root.main['ean'].animations.insert(dst_index, animation)
-            self.anim_list.InsertItem(dst_index, str(dst_index))
-            self.anim_list.SetItem(dst_index, 1, animation.name)
-            self.anim_list.SetItem(dst_index, 2, str(animation.frame_count))
-            self.anim_list.Select(dst_index)
-        self.reindex()
+        with operation("Add animations"):
+            self.root.journal.record("Add animations", AnimationListDelta(self.root.main['ean']))
+            names = [animation.name for animation in self.root.main['ean'].animations]
+            added = []
+            for i, copied_animation in enumerate(copied_animations):
+                dst_index = index + i
+                animation = Animation(self.root.main['ean'])
+                animation.paste(copied_animation)
+                animation = get_unique_name(animation, names)
+                self.root.main['ean'].animations.insert(dst_index, animation)
+                added.append(animation)
+            animations_changed(self.root.main['ean'], added)
+            touch(added, ean=self.root.main['ean'])
+            self.anim_list.refresh()
+            for i in range(len(copied_animations)):
+                self.anim_list.Select(index + i)
         self.root.SetStatusText("Added {} animation(s)".format(len(copied_animations)))
 
     def on_append(self, _):
@@ -219,18 +229,25 @@ class AnimMainPanel(wx.Panel):
         if not selected:
             return
         self.root.SetStatusText("Deleting...")
-        for i in reversed(selected):
-            self.root.main['ean'].remove_animation(i)
-            self.anim_list.DeleteItem(i)
-        self.reindex()
+        with operation("Delete animations"):
+            self.root.journal.record("Delete animations", AnimationListDelta(self.root.main['ean']))
+            animations_removed(self.root.main['ean'], [self.root.main['ean'].animations[i] for i in selected])
+            for i in reversed(selected):
+                self.root.main['ean'].remove_animation(i)
+                self.anim_list.Select(i, 0)
+            self.anim_list.refresh()
         self.root.SetStatusText("Deleted {} animation(s)".format(len(selected)))
 
     def on_paste(self, _):
+        from pyxenoverse.ean.animation import Animation
+        from yaean import operations
+        from yaean.remap import get_remap_table, skeleton_names
+        from yaean.tracks import sync_tracks
         selected = list(get_selected_items(self.anim_list))
         if not self.copied_animations or not selected:
             return
-        copied_animations = pickle.loads(self.copied_animations)
-        bone_list = self.root.main['ean_bone_list']
+        copied_animations = self.copied_animations
+        tree = self.root.main['ean_bone_panel'].tree
 
         # Expand/truncate selection
         selected = selected[:len(copied_animations)]
@@ -238,15 +255,13 @@ class AnimMainPanel(wx.Panel):
         if difference:
             last_index = selected[-1]
             selected.extend(list(range(last_index+1, last_index + difference + 1)))
-        for i in range(self.anim_list.GetItemCount()):
-            self.anim_list.Select(i, i in selected)
+        for i in list(get_selected_items(self.anim_list)):
+            self.anim_list.Select(i, 0)
+        for i in selected:
+            if i < self.anim_list.GetItemCount():
+                self.anim_list.Select(i)
 
-        bone_filters = set()
-        item = bone_list.GetFirstItem()
-        while item.IsOk():
-            if bone_list.GetCheckedState(item) != wx.CHK_UNCHECKED:
-                bone_filters.add(bone_list.GetItemData(item).name)
-            item = bone_list.GetNextItem(item)
+        bone_filters = {tree.bones[i].name for i in tree.checked()}
 
         # Warn if multiple animations are being copied
         if len(copied_animations) > 1:
@@ -263,29 +278,47 @@ class AnimMainPanel(wx.Panel):
                 if dlg.ShowModal() != wx.ID_YES:
                     return
 
-        skipped_nodes = set()
-
-        # Add missing bones
-        bone_filters.update(self.root.main['ean_bone_panel'].add_missing_bones())
-
-        # Do the copying
-        names = [animation.name for animation in self.root.main['ean'].animations]
-        for i, copied_animation in enumerate(copied_animations):
-            dst_index = selected[i]
-            if dst_index < len(self.root.main['ean'].animations):
-                animation = self.root.main['ean'].animations[dst_index]
-                skipped_nodes.update(animation.paste(copied_animation, bone_filters, True))
-            else:
-                animation = Animation(self.root.main['ean'])
-                animation.frame_float_size = copied_animation.frame_float_size
-                skipped_nodes.update(animation.paste(copied_animation))
-                animation = get_unique_name(animation, names)
-                self.root.main['ean'].animations.append(animation)
-                self.anim_list.InsertItem(dst_index, str(dst_index))
-                self.anim_list.SetItem(dst_index, 1, animation.name)
-            self.anim_list.SetItem(dst_index, 2, str(animation.frame_count))
-            self.anim_list.Select(dst_index)
-        self.reindex()
+        with operation("Paste animations", copied=len(copied_animations)):
+            skipped_nodes = set()
+            ean = self.root.main['ean']
+            self.root.journal.record(
+                "Paste animations", SkeletonDelta(ean.skeleton), AnimationListDelta(ean),
+                AnimationDelta(ean, [ean.animations[i] for i in selected if i < len(ean.animations)]))
+
+            # Add missing bones
+            bone_filters.update(self.root.main['ean_bone_panel'].add_missing_bones())
+
+            # Bone names are resolved once for the whole paste, and again only if either
+            # skeleton or the filter changes
+            destination = skeleton_names(ean.skeleton)
+            filtered_table = get_remap_table(copied_animations.bone_names, destination, frozenset(bone_filters))
+            full_table = get_remap_table(copied_animations.bone_names, destination)
+
+            # Do the copying
+            sync_tracks(ean)
+            names = [animation.name for animation in ean.animations]
+            targets, pasted = [], []
+            for i, copied_animation in enumerate(copied_animations):
+                dst_index = selected[i]
+                if dst_index < len(ean.animations):
+                    animation = ean.animations[dst_index]
+                    remapped, skipped = copied_animation.remapped(filtered_table)
+                    targets.append((animation, remapped, filtered_table.bone_filters))
+                else:
+                    remapped, skipped = copied_animation.remapped(full_table)
+                    animation = Animation(ean)
+                    animation.frame_float_size = copied_animation.frame_float_size
+                    animation.paste(remapped)
+                    animation = get_unique_name(animation, names)
+                    ean.animations.append(animation)
+                skipped_nodes.update(skipped)
+                pasted.append(animation)
+            operations.paste_animations(ean, targets)
+            animations_changed(ean, pasted)
+            touch(pasted, ean=ean)
+            self.anim_list.refresh()
+            for i in selected:
+                self.anim_list.Select(i)
         pasted_msg = "Pasted {} animation(s)".format(len(copied_animations))
         self.root.SetStatusText(pasted_msg)
 
@@ -298,16 +331,20 @@ class AnimMainPanel(wx.Panel):
 
     def on_rename(self, _):
         def rename_func(item, animation, old_name, new_name):
-            self.anim_list.SetItem(item, 1, new_name)
+            self.anim_list.RefreshItem(item)
 
         selected = list(get_selected_items(self.anim_list))
         if not selected:
             return
         animations = [self.root.main['ean'].animations[i] for i in selected]
         names = [animation.name for animation in self.root.main['ean'].animations]
+        delta = AnimationListDelta(self.root.main['ean'])
         rename(self.root, 'animations', animations, names, selected, rename_func)
+        if any(animation.name != name for animation, name in delta.animations):
+            self.root.journal.record("Rename animations", delta)
 
     def on_set_duration(self, _):
+        from yaean import operations
         selected = list(get_selected_items(self.anim_list))
         if not selected:
             return
@@ -318,9 +355,10 @@ class AnimMainPanel(wx.Panel):
             dlg.SetValue(str(old_duration))
             if dlg.ShowModal() == wx.ID_OK:
                 new_duration = int(dlg.GetValue())
-                for i, animation in enumerate(animations):
-                    animation.set_duration(target_duration=new_duration)
-                    self.anim_list.SetItem(selected[i], 2, str(new_duration))
+                with operation("Set duration"):
+                    self.record("Set duration", selected)
+                    operations.set_duration(self.root.main['ean'], selected, new_duration)
+                    self.anim_list.refresh()
                 if len(animations) > 1:
                     self.root.SetStatusText("Set duration for {} animations to {} ({:.2f}s)".format(
                         len(animations), new_duration, new_duration / 60.0))
@@ -328,208 +366,174 @@ class AnimMainPanel(wx.Panel):
                     self.root.SetStatusText("Set {} duration to {} ({:.2f}s)".format(
                         animations[0].name, new_duration, new_duration / 60.0))
 
-    def transform(self, selected, bone_index, flag, found_func, w, x, y, z):
-        animations = [self.root.main['ean'].animations[i] for i in selected]
-        msg = ''
-        animations_changed = len(selected)
-        for animation in animations:
-            for node in animation.nodes:
-                if node.bone_index == bone_index:
-                    for keyframed_animation in node.keyframed_animations:
-                        if keyframed_animation.flag == flag:
-                            for keyframe in keyframed_animation.keyframes:
-                                found_func(keyframe, w, x, y, z)
-                            break
-                    else:
-                        keyframed_animation = KeyframedAnimation()
-                        keyframed_animation.flag = flag
-                        keyframed_animation.keyframes.append(Keyframe(0, w, x, y, z))
-                        keyframed_animation.keyframes.append(Keyframe(animation.frame_count - 1, w, x, y, z))
-                        node.keyframed_animations.append(keyframed_animation)
-                    break
-            else:
-                msg += ' * {}\n'.format(animation.name)
-                animations_changed -= 1
-        if msg:
+    def show_skipped(self, skipped, selected):
+        if skipped:
+            msg = ''.join(' * {}\n'.format(name) for name in skipped)
             with MultiMessageDialog(self, 'Skipped animations:', "Warning", msg, wx.OK) as dlg:
                 dlg.ShowModal()
         self.root.SetStatusText("Edited {} animation(s)".format(len(selected)))
 
     def on_set_offset(self, _):
-        def offset_func(keyframe, _, x, y, z):
-            keyframe.x += x
-            keyframe.y += y
-            keyframe.z += z
+        from yaean import operations
+        from yaean.dlg.transform import TransformDialog
         selected = list(get_selected_items(self.anim_list))
         if not selected:
             return
         with TransformDialog(self, 'Offset', selected, self.get_bones()) as dlg:
             if dlg.ShowModal() == wx.ID_OK:
-                self.transform(selected, dlg.GetBoneIndex(), POSITION_FLAG, offset_func, 1, *dlg.GetValues())
+                with operation("Set offset"):
+                    self.record("Set offset", selected, self.get_bone_names(dlg.GetBoneIndex()), {POSITION_FLAG})
+                    skipped = operations.set_offset(
+                        self.root.main['ean'], selected, dlg.GetBoneIndex(), *dlg.GetValues())
+                self.show_skipped(skipped, selected)
 
     def on_set_scale(self, _):
-        def scale_func(keyframe, _, x, y, z):
-            keyframe.x += x
-            keyframe.y += y
-            keyframe.z += z
+        from yaean import operations
+        from yaean.dlg.transform import TransformDialog
         selected = list(get_selected_items(self.anim_list))
         if not selected:
             return
         with TransformDialog(self, 'Scale', selected, self.get_bones()) as dlg:
             if dlg.ShowModal() == wx.ID_OK:
-                self.transform(selected, dlg.GetBoneIndex(), SCALE_FLAG, scale_func, 1, *dlg.GetValues())
+                with operation("Set scale"):
+                    self.record("Set scale", selected, self.get_bone_names(dlg.GetBoneIndex()), {SCALE_FLAG})
+                    skipped = operations.set_scale(
+                        self.root.main['ean'], selected, dlg.GetBoneIndex(), *dlg.GetValues())
+                self.show_skipped(skipped, selected)
 
     def on_set_rotation(self, _):
-        def rotate_func(keyframe, w, x, y, z):
-            rq = Quaternion(w, x, y, z)
-            kq = Quaternion(keyframe.w, keyframe.x, keyframe.y, keyframe.z)
-            keyframe.w, keyframe.x, keyframe.y, keyframe.z = kq * rq
+        from yaean import operations
+        from yaean.dlg.transform import TransformDialog
         selected = list(get_selected_items(self.anim_list))
         if not selected:
             return
         with TransformDialog(self, 'Rotation', selected, self.get_bones()) as dlg:
             if dlg.ShowModal() == wx.ID_OK:
-                self.transform(
-                    selected, dlg.GetBoneIndex(), ORIENTATION_FLAG, rotate_func, *euler_to_quaternion(*dlg.GetValues()))
+                with operation("Set rotation"):
+                    self.record("Set rotation", selected, self.get_bone_names(dlg.GetBoneIndex()),
+                                {ORIENTATION_FLAG})
+                    skipped = operations.set_rotation(
+                        self.root.main['ean'], selected, dlg.GetBoneIndex(), *dlg.GetValues())
+                self.show_skipped(skipped, selected)
 
     def on_set_target_camera_offset(self, _):
+        from yaean import operations
+        from yaean.dlg.transform import TransformDialog
         selected = list(get_selected_items(self.anim_list))
         if not selected:
             return
         with TransformDialog(self, 'Target Camera Offset', selected, None) as dlg:
             if dlg.ShowModal() == wx.ID_OK:
-                offset_x, offset_y, offset_z = dlg.GetValues()
-                animations = [self.root.main['ean'].animations[i] for i in selected]
-                changed = 0
-                for animation in animations:
-                    for node in animation.nodes:
-                        for keyframed_animation in node.keyframed_animations:
-                            if keyframed_animation.flag != TARGET_CAMERA_POSITION_FLAG:
-                                continue
-                            changed += 1
-                            for keyframe in keyframed_animation.keyframes:
-                                keyframe.x = keyframe.x + offset_x
-                                keyframe.y = keyframe.y + offset_y
-                                keyframe.z = keyframe.z + offset_z
+                with operation("Set target camera offset"):
+                    self.record("Set target camera offset", selected, flags={TARGET_CAMERA_POSITION_FLAG})
+                    changed = operations.set_target_camera_offset(self.root.main['ean'], selected, *dlg.GetValues())
                 self.root.SetStatusText("Edited {} Target Camera Position".format(changed))
 
     def on_remove_keyframes(self, _):
+        from yaean import operations
+        from yaean.dlg.remove_keyframes import RemoveKeyframesDialog
         selected = list(get_selected_items(self.anim_list))
         if not selected:
             return
         frame_count = None
         if len(selected) == 1:
-            frame_count = int(self.anim_list.GetItem(selected[0], 2).GetText())
+            frame_count = self.root.main['ean'].animations[selected[0]].frame_count
         with RemoveKeyframesDialog(self, frame_count) as dlg:
             if dlg.ShowModal() == wx.ID_OK:
-                flags, start_frame, end_frame = dlg.GetValues()
-                animations = [self.root.main['ean'].animations[i] for i in selected]
-                bone_filters = []
-                item = self.root.main['ean_bone_list'].GetFirstItem()
-                while item.IsOk():
-                    if self.root.main['ean_bone_list'].GetCheckedState(item) != wx.CHK_UNCHECKED:
-                        bone_filters.append(self.root.main['ean_bone_list'].GetItemData(item).index)
-                    item = self.root.main['ean_bone_list'].GetNextItem(item)
-
-                removed_keyframed_animations = 0
-                for animation in animations:
-                    for node in animation.nodes:
-                        if node.bone_index not in bone_filters:
-                            continue
-                        keyframed_animations = []
-                        for keyframed_animation in node.keyframed_animations:
-                            if keyframed_animation.flag not in flags:
-                                keyframed_animations.append(keyframed_animation)
-                            else:
-                                if not frame_count or (start_frame == 0 and end_frame == frame_count):
-                                    removed_keyframed_animations += 1
-                                else:
-                                    new_keyframes = []
-                                    for keyframe in keyframed_animation.keyframes:
-                                        if keyframe.frame < start_frame or keyframe.frame >= end_frame:
-                                            new_keyframes.append(keyframe)
-                                    keyframed_animation.keyframes = new_keyframes
-                                    keyframed_animations.append(keyframed_animation)
-
-                        node.keyframed_animations = keyframed_animations
-
-                self.root.SetStatusText("Removed {} keyframed animation(s) from {} animation(s)".format(
-                    removed_keyframed_animations, len(animations)))
+                flags, ranges = dlg.GetValues()
+                bone_filters = self.root.main['ean_bone_panel'].tree.checked()
+                with operation("Remove keyframes"):
+                    self.record("Remove keyframes", selected,
+                                operations.filter_names(self.root.main['ean'], bone_filters), set(flags))
+                    removed_keyframed_animations, removed_keyframes = operations.remove_keyframes(
+                        self.root.main['ean'], selected, bone_filters, flags, {i: ranges for i in selected})
+                self.root.SetStatusText(
+                    "Removed {} keyframed animation(s) and {} keyframe(s) from {} animation(s)".format(
+                        removed_keyframed_animations, removed_keyframes, len(selected)))
+
+    def on_reduce_keyframes(self, _):
+        from yaean import operations
+        from yaean.clipboard import format_size
+        from yaean.dlg.reduce_keyframes import ReduceKeyframesDialog
+        selected = list(get_selected_items(self.anim_list))
+        if not selected:
+            return
+        with ReduceKeyframesDialog(self, self.root.settings.get('reduce_keyframes')) as dlg:
+            if dlg.ShowModal() != wx.ID_OK:
+                return
+            position, orientation, scale = dlg.GetValues()
+        bone_filters = self.root.main['ean_bone_panel'].tree.checked()
+        with operation("Reduce keyframes"):
+            self.record("Reduce keyframes", selected, operations.filter_names(self.root.main['ean'], bone_filters))
+            results = operations.reduce_keyframes(
+                self.root.main['ean'], selected, bone_filters, position, orientation, scale)
+        removed = sum(count for _, count, _ in results)
+        saved = sum(size for _, _, size in results)
+        msg = ''.join(' * {}: {} keyframe(s), {}\n'.format(name, count, format_size(size))
+                      for name, count, size in results if count)
+        if msg:
+            with MultiMessageDialog(self, 'Keyframes removed per animation:', "Reduce Keyframes", msg, wx.OK) as dlg:
+                dlg.ShowModal()
+        self.root.SetStatusText("Removed {} keyframe(s) from {} animation(s), saving about {}".format(
+            removed, len(selected), format_size(saved)))
 
     def on_trim_anim(self, _):
+        from yaean import operations
+        from yaean.dlg.trim_anim import TrimAnimDialog
         selected = list(get_selected_items(self.anim_list))
         if not selected:
             return
         self.anim_list.Select(selected[0])
-        frame_count = int(self.anim_list.GetItem(selected[0], 2).GetText())
         animation = self.root.main['ean'].animations[selected[0]]
+        frame_count = animation.frame_count
         with TrimAnimDialog(self, frame_count, selected[0]) as dlg:
             if dlg.ShowModal() == wx.ID_OK:
                 start_frame, end_frame = dlg.GetValues()
-                animation.set_duration(start_frame=start_frame, end_frame=end_frame)
-                self.anim_list.SetItem(selected[0], 2, str(animation.frame_count))
+                with operation("Trim animation"):
+                    self.record("Trim animation", selected[:1])
+                    operations.trim_animation(self.root.main['ean'], selected[0], start_frame, end_frame)
+                    self.anim_list.RefreshItem(selected[0])
                 self.root.SetStatusText("Changed animation to start from frame {} and end on frame {}".format(
                     start_frame, end_frame))
 
     def on_mirror_anim(self, _):
+        from yaean import operations
+        from yaean.mirror import get_mirror_table
         selected = list(get_selected_items(self.anim_list))
         if not selected:
             return
-        animations = [self.root.main['ean'].animations[i] for i in selected]
-        animations_changed = len(animations)
+        animations_changed = len(selected)
 
         exclude_base = False
         with wx.MessageDialog(self, 'Exclude b_C_Base?', 'Mirror Animation', wx.YES | wx.NO) as dlg:
             if dlg.ShowModal() == wx.ID_YES:
                 exclude_base = True
 
-        # Swap left and right
-        for animation in animations:
-            for node in animation.nodes:
-                bone_name_parts = node.bone_name.split('_')
-
-                # Swap left and right animations first
-                if bone_name_parts[1] == 'R':
-                    bone_name_parts[1] = 'L'
-                    node.bone_name = '_'.join(bone_name_parts)
-                elif bone_name_parts[1] == 'L':
-                    bone_name_parts[1] = 'R'
-                    node.bone_name = '_'.join(bone_name_parts)
-                if node.bone_index == -1:
-                    with wx.MessageDialog(self, "Cannot mirror. Couldn't find matching L/R bones", "Error") as dlg:
-                        dlg.ShowModal()
-                    return
-
-        # Then we can go and do the math
-        for animation in animations:
-            for node in animation.nodes:
-                if exclude_base and node.bone_name == 'b_C_Base':
-                    continue
-                for keyframed_animation in node.keyframed_animations:
-                    if keyframed_animation.flag == POSITION_FLAG:
-                        for keyframe in keyframed_animation.keyframes:
-                            keyframe.x *= -1.0
-                    elif keyframed_animation.flag == ORIENTATION_FLAG:
-                        for keyframe in keyframed_animation.keyframes:
-                            keyframe.y *= -1.0
-                            keyframe.z *= -1.0
+        with operation("Mirror animations"):
+            table = get_mirror_table(self.root.main['ean'].skeleton)
+            if table.reversible(exclude_base):
+                self.record("Mirror animations", selected,
+                            delta_type=lambda ean, animations: MirrorDelta(ean, animations, table, exclude_base))
+            else:
+                self.record("Mirror animations", selected, flags={POSITION_FLAG, ORIENTATION_FLAG})
+            mirrored = operations.mirror_animations(self.root.main['ean'], selected, exclude_base)
+        if not mirrored:
+            # Nothing was changed, so there's nothing to restore
+            self.root.journal.discard()
+            with wx.MessageDialog(self, "Cannot mirror. Couldn't find matching L/R bones", "Error") as dlg:
+                dlg.ShowModal()
+            return
 
         self.root.SetStatusText(f"Mirrored {animations_changed} animations")
 
     def on_reverse_anim(self, _):
+        from yaean import operations
         selected = list(get_selected_items(self.anim_list))
         if not selected:
             return
-        animations = [self.root.main['ean'].animations[i] for i in selected]
-        animations_changed = len(animations)
-
-        for animation in animations:
-            for node in animation.nodes:
-                for keyframed_animation in node.keyframed_animations:
-                    # In case we run into some keyframes created by old programs
-                    last_frame = keyframed_animation.keyframes[-1].frame
-                    keyframed_animation.keyframes.reverse()
-                    for keyframe in keyframed_animation.keyframes:
-                        keyframe.frame = last_frame - keyframe.frame
+        animations_changed = len(selected)
+        with operation("Reverse animations"):
+            self.record("Reverse animations", selected, delta_type=ReverseDelta)
+            operations.reverse_animations(self.root.main['ean'], selected)
 
         self.root.SetStatusText(f"Reversed {animations_changed} animations")
@@ -1,8 +1,9 @@
 import wx
 from pubsub import pub
 
-from yaean.helpers import get_selected_items, CHECK
-from pyxenoverse.gui.file_drop_target import FileDropTarget
+from yaean.anim_list import AnimListCtrl
+from yaean.helpers import get_selected_items
+from yaean.file_drop_target import FileDropTarget
 
 
 class AnimSidePanel(wx.Panel):
@@ -21,11 +22,7 @@ class AnimSidePanel(wx.Panel):
         self.copy.Disable()
 
         # Anim List
-        self.anim_list = wx.ListCtrl(self, style=wx.LC_REPORT)
-        self.anim_list.InsertColumn(0, "#", width=30)
-        self.anim_list.InsertColumn(1, "Animation", width=200)
-        self.anim_list.InsertColumn(2, "Frames", width=50)
-        self.anim_list.InsertColumn(3, "Copied", width=60)
+        self.anim_list = AnimListCtrl(self, copied_column=True)
         self.anim_list.Bind(wx.EVT_LIST_ITEM_RIGHT_CLICK, self.on_right_click)
         self.anim_list.Bind(wx.EVT_LIST_ITEM_SELECTED, self.on_select)
         self.anim_list.Bind(wx.EVT_LIST_ITEM_DESELECTED, self.on_select)
@@ -83,14 +80,14 @@ class AnimSidePanel(wx.Panel):
         pub.sendMessage('open_side_file')
 
     def on_copy(self, _):
+        from yaean.clipboard import AnimationClipboard, format_size
         selected = list(get_selected_items(self.anim_list))
         if not selected:
             return
-        copied_animations = [self.root.side['ean'].animations[i] for i in selected]
-        for i in range(self.anim_list.GetItemCount()):
-            if i in selected:
-                self.anim_list.SetItem(i, 3, CHECK)
-            else:
-                self.anim_list.SetItem(i, 3, '')
+        ean = self.root.side['ean']
+        copied_animations = AnimationClipboard((ean.animations[i] for i in selected), ean.skeleton)
+        self.anim_list.copied = set(selected)
+        self.anim_list.Refresh()
         pub.sendMessage('copy_animation', copied_animations=copied_animations)
-        self.root.SetStatusText("Copied {} animation(s)".format(len(copied_animations)))
+        self.root.SetStatusText("Copied {} animation(s) ({} on clipboard)".format(
+            len(copied_animations), format_size(copied_animations.nbytes)))
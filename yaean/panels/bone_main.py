@@ -1,16 +1,18 @@
 from functools import partial
-import pickle
 
 import wx
 import wx.dataview
 from wx.lib.dialogs import MultiMessageDialog
 from pubsub import pub
 
-from pyxenoverse.esk.bone import Bone
-from yaean.helpers import FILTERS, enable_selected, get_unique_name, rename, get_bone_tree
-from yaean.dlg.add_bones import AddMissingBonesDialog
-from yaean.dlg.bone_info import BoneInfoDialog
-from pyxenoverse.gui.file_drop_target import FileDropTarget
+from yaean.bone_filters import get_filters
+from yaean.bone_tree import BoneTree
+from yaean.helpers import enable_selected, get_unique_name, rename
+from yaean.instrument import operation, touch, waiting
+from yaean.journal import AnimationDelta, SkeletonDelta
+from yaean.node_index import get_node_index, rename_nodes
+from yaean.save import mark_skeleton_dirty
+from yaean.file_drop_target import FileDropTarget
 
 
 class BoneMainPanel(wx.Panel):
@@ -44,6 +46,7 @@ class BoneMainPanel(wx.Panel):
         self.bone_list.Bind(wx.dataview.EVT_TREELIST_ITEM_CONTEXT_MENU, self.on_right_click)
         self.bone_list.Bind(wx.dataview.EVT_TREELIST_SELECTION_CHANGED, self.on_select)
         self.bone_list.SetDropTarget(FileDropTarget(self, "load_main_file"))
+        self.tree = BoneTree(self.bone_list)
 
         # Binds
         self.Bind(wx.EVT_BUTTON, self.on_open, id=wx.ID_OPEN)
@@ -87,63 +90,21 @@ class BoneMainPanel(wx.Panel):
         self.SetSizer(self.sizer)
         self.SetAutoLayout(1)
 
-    def check_parent(self, bone):
-        parent = self.bone_list.GetItemParent(bone)
-        while parent.IsOk():
-            if self.bone_list.GetCheckedState(parent) == wx.CHK_UNCHECKED:
-                return
-
-            if self.bone_list.AreAllChildrenInState(parent, wx.CHK_CHECKED):
-                self.bone_list.CheckItem(parent, wx.CHK_CHECKED)
-            else:
-                self.bone_list.CheckItem(parent, wx.CHK_UNDETERMINED)
-            parent = self.bone_list.GetItemParent(parent)
-
-    def get_bone_names_index(self, item):
-        current_bone_list = {}
-        while item.IsOk():
-            bone = self.bone_list.GetItemData(item)
-            current_bone_list[bone.name] = item
-            current_bone_list.update(self.get_bone_names_index(self.bone_list.GetFirstChild(item)))
-            item = self.bone_list.GetNextSibling(item)
-        return current_bone_list
-
     def enable_copy_bones(self, menu_item, selected, single=False):
         if not self.copied_bones:
             menu_item.Enable(False)
             return
         enable_selected(menu_item, selected, single)
 
-    def recalculate_bone_tree(self):
-        item = self.bone_list.GetFirstItem()
-
-        # Set index first
-        index = 0
-
-        while item.IsOk():
-            bone = self.bone_list.GetItemData(item)
-            bone.index = index
-            self.bone_list.SetItemText(item, "{}: {}".format(bone.index, bone.name))
-            item = self.bone_list.GetNextItem(item)
-            index += 1
-
-        # Set first pyxenoverse up first
-        item = self.bone_list.GetFirstItem()
-        bones = []
-        while item.IsOk():
-            root = self.bone_list.GetRootItem()
-            bone = self.bone_list.GetItemData(item)
-            parent = self.bone_list.GetItemParent(item)
-            child = self.bone_list.GetFirstChild(item)
-            sibling = self.bone_list.GetNextSibling(item)
-
-            bone.parent_index = self.bone_list.GetItemData(parent).index if parent != root else 65535
-            bone.child_index = self.bone_list.GetItemData(child).index if child.IsOk() else 65535
-            bone.sibling_index = self.bone_list.GetItemData(sibling).index if sibling.IsOk() else 65535
-
-            bones.append(bone)
+    def get_skeleton(self):
+        if self.filetype == 'EAN':
+            return self.root.main['ean'].skeleton
+        return self.root.main['esk']
 
-            item = self.bone_list.GetNextItem(item)
+    def recalculate_bone_tree(self):
+        mark_skeleton_dirty(self.get_skeleton())
+        self.tree.recalculate()
+        bones = self.tree.bones
 
         if self.filetype == 'EAN':
             old_length = len(self.root.main['ean'].skeleton.bones)
@@ -154,27 +115,39 @@ class BoneMainPanel(wx.Panel):
                 bone.calculate_transform_matrix_from_skinning_matrix(bones, True)
             self.root.main['esk'].bones = bones
 
+        self.tree.refresh()
         return old_length, len(bones)
 
     def on_checked(self, e):
-        bone = e.GetItem()
-        selection = self.bone_list.GetSelections()
+        item = e.GetItem()
+        bone = self.bone_list.GetItemData(item)
+        if bone is None:
+            return
+        self.tree.states[bone.index] = self.bone_list.GetCheckedState(item)
+        selection = self.tree.selected()
         new_state = wx.CHK_UNCHECKED
         if len(selection) > 1:
-            if e.GetOldCheckedState == wx.CHK_UNCHECKED or any(self.bone_list.GetCheckedState(s) == wx.CHK_UNCHECKED for s in selection if s != bone):
+            if e.GetOldCheckedState == wx.CHK_UNCHECKED or any(self.tree.states[s] == wx.CHK_UNCHECKED for s in selection if s != bone.index):
                 new_state = wx.CHK_CHECKED
             for s in selection:
-                self.bone_list.CheckItem(s, new_state)
+                self.tree.set_state(s, new_state)
 
-        if self.bone_list.GetCheckedState(bone) == wx.CHK_CHECKED and not self.bone_list.AreAllChildrenInState(bone, wx.CHK_CHECKED):
-            self.bone_list.CheckItem(bone, wx.CHK_UNDETERMINED)
+        if self.tree.states[bone.index] == wx.CHK_CHECKED and not self.tree.all_children_in_state(bone.index, wx.CHK_CHECKED):
+            self.tree.set_state(bone.index, wx.CHK_UNDETERMINED)
 
-        self.check_parent(bone)
+        self.tree.update_parents(bone.index)
 
     def add_missing_bones(self):
-        missing_bones = self.root.main['ean'].get_bone_difference(self.root.side['ean'])
+        from pyxenoverse.esk.bone import Bone
+        from yaean.dlg.add_bones import AddMissingBonesDialog
+        from yaean.skeleton_diff import get_skeleton_diff
+        side_skeleton = self.root.side['ean'].skeleton
+        side_bones = side_skeleton.bones
+        # Cached by the content of both skeletons, so pasting again between the same files
+        # doesn't compare them again
+        missing_bones = get_skeleton_diff(self.root.main['ean'].skeleton, side_skeleton).missing_bones(side_skeleton)
         if missing_bones:
-            with AddMissingBonesDialog(self, missing_bones) as dlg:
+            with AddMissingBonesDialog(self, missing_bones) as dlg, waiting():
                 if dlg.ShowModal() != wx.ID_OK:
                     return []
                 missing_bones = dlg.GetValues()
@@ -184,42 +157,28 @@ class BoneMainPanel(wx.Panel):
         # Add bones and add them to the pyxenoverse filter
         bone_indexes = [bone.index for bone in missing_bones]
 
-        # Get Parent bones
-        parent_bones = [bone for bone in missing_bones if bone.parent_index not in bone_indexes]
-
-        # Get Bones to copy
-        bone_map = {bone.parent_index: get_bone_tree(bone, self.root.side['ean'].skeleton) for bone in parent_bones}
-
-        # Get Root Tree Item
-        bone_list = self.root.main['ean_bone_list']
+        # Get parent bones in the current skeleton.  Parent indexes are into the side
+        # skeleton, so they are matched to this one by name
         temp_bone_list = {}
-        for index in bone_map:
-            if index == 0:
-                temp_bone_list[index] = bone_list.GetFirstItem()
-            else:
-                bone = self.root.main['ean'].skeleton.bones[index]
-                item = bone_list.GetFirstItem()
-                while item.IsOk():
-                    data = bone_list.GetItemData(item)
-                    if bone.name == data.name:
-                        temp_bone_list[index] = item
-                        break
-                    item = bone_list.GetNextItem(item)
-                else:
-                    temp_bone_list[index] = bone_list.GetFirstItem()
+        for bone in missing_bones:
+            index = bone.parent_index
+            if index in bone_indexes or index in temp_bone_list:
+                continue
+            temp_bone_list[index] = 0
+            if index != 0 and index < len(side_bones):
+                found = self.tree.find(side_bones[index].name)
+                if found is not None:
+                    temp_bone_list[index] = found
 
         # Copy Bones
         names = []
         for bone in missing_bones:
             new_bone = Bone()
             new_bone.paste(bone)
-            item = bone_list.AppendItem(temp_bone_list[bone.parent_index], '', data=new_bone)
-            bone_list.Expand(item)
-            bone_list.CheckItem(item)
-
-            temp_bone_list[bone.index] = item
+            temp_bone_list[bone.index] = self.tree.insert(new_bone, temp_bone_list[bone.parent_index])
             names.append(bone.name)
         self.recalculate_bone_tree()
+        touch(bones=len(names))
         return names
 
     def enable_selected(self, item, single=False):
@@ -238,14 +197,18 @@ class BoneMainPanel(wx.Panel):
             filter_menu = wx.Menu()
             add_filter_menu = wx.Menu()
             remove_filter_menu = wx.Menu()
-            for f in sorted(FILTERS):
+            intersect_filter_menu = wx.Menu()
+            for f in sorted(get_filters()):
                 add_bone_filter = add_filter_menu.Append(-1, f, " Select pyxenoverse filter")
                 self.Bind(wx.EVT_MENU, partial(self.on_add_filter, bone_filter=f), add_bone_filter)
                 remove_bone_filter = remove_filter_menu.Append(-1, f, " Select pyxenoverse filter")
                 self.Bind(wx.EVT_MENU, partial(self.on_remove_filter, bone_filter=f), remove_bone_filter)
+                intersect_bone_filter = intersect_filter_menu.Append(-1, f, " Select pyxenoverse filter")
+                self.Bind(wx.EVT_MENU, partial(self.on_intersect_filter, bone_filter=f), intersect_bone_filter)
 
             filter_menu.AppendSubMenu(add_filter_menu, "&Add")
             filter_menu.AppendSubMenu(remove_filter_menu, "&Remove")
+            filter_menu.AppendSubMenu(intersect_filter_menu, "&Keep Only")
             menu.AppendSubMenu(filter_menu, "&Filters")
             menu.Append(wx.ID_SELECTALL, "Select All\tCtrl+A", " Select all bones")
         delete = menu.Append(wx.ID_DELETE, "&Delete\tDelete", "Delete selected bones")
@@ -271,62 +234,64 @@ class BoneMainPanel(wx.Panel):
     def on_save(self, _):
         pub.sendMessage('save_' + self.filetype.lower())
 
+    def apply_filter(self, bone_filter, combine):
+        with operation("Apply bone filter", bone_filter=bone_filter, combine=combine):
+            masks = self.tree.filter_masks(get_filters())
+            self.tree.apply_mask(masks.get(bone_filter), combine)
+            touch(bones=len(self.tree.bones))
+
     def on_add_filter(self, _, bone_filter):
-        bone = self.bone_list.GetFirstItem()
-        while bone.IsOk():
-            if self.bone_list.GetItemData(bone).name in FILTERS[bone_filter]:
-                self.bone_list.CheckItem(bone, wx.CHK_CHECKED)
-            self.check_parent(bone)
-            bone = self.bone_list.GetNextItem(bone)
+        self.apply_filter(bone_filter, 'union')
 
     def on_remove_filter(self, _, bone_filter):
-        bone = self.bone_list.GetFirstItem()
-        while bone.IsOk():
-            if self.bone_list.GetItemData(bone).name in FILTERS[bone_filter]:
-                self.bone_list.CheckItem(bone, wx.CHK_UNCHECKED)
-            self.check_parent(bone)
-            bone = self.bone_list.GetNextItem(bone)
+        self.apply_filter(bone_filter, 'difference')
+
+    def on_intersect_filter(self, _, bone_filter):
+        self.apply_filter(bone_filter, 'intersection')
 
     def toggle_select_all(self, _):
         self.bone_list.SelectAll()
 
     def copy_bones(self, copied_bones):
-        self.copied_bones = pickle.dumps(copied_bones)
+        self.copied_bones = copied_bones
 
     def on_delete(self, _):
-        selected = self.bone_list.GetSelections()
+        from yaean.operations import remove_missing_nodes
+        selected = self.tree.selected()
         if not selected:
             return
-        bone = self.bone_list.GetFirstItem()
-        while bone.IsOk():
-            if bone in selected:
-                self.bone_list.DeleteItem(bone)
-                bone = self.bone_list.GetFirstItem()
-            else:
-                bone = self.bone_list.GetNextItem(bone)
-
-        old_len, new_len = self.recalculate_bone_tree()
-        if self.filetype == 'EAN':
-            self.root.main['ean'].clean_animations()
-
-        self.root.SetStatusText("Deleted {} bones total".format(old_len - new_len))
+        with operation("Delete bones"):
+            deltas = [SkeletonDelta(self.get_skeleton())]
+            if self.filetype == 'EAN':
+                ean = self.root.main['ean']
+                deltas.append(AnimationDelta(ean, ean.animations, bone_names=()))
+            self.root.journal.record("Delete bones", *deltas)
+            for index in selected:
+                self.tree.detach(index)
+
+            old_len, new_len = self.recalculate_bone_tree()
+            touch(bones=old_len - new_len)
+            msg = "Deleted {} bones total".format(old_len - new_len)
+            if self.filetype == 'EAN':
+                removed = remove_missing_nodes(self.root.main['ean'])
+                msg += ", removed {} animation node(s)".format(removed)
+
+        self.root.SetStatusText(msg)
 
     def on_paste(self, _):
-        selected = self.bone_list.GetSelections()
+        from pyxenoverse.esk.bone import Bone
+        selected = self.tree.selected()
         if not selected or not self.copied_bones:
             return
-        copied_bones = pickle.loads(self.copied_bones)
+        copied_bones = self.copied_bones.copy()
         if len(selected) > 1:
             with wx.MessageDialog(self, 'Only one pyxenoverse can be selected to paste over', 'Warning') as dlg:
                 dlg.ShowModal()
             return
         temp_bone_list = {}
         root = selected[-1]
-        root_bone = self.bone_list.GetItemData(root)
-        self.bone_list.UnselectAll()
-        all_bone_list = self.get_bone_names_index(self.bone_list.GetFirstItem())
-        current_bone_list = {root_bone.name: root}
-        current_bone_list.update(self.get_bone_names_index(self.bone_list.GetFirstChild(root)))
+        all_bone_list = self.tree.names
+        current_bone_list = {self.tree.bones[i].name: i for i in [root] + self.tree.descendants(root)}
         changed_bones = ''
         for bone in copied_bones:
             if bone.name in current_bone_list:
@@ -337,49 +302,63 @@ class BoneMainPanel(wx.Panel):
                 if dlg.ShowModal() != wx.ID_YES:
                     return
 
-        for bone in copied_bones:
-            new_bone = Bone()
-            new_bone.paste(bone)
-            if new_bone.name in current_bone_list:
-                item = current_bone_list[new_bone.name]
-                self.bone_list.SetItemData(item, new_bone)
-            else:
-                new_bone = get_unique_name(new_bone, all_bone_list)
-                if new_bone.parent_index in temp_bone_list:
-                    item = self.bone_list.AppendItem(temp_bone_list[new_bone.parent_index], '', data=new_bone)
+        with operation("Paste bones"):
+            self.root.journal.record("Paste bones", SkeletonDelta(self.get_skeleton()))
+            self.bone_list.UnselectAll()
+            pasted = []
+            for bone in copied_bones:
+                new_bone = Bone()
+                new_bone.paste(bone)
+                if new_bone.name in current_bone_list:
+                    index = current_bone_list[new_bone.name]
+                    self.tree.replace(index, new_bone)
+                    self.tree.states[index] = wx.CHK_CHECKED
                 else:
-                    item = self.bone_list.AppendItem(root, '', data=new_bone)
-            self.bone_list.Select(item)
-            self.bone_list.Expand(item)
-            self.bone_list.CheckItem(item)
-            temp_bone_list[new_bone.index] = item
-        self.recalculate_bone_tree()
+                    new_bone = get_unique_name(new_bone, all_bone_list)
+                    parent = temp_bone_list.get(new_bone.parent_index, root)
+                    index = self.tree.insert(new_bone, parent)
+                temp_bone_list[new_bone.index] = index
+                pasted.append(new_bone)
+            self.recalculate_bone_tree()
+            self.tree.select(bone.index for bone in pasted)
+            touch(bones=len(pasted))
         self.root.SetStatusText("Pasted {} bones".format(len(copied_bones)))
 
     def on_rename(self, _):
         def rename_func(item, bone, old_name, new_name):
-            self.bone_list.SetItemText(item, '{}: {}'.format(bone.index, bone.name))
+            mark_skeleton_dirty(self.get_skeleton())
+            self.tree.rename(bone.index, old_name, new_name)
             if self.filetype == 'EAN' and self.root.main['ean'] is not None:
-                for animation in self.root.main['ean'].animations:
-                    for node in animation.nodes:
-                        if node.bone_name == old_name:
-                            node.bone_name = new_name
+                rename_nodes(self.root.main['ean'], old_name, new_name)
 
-        selected = self.bone_list.GetSelections()
+        selected = [item for item in self.bone_list.GetSelections() if self.bone_list.GetItemData(item) is not None]
         if not selected:
             return
         bones = [self.bone_list.GetItemData(item) for item in selected]
-        names = self.get_bone_names_index(self.bone_list.GetFirstItem())
+        names = self.tree.names
+        deltas = [SkeletonDelta(self.get_skeleton())]
+        if self.filetype == 'EAN':
+            ean = self.root.main['ean']
+            node_index = get_node_index(ean)
+            animations = {id(animation): animation for bone in bones
+                          for animation, _ in node_index.get(bone.name).values()}
+            deltas.append(AnimationDelta(ean, animations.values(), bone_names=()))
         rename(self.root, 'bones', bones, names, selected, rename_func)
+        if any(bone.name != name for bone, name, _, _, _, _ in deltas[0].bones):
+            self.root.journal.record("Rename bones", *deltas)
 
     def on_info(self, _):
+        from yaean.dlg.bone_info import BoneInfoDialog
         selection = self.bone_list.GetSelections()
         if len(selection) != 1:
             with wx.MessageDialog(self, 'Only one pyxenoverse can be selected for this operation', 'Warning') as dlg:
                 dlg.ShowModal()
                 return
         bone = self.bone_list.GetItemData(selection[0])
+        delta = SkeletonDelta(self.get_skeleton(), changed=[bone])
         with BoneInfoDialog(
                 self.root, self.filetype, self.name.GetLabel(), bone, False) as dlg:
             if dlg.ShowModal() == wx.ID_OK:
-                self.recalculate_bone_tree()
+                with operation("Edit bone"):
+                    self.root.journal.record("Edit bone", delta)
+                    self.recalculate_bone_tree()
@@ -2,9 +2,9 @@ import wx
 import wx.dataview
 from pubsub import pub
 
-from yaean.dlg.bone_info import BoneInfoDialog
+from yaean.bone_tree import BoneTree
 from yaean.helpers import CHECK
-from pyxenoverse.gui.file_drop_target import FileDropTarget
+from yaean.file_drop_target import FileDropTarget
 
 
 class BoneSidePanel(wx.Panel):
@@ -38,6 +38,7 @@ class BoneSidePanel(wx.Panel):
         self.bone_list.Bind(wx.dataview.EVT_TREELIST_ITEM_CONTEXT_MENU, self.on_right_click)
         self.bone_list.Bind(wx.dataview.EVT_TREELIST_SELECTION_CHANGED, self.on_select)
         self.bone_list.SetDropTarget(FileDropTarget(self, "load_side_file"))
+        self.tree = BoneTree(self.bone_list)
 
         self.Bind(wx.EVT_BUTTON, self.on_open, id=wx.ID_OPEN)
         self.Bind(wx.EVT_BUTTON, self.on_copy, id=wx.ID_COPY)
@@ -78,38 +79,23 @@ class BoneSidePanel(wx.Panel):
         pub.sendMessage('open_side_file')
 
     def on_copy(self, _):
+        from yaean.clipboard import BoneClipboard, format_size
         self.on_select(None)
         self.root.side['ean_bone_panel'].deselect_all()
         self.root.side['esk_bone_panel'].deselect_all()
-        bone = self.bone_list.GetFirstItem()
-        copied_bones = []
-        while bone.IsOk():
-            if bone in self.selected:
-                self.bone_list.SetItemText(bone, 1, CHECK)
-                copied_bones.append(self.bone_list.GetItemData(bone))
-            bone = self.bone_list.GetNextItem(bone)
-
-        copied_bones.sort(key=lambda bone: bone.index)
+        self.tree.set_marked(self.selected, CHECK)
+        copied_bones = BoneClipboard(self.tree.bones[i] for i in sorted(self.selected))
         pub.sendMessage('copy_bones', copied_bones=copied_bones)
-        self.root.SetStatusText("Copied {} pyxenoverse(s)".format(len(copied_bones)))
-
-    def get_children(self, bone):
-        while bone.IsOk():
-            self.selected.append(bone)
-            self.get_children(self.bone_list.GetFirstChild(bone))
-            bone = self.bone_list.GetNextSibling(bone)
+        self.root.SetStatusText("Copied {} pyxenoverse(s) ({} on clipboard)".format(
+            len(copied_bones), format_size(copied_bones.nbytes)))
 
     def deselect_all(self):
-        bone = self.bone_list.GetFirstItem()
-        while bone.IsOk():
-            self.bone_list.SetItemText(bone, 1, '')
-            bone = self.bone_list.GetNextItem(bone)
+        self.tree.set_marked(())
 
     def on_select(self, _):
-        selection = self.bone_list.GetSelection()
-        self.selected = [selection]
-        if selection and self.check_box.GetValue():
-            self.get_children(self.bone_list.GetFirstChild(selection))
+        self.selected = self.tree.selected()[:1]
+        if self.selected and self.check_box.GetValue():
+            self.selected.extend(self.tree.descendants(self.selected[0]))
 
         if self.selected:
             self.copy.Enable()
@@ -119,6 +105,7 @@ class BoneSidePanel(wx.Panel):
             self.info.Disable()
 
     def on_info(self, _):
+        from yaean.dlg.bone_info import BoneInfoDialog
         selection = self.bone_list.GetSelections()
         if len(selection) != 1:
             with wx.MessageDialog(self, 'Only one pyxenoverse can be selected for this operation', 'Warning') as dlg:
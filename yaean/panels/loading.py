@@ -0,0 +1,45 @@
+import os
+
+import wx
+
+
+class LoadingPanel(wx.Panel):
+    def __init__(self, parent):
+        wx.Panel.__init__(self, parent)
+
+        self.label = wx.StaticText(self, -1, '')
+        self.gauge = wx.Gauge(self, range=100, size=(250, -1))
+        self.cancel = wx.Button(self, wx.ID_CANCEL, "Cancel")
+        self.jobs = []
+        self.timer = wx.Timer(self)
+        self.Bind(wx.EVT_TIMER, self.on_timer, self.timer)
+
+        self.sizer = wx.BoxSizer(wx.HORIZONTAL)
+        self.sizer.Add(self.label, 1, wx.ALIGN_CENTER_VERTICAL | wx.LEFT, 5)
+        self.sizer.Add(self.gauge, 0, wx.ALIGN_CENTER_VERTICAL | wx.ALL, 5)
+        self.sizer.Add(self.cancel, 0, wx.ALIGN_CENTER_VERTICAL | wx.ALL, 5)
+        self.SetSizer(self.sizer)
+        self.Hide()
+
+    def update(self, jobs):
+        self.jobs = list(jobs)
+        if jobs:
+            names = ', '.join(os.path.basename(job.path) for job in jobs)
+            self.label.SetLabel("Loading {} file(s): {}".format(len(jobs), names))
+            if not self.timer.IsRunning():
+                self.timer.Start(50)
+            self.Show()
+        else:
+            self.timer.Stop()
+            self.gauge.SetValue(0)
+            self.Hide()
+        self.GetParent().Layout()
+
+    def on_timer(self, _):
+        # Files that haven't reported a count yet (ESKs, the animation table) just pulse
+        if all(job.total for job in self.jobs):
+            done = sum(job.done for job in self.jobs)
+            total = sum(job.total for job in self.jobs)
+            self.gauge.SetValue(100 * done // total)
+        else:
+            self.gauge.Pulse()
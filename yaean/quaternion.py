@@ -0,0 +1,87 @@
+import numpy as np
+
+# All quaternions are (..., 4) arrays in w, x, y, z order, which is also the order keyframe tracks use.
+
+
+def multiply(a, b):
+    """Hamilton product a * b, broadcasting over the leading dimensions."""
+    a = np.asarray(a)
+    b = np.asarray(b)
+    aw, ax, ay, az = np.moveaxis(a, -1, 0)
+    bw, bx, by, bz = np.moveaxis(b, -1, 0)
+    return np.stack((
+        aw * bw - ax * bx - ay * by - az * bz,
+        aw * bx + ax * bw + ay * bz - az * by,
+        aw * by - ax * bz + ay * bw + az * bx,
+        aw * bz + ax * by - ay * bx + az * bw,
+    ), axis=-1)
+
+
+def normalize(q):
+    q = np.asarray(q, dtype=np.float64)
+    norm = np.linalg.norm(q, axis=-1, keepdims=True)
+    return np.divide(q, norm, out=np.tile([1.0, 0.0, 0.0, 0.0], q.shape[:-1] + (1,)), where=norm > 0)
+
+
+def mirror(q, axis=0):
+    """Reflect rotations through the plane perpendicular to axis (0 = x, 1 = y, 2 = z)."""
+    q = np.array(q, copy=True)
+    for i in range(3):
+        if i != axis:
+            q[..., i + 1] *= -1.0
+    return q
+
+
+def from_euler(x, y, z):
+    """Euler angles in degrees to quaternions."""
+    rx = np.radians(np.asarray(x, dtype=np.float64)) / 2
+    ry = np.radians(np.asarray(y, dtype=np.float64)) / 2
+    rz = np.radians(np.asarray(z, dtype=np.float64)) / 2
+    sx, cx = np.sin(rx), np.cos(rx)
+    sy, cy = np.sin(ry), np.cos(ry)
+    sz, cz = np.sin(rz), np.cos(rz)
+
+    return np.stack((
+        cx * cy * cz + sx * sy * sz,
+        sx * cy * cz - cx * sy * sz,
+        cx * sy * cz + sx * cy * sz,
+        cx * cy * sz - sx * sy * cz,
+    ), axis=-1)
+
+
+def to_euler(q):
+    """Quaternions to (..., 3) Euler angles in degrees."""
+    w, x, y, z = np.moveaxis(np.asarray(q, dtype=np.float64), -1, 0)
+    t0 = 2.0 * (w * x + y * z)
+    t1 = 1.0 - 2.0 * (x * x + y * y)
+    t2 = np.clip(2.0 * (w * y - z * x), -1.0, 1.0)
+    t3 = 2.0 * (w * z + x * y)
+    t4 = 1.0 - 2.0 * (y * y + z * z)
+    return np.degrees(np.stack((np.arctan2(t0, t1), np.arcsin(t2), np.arctan2(t3, t4)), axis=-1))
+
+
+def slerp(q0, q1, t):
+    """Spherical interpolation between q0 and q1, taking the shorter path."""
+    q0 = normalize(q0)
+    q1 = normalize(q1)
+    t = np.asarray(t, dtype=np.float64)[..., np.newaxis]
+    dot = np.sum(q0 * q1, axis=-1, keepdims=True)
+    q1 = np.where(dot < 0.0, -q1, q1)
+    dot = np.clip(np.abs(dot), 0.0, 1.0)
+
+    theta = np.arccos(dot)
+    sin_theta = np.sin(theta)
+    # Fall back to lerp where the rotations are nearly identical
+    linear = sin_theta < 1e-6
+    safe = np.where(linear, 1.0, sin_theta)
+    w0 = np.where(linear, 1.0 - t, np.sin((1.0 - t) * theta) / safe)
+    w1 = np.where(linear, t, np.sin(t * theta) / safe)
+    return normalize(w0 * q0 + w1 * q1)
+
+
+def euler_to_quaternion(x, y, z):
+    return tuple(from_euler(x, y, z).tolist())
+
+
+def quaternion_to_euler(w, x, y, z):
+    return tuple(to_euler((w, x, y, z)).tolist())
@@ -0,0 +1,63 @@
+from functools import lru_cache
+
+REMAP_CACHE_SIZE = 32
+
+
+class RemapTable:
+    """Where the nodes of a source skeleton's bones land in a destination skeleton.
+
+    indexes maps each source bone name that gets pasted to its destination bone index, and
+    skipped holds the source bone names the destination doesn't have.  Bones the destination
+    has but the filter leaves out are in neither.
+    """
+    __slots__ = ('destination', 'indexes', 'names', 'skipped', 'bone_filters')
+
+    def __init__(self, source_names, destination_names, bone_filters=None):
+        self.destination = {}
+        for index, name in enumerate(destination_names):
+            self.destination.setdefault(name, index)
+        self.bone_filters = bone_filters
+        self.indexes = {}
+        skipped = set()
+        for name in source_names:
+            self.add(name, skipped)
+        self.names = frozenset(self.indexes)
+        self.skipped = frozenset(skipped)
+
+    def add(self, name, skipped):
+        index = self.destination.get(name)
+        if index is None:
+            skipped.add(name)
+        elif self.bone_filters is None or name in self.bone_filters:
+            self.indexes[name] = index
+
+    def split(self, nodes):
+        """(pasted nodes, skipped bone names) of a source animation's nodes.
+
+        Nodes of bones the source skeleton didn't have when the table was made are looked up
+        in the destination one by one.
+        """
+        pasted, skipped = [], set()
+        for node in nodes:
+            name = node.bone_name
+            if name in self.indexes:
+                pasted.append((node, self.indexes[name]))
+            elif name in self.skipped or name not in self.destination:
+                skipped.add(name)
+            elif self.bone_filters is None or name in self.bone_filters:
+                pasted.append((node, self.destination[name]))
+        return pasted, skipped
+
+
+@lru_cache(maxsize=REMAP_CACHE_SIZE)
+def get_remap_table(source_names, destination_names, bone_filters=None):
+    """Cached RemapTable for a (source skeleton, destination skeleton, filter) triple.
+
+    All three must be hashable, so bone names are passed as tuples and the filter as a
+    frozenset of destination bone names (None pastes every bone).
+    """
+    return RemapTable(source_names, destination_names, bone_filters)
+
+
+def skeleton_names(skeleton):
+    return tuple(bone.name for bone in skeleton.bones)
@@ -0,0 +1,67 @@
+import numpy as np
+
+from yaean import quaternion
+from yaean.constants import ORIENTATION_FLAG
+from yaean.tracks import get_track
+
+
+def sample_frames(frames, start_frame, end_frame, duration):
+    """Output frames for a track and the source times they are sampled at.
+
+    The source frames [start_frame, end_frame) are stretched over [0, duration).  Every
+    keyframe inside the window keeps a keyframe at its new position and both ends always
+    get one, so sparse tracks stay sparse.
+    """
+    last = max(duration - 1, 0)
+    scale = (end_frame - 1 - start_frame) / last if last else 0.0
+    inside = frames[(frames >= start_frame) & (frames < end_frame)]
+    if scale:
+        moved = np.rint((inside - start_frame) / scale)
+    else:
+        moved = np.zeros(len(inside))
+    out_frames = np.unique(np.concatenate(([0, last], moved))).astype(np.int32)
+    out_frames = out_frames[(out_frames >= 0) & (out_frames <= last)]
+    return out_frames, start_frame + out_frames * scale
+
+
+def is_rotation(flag, values):
+    # Camera EANs reuse the orientation flag for the target position, which isn't a unit quaternion
+    return flag == ORIENTATION_FLAG and np.allclose(np.linalg.norm(values, axis=1), 1.0, atol=1e-2)
+
+
+def interpolate(frames, values, times, spherical=False):
+    """Values at the given (fractional) times, holding the first and last keyframes."""
+    if len(frames) == 1:
+        return np.repeat(values, len(times), axis=0)
+    left = np.clip(np.searchsorted(frames, times, side='right') - 1, 0, len(frames) - 2)
+    f0 = frames[left].astype(np.float64)
+    f1 = frames[left + 1].astype(np.float64)
+    t = np.clip((times - f0) / np.maximum(f1 - f0, 1e-12), 0.0, 1.0)
+    v0 = values[left].astype(np.float64)
+    v1 = values[left + 1].astype(np.float64)
+    if spherical:
+        return quaternion.slerp(v0, v1, t)
+    return v0 + (v1 - v0) * t[:, np.newaxis]
+
+
+def resample_track(frames, values, flag, start_frame, end_frame, duration):
+    out_frames, times = sample_frames(frames, start_frame, end_frame, duration)
+    return out_frames, interpolate(frames, values, times, is_rotation(flag, values))
+
+
+def resample_animations(ean, animations, duration=None, start_frame=0, end_frame=None):
+    """Retimes whole animations on their track arrays.
+
+    Without a duration the window keeps its length (a trim).  Position and scale are
+    interpolated linearly, rotations with slerp.
+    """
+    for animation in animations:
+        end = animation.frame_count if end_frame is None else end_frame
+        frame_count = end - start_frame if duration is None else duration
+        for node in animation.nodes:
+            for keyframed_animation in node.keyframed_animations:
+                track = get_track(ean, keyframed_animation)
+                if not len(track):
+                    continue
+                track.set(*resample_track(track.frames, track.values, track.flag, start_frame, end, frame_count))
+        animation.frame_count = frame_count
@@ -0,0 +1,320 @@
+import copy
+import os
+import shutil
+import struct
+import tempfile
+import weakref
+
+from yaean.skeleton_diff import forget_fingerprint
+
+_caches = weakref.WeakKeyDictionary()
+_dirty_skeletons = weakref.WeakSet()
+
+COUNT_OFFSET = 0x12
+TABLE_OFFSET = 0x18
+NAMES_OFFSET = 0x1C
+HEADER_SIZE = 0x20
+ALIGNMENT = 16
+CHUNK_SIZE = 1 << 20
+
+
+class LayoutError(Exception):
+    pass
+
+
+class Layout:
+    """Where an EAN file's header/skeleton, animation blocks and name table are.
+
+    Only the header, the tables and the names are read.  Blocks are (start, size) ranges of
+    the file, and the checks here are what laying the parts out again with iter_parts()
+    needs to give back the same bytes.  Offsets inside an animation block are relative to
+    the block, so unchanged blocks can be copied to a new position as long as they keep
+    their alignment.
+    """
+    def __init__(self, f):
+        f.seek(0, os.SEEK_END)
+        file_size = f.tell()
+        header = read_at(f, 0, HEADER_SIZE)
+        if header[:4] != b'#EAN':
+            raise LayoutError("Not an EAN")
+        count = struct.unpack_from('<H', header, COUNT_OFFSET)[0]
+        table_offset = struct.unpack_from('<I', header, TABLE_OFFSET)[0]
+        names_offset = struct.unpack_from('<I', header, NAMES_OFFSET)[0]
+        if not count:
+            raise LayoutError("No animations")
+        if table_offset < HEADER_SIZE:
+            raise LayoutError("Unexpected header layout")
+        starts = list(struct.unpack('<{}I'.format(count), read_at(f, table_offset, 4 * count)))
+        if starts[0] != table_offset + 4 * count or starts != sorted(starts) or names_offset < starts[-1]:
+            raise LayoutError("Unexpected animation layout")
+
+        # The name table, the names and whatever follows them
+        rest = read_at(f, names_offset, file_size - names_offset)
+        name_offsets = struct.unpack_from('<{}I'.format(count), rest)
+        self.names = []
+        pos = 4 * count
+        for offset in name_offsets:
+            end = rest.find(b'\0', offset - names_offset)
+            if offset - names_offset != pos or end < 0:
+                raise LayoutError("Unexpected name table layout")
+            self.names.append(rest[pos:end])
+            pos = end + 1
+
+        self.head = read_at(f, 0, table_offset)
+        self.blocks = [(start, end - start) for start, end in zip(starts, starts[1:] + [names_offset])]
+        self.tail = rest[pos:]
+
+
+def read_at(f, offset, size):
+    f.seek(offset)
+    data = f.read(size)
+    if len(data) != size:
+        raise LayoutError("File is shorter than its tables say")
+    return data
+
+
+def read_range(f, offset, size):
+    """The bytes at offset, CHUNK_SIZE at a time."""
+    f.seek(offset)
+    while size:
+        chunk = f.read(min(size, CHUNK_SIZE))
+        if not chunk:
+            raise LayoutError("File is shorter than its tables say")
+        size -= len(chunk)
+        yield chunk
+
+
+def get_stamp(path):
+    stat = os.stat(path)
+    return stat.st_size, stat.st_mtime_ns
+
+
+def header_key(head):
+    # The header without the fields iter_parts() fills in
+    head = bytearray(head)
+    struct.pack_into('<H', head, COUNT_OFFSET, 0)
+    struct.pack_into('<I', head, NAMES_OFFSET, 0)
+    return bytes(head)
+
+
+def block_starts(table_offset, blocks):
+    """Where each block goes after the animation table, and the name table offset."""
+    pos = table_offset + 4 * len(blocks)
+    starts = []
+    for _, original_start, size in blocks:
+        if pos % ALIGNMENT != original_start % ALIGNMENT:
+            raise LayoutError("Animation block would change alignment")
+        starts.append(pos)
+        pos += size
+    return starts, pos
+
+
+def iter_parts(head, blocks, names, tail, source=None):
+    """Lays out an EAN the same way Layout reads one, a piece at a time.
+
+    blocks are (data, original start, size).  Blocks without data are copied from their
+    original start in source, the file they were last saved to.
+    """
+    count = len(blocks)
+    head = bytearray(head)
+    starts, names_offset = block_starts(len(head), blocks)
+
+    struct.pack_into('<H', head, COUNT_OFFSET, count)
+    struct.pack_into('<I', head, NAMES_OFFSET, names_offset)
+    pos = names_offset + 4 * count
+    name_offsets = []
+    for name in names:
+        name_offsets.append(pos)
+        pos += len(name) + 1
+
+    yield bytes(head)
+    yield struct.pack('<{}I'.format(count), *starts)
+    for data, start, size in blocks:
+        if data is None:
+            yield from read_range(source, start, size)
+        else:
+            yield data
+    yield struct.pack('<{}I'.format(count), *name_offsets)
+    for name in names:
+        yield name + b'\0'
+    yield tail
+
+
+class SaveCache:
+    """Where each animation's block is in the file an EAN was last saved to.
+
+    Only the header and the name table's tail are kept in memory.  Unchanged blocks are
+    copied from the saved file, which must not have changed since (checked by its size and
+    mtime).
+    """
+    def __init__(self, ean, layout, path):
+        self.head = layout.head
+        self.tail = layout.tail
+        self.blocks = {id(animation): (animation, start, size)
+                       for animation, (start, size) in zip(ean.animations, layout.blocks)}
+        self.dirty = set()
+        self.path = path
+        self.stamp = get_stamp(path)
+
+
+def get_cache(ean, path):
+    try:
+        with open(path, 'rb') as f:
+            layout = Layout(f)
+        if layout.names != [animation.name.encode() for animation in ean.animations]:
+            raise LayoutError("Animations do not match the saved file")
+    except (LayoutError, struct.error):
+        return None
+    return SaveCache(ean, layout, path)
+
+
+def mark_dirty(ean, animations):
+    cache = _caches.get(ean)
+    if cache is not None:
+        cache.dirty.update(id(animation) for animation in animations)
+
+
+def mark_skeleton_dirty(skeleton):
+    _dirty_skeletons.add(skeleton)
+    forget_fingerprint(skeleton)
+
+
+def encode_animations(ean, animations, cache):
+    # Let pyxenoverse encode just these animations, then cut their blocks back out
+    partial = copy.copy(ean)
+    partial.animations = list(animations)
+    fd, path = tempfile.mkstemp(suffix='.ean')
+    os.close(fd)
+    try:
+        removed_nodes = partial.save(path)
+        with open(path, 'rb') as f:
+            layout = Layout(f)
+            blocks = [(read_at(f, start, size), start, size) for start, size in layout.blocks]
+    finally:
+        os.remove(path)
+    if header_key(layout.head) != header_key(cache.head) or layout.tail != cache.tail:
+        raise LayoutError("Header differs from the cached save")
+    return blocks, removed_nodes or []
+
+
+def full_save(ean, path):
+    removed_nodes = ean.save(path)
+    cache = get_cache(ean, path)
+    if cache is None:
+        _caches.pop(ean, None)
+    else:
+        _caches[ean] = cache
+    _dirty_skeletons.discard(ean.skeleton)
+    return removed_nodes or [], list(ean.animations)
+
+
+def incremental_save(ean, path, cache):
+    try:
+        if get_stamp(cache.path) != cache.stamp:
+            raise LayoutError("The last saved file has changed")
+    except OSError:
+        raise LayoutError("The last saved file is gone")
+    dirty = [animation for animation in ean.animations
+             if id(animation) in cache.dirty or id(animation) not in cache.blocks]
+    encoded, removed_nodes = encode_animations(ean, dirty, cache) if dirty else ([], [])
+    encoded = {id(animation): block for animation, block in zip(dirty, encoded)}
+
+    blocks = [encoded.get(id(animation)) or (None,) + cache.blocks[id(animation)][1:] for animation in ean.animations]
+    names = [animation.name.encode() for animation in ean.animations]
+    # Check the layout before anything is written
+    starts, _ = block_starts(len(cache.head), blocks)
+    with open(cache.path, 'rb') as source, open(path, 'wb') as f:
+        for part in iter_parts(cache.head, blocks, names, cache.tail, source):
+            f.write(part)
+
+    cache.blocks = {id(animation): (animation, start, size)
+                    for animation, start, (_, _, size) in zip(ean.animations, starts, blocks)}
+    cache.dirty.clear()
+    cache.path = path
+    cache.stamp = get_stamp(path)
+    return removed_nodes, dirty
+
+
+def make_backup(path):
+    # Keep the old file under a second name instead of copying it
+    backup = path + '.bak'
+    if os.path.exists(backup):
+        os.remove(backup)
+    try:
+        os.link(path, backup)
+    except (OSError, AttributeError):
+        os.replace(path, backup)
+
+
+def sync_dir(dirname):
+    if os.name != 'posix':
+        return
+    fd = os.open(dirname, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def get_umask():
+    umask = os.umask(0)
+    os.umask(umask)
+    return umask
+
+
+def write_atomic(path, write, backup=False):
+    """Calls write(temp_path) and moves the result over path once it is safely on disk.
+
+    The temp file is in the same directory so the final rename is atomic, and a crash
+    while writing leaves the existing file untouched.  The file keeps the permissions of
+    the one it replaces.
+    """
+    dirname = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(dir=dirname, prefix='.' + os.path.basename(path) + '.', suffix='.tmp')
+    os.close(fd)
+    try:
+        result = write(temp_path)
+        with open(temp_path, 'rb+') as f:
+            os.fsync(f.fileno())
+        if os.path.exists(path):
+            # mkstemp() makes the file private to the user
+            shutil.copymode(path, temp_path)
+        else:
+            os.chmod(temp_path, 0o666 & ~get_umask())
+        if backup and os.path.exists(path):
+            make_backup(path)
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    sync_dir(dirname)
+    return result
+
+
+def save_esk(esk, path, backup=False):
+    return write_atomic(path, esk.save, backup)
+
+
+def save_ean(ean, path, backup=False):
+    """Saves an EAN, re-encoding only the animations changed since the last save.
+
+    The first save, and any save after a skeleton edit, is a full save.  Returns
+    (removed_nodes, saved, encoded) where saved is the number of animations written and
+    encoded the animations that had to be re-encoded.
+    """
+    def write(temp_path):
+        cache = _caches.get(ean)
+        if cache is not None and ean.skeleton not in _dirty_skeletons:
+            try:
+                return incremental_save(ean, temp_path, cache)
+            except (LayoutError, struct.error):
+                pass
+        return full_save(ean, temp_path)
+
+    removed_nodes, encoded = write_atomic(path, write, backup)
+    cache = _caches.get(ean)
+    if cache is not None:
+        # The cache was made from the temp file, which is now at path
+        cache.path = os.path.abspath(path)
+    return removed_nodes, len(ean.animations), encoded
@@ -0,0 +1,31 @@
+import json
+import os
+
+from yaean.bone_filters import DIRNAME
+
+SETTINGS_PATH = os.path.join(DIRNAME, 'config', 'settings.json')
+DEFAULTS = {
+    'undo_memory_limit_mb': 64,
+    'mirror': {
+        # Regex substitutions tried in order on each bone name, the first one that matches wins
+        'rules': [
+            ['^([^_]*)_L(_|$)', '\\1_R\\2'],
+            ['^([^_]*)_R(_|$)', '\\1_L\\2'],
+        ],
+        'axis': 'x',
+    },
+    # Default tolerances for Reduce Keyframes, orientation is in degrees
+    'reduce_keyframes': {
+        'position': 0.0001,
+        'orientation': 0.05,
+        'scale': 0.0001,
+    },
+}
+
+
+def load_settings(path=SETTINGS_PATH):
+    settings = dict(DEFAULTS)
+    if os.path.exists(path):
+        with open(path) as f:
+            settings.update(json.load(f))
+    return settings
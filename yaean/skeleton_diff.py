@@ -0,0 +1,66 @@
+import collections
+import hashlib
+import struct
+import weakref
+
+NO_BONE = 65535
+DIFF_CACHE_SIZE = 16
+
+_fingerprints = weakref.WeakKeyDictionary()
+_diffs = collections.OrderedDict()
+
+
+def rest_pose(bone):
+    return tuple(float(value) for row in bone.skinning_matrix for value in row)
+
+
+def fingerprint(skeleton):
+    """Content hash of a skeleton's bone names, hierarchy and rest pose.
+
+    Kept until forget_fingerprint() is called, which mark_skeleton_dirty() does for every
+    skeleton edit.
+    """
+    digest = _fingerprints.get(skeleton)
+    if digest is None:
+        h = hashlib.blake2b(digest_size=16)
+        for bone in skeleton.bones:
+            name = bone.name.encode('utf-8', 'surrogateescape')
+            pose = rest_pose(bone)
+            h.update(struct.pack('<H', len(name)) + name)
+            h.update(struct.pack('<HH{}d'.format(len(pose)), bone.parent_index & 0xFFFF, len(pose), *pose))
+        digest = _fingerprints[skeleton] = h.digest()
+    return digest
+
+
+def forget_fingerprint(skeleton):
+    _fingerprints.pop(skeleton, None)
+
+
+class SkeletonDiff:
+    """How another skeleton differs from a base one, matching bones by name.
+
+    missing are indexes into the other skeleton of bones the base doesn't have, in the other
+    skeleton's order so parents come before their children.  Only indexes are kept, so a
+    diff applies to any skeletons with the same fingerprints.
+    """
+    __slots__ = ('missing',)
+
+    def __init__(self, base, other):
+        base_names = {bone.name for bone in base.bones}
+        self.missing = tuple(i for i, bone in enumerate(other.bones) if bone.name not in base_names)
+
+    def missing_bones(self, other):
+        return [other.bones[i] for i in self.missing]
+
+
+def get_skeleton_diff(base, other):
+    """Cached SkeletonDiff, keyed by the fingerprints of both skeletons."""
+    key = fingerprint(base), fingerprint(other)
+    diff = _diffs.get(key)
+    if diff is None:
+        diff = _diffs[key] = SkeletonDiff(base, other)
+        if len(_diffs) > DIFF_CACHE_SIZE:
+            _diffs.popitem(last=False)
+    else:
+        _diffs.move_to_end(key)
+    return diff
@@ -0,0 +1,80 @@
+"""Startup timing for `YaEAN Organizer.py --startup-time`.
+
+The organizer is started again with `-X importtime` and a report flag.  The child marks
+each startup phase, prints them once the event loop is idle and closes, and the parent
+adds the slowest imports from the interpreter's import log.  Kept free of imports beyond
+the standard library so loading it doesn't show up in the numbers.
+"""
+import sys
+import time
+
+TIME_FLAG = '--startup-time'
+REPORT_FLAG = '--startup-report'
+TOP_IMPORTS = 25
+
+_start = time.perf_counter()
+_marks = []
+
+
+def mark(name):
+    _marks.append((name, time.perf_counter()))
+
+
+def print_phases(file=None):
+    file = file or sys.stdout
+    previous = _start
+    print("{:<30}{:>12}".format('phase', 'ms'), file=file)
+    for name, when in _marks:
+        print("{:<30}{:>12.1f}".format(name, (when - previous) * 1000), file=file)
+        previous = when
+    print("{:<30}{:>12.1f}".format('total', (previous - _start) * 1000), file=file)
+    file.flush()
+
+
+def parse_importtime(text):
+    """(name, depth, self_us, cumulative_us) for each line of `-X importtime` output."""
+    imports = []
+    for line in text.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        parts = line[len('import time:'):].split('|')
+        if len(parts) != 3 or not parts[0].strip().isdigit():
+            # The header line
+            continue
+        name = parts[2].rstrip()
+        stripped = name.lstrip()
+        depth = (len(name) - len(stripped) - 1) // 2
+        imports.append((stripped, depth, int(parts[0]), int(parts[1])))
+    return imports
+
+
+def print_imports(imports, count=TOP_IMPORTS, file=None):
+    file = file or sys.stdout
+    top_level = sum(cumulative for _, depth, _, cumulative in imports if depth == 0)
+    print("\n{} modules imported, {:.1f} ms at the top level".format(len(imports), top_level / 1000), file=file)
+    print("{:<50}{:>12}{:>12}".format('slowest imports', 'self (ms)', 'total (ms)'), file=file)
+    for name, _, self_us, cumulative in sorted(imports, key=lambda i: i[3], reverse=True)[:count]:
+        print("{:<50}{:>12.1f}{:>12.1f}".format(name, self_us / 1000, cumulative / 1000), file=file)
+
+
+def measure(script):
+    """Starts the organizer with REPORT_FLAG and prints its startup breakdown."""
+    import subprocess
+    if getattr(sys, 'frozen', False):
+        # A frozen build can't be given interpreter options, so only the phases are shown
+        command = [sys.executable, REPORT_FLAG]
+    else:
+        command = [sys.executable, '-X', 'importtime', script, REPORT_FLAG]
+    start = time.perf_counter()
+    result = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True)
+    elapsed = time.perf_counter() - start
+    print(result.stdout, end='')
+    print("\nprocess start to exit: {:.1f} ms".format(elapsed * 1000))
+    imports = parse_importtime(result.stderr)
+    if imports:
+        print_imports(imports)
+    elif result.returncode:
+        print(result.stderr, file=sys.stderr)
+    else:
+        print("No import times available (they need Python 3.7 or later, run from source)")
+    return result.returncode
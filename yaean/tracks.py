@@ -0,0 +1,96 @@
+import weakref
+
+import numpy as np
+
+from pyxenoverse.ean.keyframe import Keyframe
+
+_stores = weakref.WeakKeyDictionary()
+
+
+class Track:
+    """Keyframes of a KeyframedAnimation as a frame array and a (N, 4) w/x/y/z array."""
+    __slots__ = ('keyframed_animation', 'frames', 'values', 'dirty')
+
+    def __init__(self, keyframed_animation):
+        keyframes = keyframed_animation.keyframes
+        self.keyframed_animation = keyframed_animation
+        self.frames = np.array([keyframe.frame for keyframe in keyframes], dtype=np.int32)
+        self.values = np.array(
+            [(keyframe.w, keyframe.x, keyframe.y, keyframe.z) for keyframe in keyframes],
+            dtype=np.float32).reshape(-1, 4)
+        self.dirty = False
+
+    def __len__(self):
+        return len(self.frames)
+
+    @property
+    def flag(self):
+        return self.keyframed_animation.flag
+
+    def set(self, frames, values):
+        self.frames = np.ascontiguousarray(frames, dtype=np.int32)
+        self.values = np.ascontiguousarray(values, dtype=np.float32).reshape(-1, 4)
+        self.dirty = True
+
+    def sync(self):
+        if not self.dirty:
+            return
+        keyframes = self.keyframed_animation.keyframes
+        frames = self.frames.tolist()
+        values = self.values.tolist()
+        if len(keyframes) == len(frames):
+            for keyframe, frame, (w, x, y, z) in zip(keyframes, frames, values):
+                keyframe.frame = frame
+                keyframe.w, keyframe.x, keyframe.y, keyframe.z = w, x, y, z
+        else:
+            self.keyframed_animation.keyframes = [
+                Keyframe(frame, w, x, y, z) for frame, (w, x, y, z) in zip(frames, values)]
+        self.dirty = False
+
+
+class TrackStore:
+    def __init__(self):
+        self.tracks = {}
+
+    def get(self, keyframed_animation):
+        track = self.tracks.get(id(keyframed_animation))
+        if track is None:
+            track = Track(keyframed_animation)
+            self.tracks[id(keyframed_animation)] = track
+        return track
+
+    def sync(self):
+        for track in self.tracks.values():
+            track.sync()
+        self.tracks.clear()
+
+
+def get_store(ean):
+    store = _stores.get(ean)
+    if store is None:
+        store = TrackStore()
+        _stores[ean] = store
+    return store
+
+
+def get_track(ean, keyframed_animation):
+    return get_store(ean).get(keyframed_animation)
+
+
+def find_track(ean, keyframed_animation):
+    """The track of a keyframed animation if one has been made, without making one."""
+    store = _stores.get(ean)
+    if store is None:
+        return None
+    track = store.tracks.get(id(keyframed_animation))
+    if track is None or track.keyframed_animation is not keyframed_animation:
+        return None
+    return track
+
+
+def sync_tracks(ean):
+    # Writes edited arrays back into the Keyframe objects.  Anything that reads or replaces
+    # keyframes directly (saving, pasting, set_duration) has to call this first.
+    store = _stores.get(ean)
+    if store is not None:
+        store.sync()